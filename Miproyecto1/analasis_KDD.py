@@ -1,104 +1,118 @@
 import pandas as pd
 import numpy as np
 import plotly.express as px
+import plotly.graph_objects as go
 import plotly.io as pio
 import warnings
-
-def preparar_datos_para_dashboard_interactivo():
-    warnings.filterwarnings('ignore')
-
-    file_path = "encuesta_limpia_ESPOCH.xlsx"
-    print(f"Iniciando el procesamiento del archivo: {file_path}")
-
-    # === Mapas y configuraciones ===
-    map_competencias = {'Ninguno': 1, 'Básico': 2, 'Intermedio': 3, 'Avanzado': 4, 'Experto': 5}
-    map_acuerdo = {'Totalmente en desacuerdo': 1, 'En desacuerdo': 2, 'Neutral': 3, 'De acuerdo': 4, 'Totalmente de acuerdo': 5}
-    map_importancia = {'Sin importancia': 1, 'Poca importancia': 2, 'Neutral': 3, 'Importante': 4, 'Muy importante': 5}
-
-    rename_dict = {
-        'Por favor, escribe el nombre de tu carrera o programa de estudios.': 'Demo_Carrera',
-        '¿Qué semestre estás cursando actualmente?': 'Demo_Semestre',
-        '¿Cuál es tu edad?': 'Demo_Edad',
-        '¿Con qué género te identificas?': 'Demo_Genero',
-        'Análisis e interpretación de datos.': 'P1_Analisis_Datos',
-        'Fundamentos de ciberseguridad.': 'P1_Ciberseguridad',
-        'Conceptos básicos de programación y automatización.': 'P1_Programacion',
-        'Manejo de herramientas de IA (ej. ChatGPT, Copilot, Gemini, DALL-E)': 'P1_Manejo_IA',
-        'Pensamiento crítico y resolución de problemas complejos': 'P2_Pensamiento_Critico',
-        'Comunicación efectiva en entornos digitales': 'P2_Comunicacion_Digital',
-        'Adaptabilidad y aprendizaje continuo': 'P2_Adaptabilidad',
-        'Creatividad e innovación': 'P2_Creatividad',
-        'Colaboración en equipos multidisciplinarios': 'P2_Colaboracion',
-        'El currículo de mi carrera está alineado con las habilidades demandadas por el mercado laboral digital.': 'P3_Curriculo_Alineado',
-        'Mi universidad promueve activamente el desarrollo de competencias digitales y blandas.': 'P3_Promueve_Competencias',
-        'Siento que la formación que he recibido me prepara para trabajos que aún no existen.': 'P3_Prepara_Futuro',
-        'El uso de la tecnología y la IA está bien integrado en las asignaturas de mi carrera.': 'P3_IA_Integrada',
-        'La metodología de enseñanza en mi carrera fomenta la adaptabilidad y el aprendizaje continuo.': 'P3_Metodologia_Adaptable',
-        'Me siento seguro(a) de que mi formación académica me prepara para conseguir un empleo relevante en mi área.': 'P4_Confianza_Empleo',
-        'Mi perfil de egreso es competitivo en el mercado laboral actual.': 'P4_Perfil_Competitivo',
-        'Considero que mis habilidades blandas (ej. comunicación, creatividad) me dan una ventaja en el mercado laboral.': 'P4_Ventaja_Blandas',
-        'Creo que mi conocimiento sobre herramientas de IA mejorará mis oportunidades laborales.': 'P4_IA_Oportunidades',
-        'Habilidades técnicas y digitales (ej. programación, análisis de datos)': 'P5_Factor_Tecnicas',
-        'Habilidades blandas (ej. pensamiento crítico, adaptabilidad)': 'P5_Factor_Blandas',
-        'Experiencia práctica o pasantías': 'P5_Factor_Experiencia',
-        'Red de contactos (networking)': 'P5_Factor_Networking',
-        'Título académico de la universidad': 'P5_Factor_Titulo',
-        'El profesorado de mi carrera está capacitado para integrar herramientas de IA en la enseñanza.': 'P6_Profesor_Capacitado_IA',
-        'Mi universidad fomenta la innovación en las metodologías de enseñanza para adaptarse a la era digital.': 'P6_Universidad_Innova',
-        'Mi universidad tiene los recursos adecuados (plataformas, software) para formar profesionales en la era digital.': 'P6_Recursos_Adecuados',
-        'En general, recomendaría mi universidad como una institución que prepara para los desafíos del mercado laboral digital.': 'P6_Recomendaria_Universidad'
-    }
-
-    col_groups = {
-        'Ind1_Tecnicas': ['P1_Analisis_Datos', 'P1_Ciberseguridad', 'P1_Programacion', 'P1_Manejo_IA'],
-        'Ind1_Blandas': ['P2_Pensamiento_Critico', 'P2_Comunicacion_Digital', 'P2_Adaptabilidad', 'P2_Creatividad', 'P2_Colaboracion'],
-        'Ind2_Pertinencia': ['P3_Curriculo_Alineado', 'P3_Promueve_Competencias', 'P3_Prepara_Futuro', 'P3_IA_Integrada', 'P3_Metodologia_Adaptable'],
-        'Ind3_Confianza': ['P4_Confianza_Empleo', 'P4_Perfil_Competitivo', 'P4_Ventaja_Blandas', 'P4_IA_Oportunidades'],
-        'Ind3_Factores': ['P5_Factor_Tecnicas', 'P5_Factor_Blandas', 'P5_Factor_Experiencia', 'P5_Factor_Networking', 'P5_Factor_Titulo'],
-        'Ind4_Universidad': ['P6_Profesor_Capacitado_IA', 'P6_Universidad_Innova', 'P6_Recursos_Adecuados', 'P6_Recomendaria_Universidad']
-    }
-
-    df = pd.read_excel(file_path).rename(columns=rename_dict)
-    columnas_utiles = list(rename_dict.values())
-    df_main = df[columnas_utiles].copy()
-
-    # === Mapear valores ===
-    for grupo, cols in {
-        'competencias': col_groups['Ind1_Tecnicas'] + col_groups['Ind1_Blandas'],
-        'acuerdo': col_groups['Ind2_Pertinencia'] + col_groups['Ind3_Confianza'] + col_groups['Ind4_Universidad'],
-        'importancia': col_groups['Ind3_Factores']
-    }.items():
-        if grupo == 'competencias':
-            mapa = map_competencias
-        elif grupo == 'acuerdo':
-            mapa = map_acuerdo
-        else:
-            mapa = map_importancia
-        for c in cols:
-            df_main[c] = df_main[c].astype(str).map(mapa)
-            df_main[c] = pd.to_numeric(df_main[c], errors='coerce')
+from carga_datos import cargar_encuesta_limpia, ruta_encuesta_limpia, ARCHIVO_EXCEL
+from esquema_encuesta import RENAME_DICT, COL_GROUPS, COLUMNAS_UTILES, INDICADORES, codificar_likert, agregar_indicadores, compactar_encuesta
+from cubo_indicadores import CuboIndicadores, DIMENSIONES, cargar_cubo_vigente, filtrar_encuesta
+from carreras import catalogo_carreras
+import metricas
+
+# Por encima de este número de respuestas el gráfico de distribución no envía todos
+# los puntos al navegador: las cajas se calculan aquí y se dibuja solo una muestra
+# de puntos con WebGL
+MAX_PUNTOS_DISTRIBUCION = 5000
+
+def cargar_datos_kdd(carpeta='.', respaldo=ARCHIVO_EXCEL):
+    """
+    Carga la encuesta limpia con las preguntas codificadas 1-5 y los indicadores,
+    y el cubo de indicadores (el guardado si está vigente, o construido aquí).
+    """
+    # Prefiere el Parquet y lee solo las columnas que se usan
+    with metricas.tramo('carga') as medida:
+        df = cargar_encuesta_limpia(columnas=list(RENAME_DICT.keys()), carpeta=carpeta, respaldo=respaldo).rename(columns=RENAME_DICT)
+        medida.filas = len(df)
+    df_main = df[COLUMNAS_UTILES].copy()
+
+    # === Mapear valores (las 27 preguntas Likert en una sola pasada vectorizada) ===
+    with metricas.tramo('mapeo_likert', filas=len(df_main)):
+        likert = codificar_likert(df_main)
+        df_main[likert.columns] = likert
 
     # === Cálculo de indicadores ===
-    df_main['Promedio_Ind1_Tecnicas'] = df_main[col_groups['Ind1_Tecnicas']].mean(axis=1)
-    df_main['Promedio_Ind1_Blandas'] = df_main[col_groups['Ind1_Blandas']].mean(axis=1)
-    df_main['Promedio_Ind2_Pertinencia'] = df_main[col_groups['Ind2_Pertinencia']].mean(axis=1)
-    df_main['Promedio_Ind3_Confianza'] = df_main[col_groups['Ind3_Confianza']].mean(axis=1)
-    df_main['Promedio_Ind4_Universidad'] = df_main[col_groups['Ind4_Universidad']].mean(axis=1)
-
+    with metricas.tramo('indicadores', filas=len(df_main)):
+        agregar_indicadores(df_main)
+
+    # === Compactación (Likert Int8, indicadores float32, demografía categórica) ===
+    with metricas.tramo('compactacion', filas=len(df_main)):
+        df_main = compactar_encuesta(df_main)
+
+    # === Cubo de indicadores (guardado por limpiar_datos.py, o construido aquí) ===
+    with metricas.tramo('cubo'):
+        cubo = cargar_cubo_vigente(carpeta)
+        if cubo is None:
+            cubo = CuboIndicadores.desde_encuesta(df)
+    return df_main, cubo
+
+# Nombre de cada indicador en el gráfico de KPIs
+NOMBRES_KPI = {
+    'Promedio_Ind1_Tecnicas': 'Competencias Técnicas',
+    'Promedio_Ind1_Blandas': 'Competencias Blandas',
+    'Promedio_Ind2_Pertinencia': 'Pertinencia Formación',
+    'Promedio_Ind3_Confianza': 'Confianza Empleabilidad',
+    'Promedio_Ind4_Universidad': 'Percepción Universidad',
+}
+
+def cajas_indicadores(df_main, cols_box):
+    """
+    Cuartiles y bigotes (el valor más extremo dentro de 1.5 veces el rango
+    intercuartílico) de cada columna, como los calcula Plotly.
+    """
+    filas = {}
+    for col in cols_box:
+        valores = df_main[col].to_numpy(dtype=np.float64, na_value=np.nan)
+        valores = valores[~np.isnan(valores)]
+        q1, mediana, q3 = np.percentile(valores, [25, 50, 75])
+        rango = q3 - q1
+        dentro = valores[(valores >= q1 - 1.5 * rango) & (valores <= q3 + 1.5 * rango)]
+        filas[col] = {'q1': q1, 'mediana': mediana, 'q3': q3, 'minimo': dentro.min(), 'maximo': dentro.max()}
+    return pd.DataFrame.from_dict(filas, orient='index')
+
+def _figura_distribucion_agregada(cajas, muestra, total, semilla=0):
+    """
+    Versión de la figura de distribución para muchas respuestas: cajas con los
+    cuartiles ya calculados (`cajas`, ver cajas_indicadores) y, encima, la
+    muestra de respuestas dibujada con Scattergl.
+    """
+    colores = px.colors.qualitative.Set2
+    cols_box = list(cajas.index)
+    rng = np.random.default_rng(semilla)
+    fig = go.Figure()
+    for i, col in enumerate(cols_box):
+        caja = cajas.loc[col]
+        color = colores[i % len(colores)]
+        fig.add_trace(go.Box(
+            x=[i], q1=[caja['q1']], median=[caja['mediana']], q3=[caja['q3']],
+            lowerfence=[caja['minimo']], upperfence=[caja['maximo']],
+            name=col, legendgroup=col, marker_color=color, boxpoints=False,
+        ))
+        puntos = muestra[col].to_numpy(dtype=np.float64, na_value=np.nan)
+        puntos = puntos[~np.isnan(puntos)]
+        fig.add_trace(go.Scattergl(
+            x=i - 0.35 + rng.uniform(-0.08, 0.08, len(puntos)), y=puntos,
+            mode='markers', marker=dict(color=color, size=3, opacity=0.5),
+            name=col, legendgroup=col, showlegend=False, hoverinfo='y',
+        ))
+    fig.update_layout(
+        title=f'Distribución de Promedios por Indicador (muestra de {len(muestra)} de {total} respuestas)',
+        xaxis=dict(title='Indicador', tickmode='array', tickvals=list(range(len(cols_box))), ticktext=cols_box),
+        yaxis_title='Promedio',
+    )
+    return fig
+
+def figuras_kdd(promedios, conteo_carreras, factores, respuestas, cajas=None, total=None):
+    """
+    Arma las cuatro figuras interactivas (fig1-fig4) a partir de tablas ya
+    agregadas: promedios por indicador, respuestas por código de carrera, media de
+    cada factor y los indicadores de cada respuesta. Con `cajas` (ver
+    cajas_indicadores), `respuestas` es una muestra de las `total` respuestas.
+    """
     # === KPIs Generales ===
     df_kpi_generales = pd.DataFrame({
-        'Indicador': [
-            'Competencias Técnicas', 'Competencias Blandas', 
-            'Pertinencia Formación', 'Confianza Empleabilidad', 
-            'Percepción Universidad'
-        ],
-        'Promedio': [
-            df_main['Promedio_Ind1_Tecnicas'].mean(),
-            df_main['Promedio_Ind1_Blandas'].mean(),
-            df_main['Promedio_Ind2_Pertinencia'].mean(),
-            df_main['Promedio_Ind3_Confianza'].mean(),
-            df_main['Promedio_Ind4_Universidad'].mean()
-        ]
+        'Indicador': [NOMBRES_KPI[i] for i in INDICADORES],
+        'Promedio': promedios[list(INDICADORES)].to_numpy(dtype=np.float64),
     })
 
     # === Gráficos Interactivos ===
@@ -108,34 +122,91 @@ def preparar_datos_para_dashboard_interactivo():
                   color_continuous_scale='tealgrn')
     fig1.update_layout(xaxis_title=None, yaxis_title='Promedio (1-5)', template='plotly_white')
 
-    conteo_carreras = df_main['Demo_Carrera'].value_counts().reset_index()
-    conteo_carreras.columns = ['Carrera', 'Cantidad']
+    # Conteos por código del catálogo de carreras, etiquetados con el nombre canónico
+    conteo_carreras = pd.DataFrame({
+        'Carrera': catalogo_carreras().nombre(conteo_carreras.index).to_numpy(),
+        'Cantidad': conteo_carreras.to_numpy(),
+    })
 
     fig2 = px.bar(conteo_carreras, y='Carrera', x='Cantidad',
                   orientation='h', title='Número de Respuestas por Carrera',
                   color='Cantidad', color_continuous_scale='blues')
 
     # === Factores de empleabilidad ===
-    df_factores = df_main[col_groups['Ind3_Factores']].mean().reset_index()
+    df_factores = factores.reset_index()
     df_factores.columns = ['Factor', 'Importancia_Promedio']
     fig3 = px.bar(df_factores, x='Importancia_Promedio', y='Factor',
                   orientation='h', title='Importancia Promedio de Factores de Empleabilidad',
                   color='Importancia_Promedio', color_continuous_scale='viridis')
 
     # === Distribución ===
-    cols_box = ['Promedio_Ind1_Tecnicas','Promedio_Ind1_Blandas',
-                'Promedio_Ind2_Pertinencia','Promedio_Ind3_Confianza',
-                'Promedio_Ind4_Universidad']
-    df_box = df_main.melt(value_vars=cols_box, var_name='Indicador', value_name='Promedio')
-    fig4 = px.box(df_box, x='Indicador', y='Promedio', points='all',
-                  title='Distribución de Promedios por Indicador',
-                  color='Indicador', color_discrete_sequence=px.colors.qualitative.Set2)
+    if cajas is not None:
+        fig4 = _figura_distribucion_agregada(cajas, respuestas, total)
+    else:
+        df_box = respuestas.melt(value_vars=list(INDICADORES), var_name='Indicador', value_name='Promedio')
+        fig4 = px.box(df_box, x='Indicador', y='Promedio', points='all',
+                      title='Distribución de Promedios por Indicador',
+                      color='Indicador', color_discrete_sequence=px.colors.qualitative.Set2)
+
+    return {'fig1': fig1, 'fig2': fig2, 'fig3': fig3, 'fig4': fig4}
+
+def construir_figuras_kdd(df_main, cubo, max_puntos=MAX_PUNTOS_DISTRIBUCION, filtros=None):
+    """
+    Construye las cuatro figuras interactivas (fig1-fig4), opcionalmente solo con
+    las respuestas que cumplen `filtros` {dimensión del cubo: valor o lista}. Las
+    tres primeras salen del cubo; la de distribución usa las respuestas individuales.
+    """
+    promedios = cubo.medias(filtros=filtros, medidas=list(INDICADORES)).iloc[0]
+    conteo_carreras = cubo.conteos(por=['Cod_Carrera'], filtros=filtros)
+    conteo_carreras = conteo_carreras[conteo_carreras.index.notna() & (conteo_carreras > 0)]
+    conteo_carreras = conteo_carreras.sort_values(ascending=False, kind='stable')
+    factores = cubo.medias(filtros=filtros, medidas=COL_GROUPS['Ind3_Factores']).iloc[0]
+
+    respuestas = filtrar_encuesta(df_main, filtros) if filtros else df_main
+    if len(respuestas) > max_puntos:
+        cajas = cajas_indicadores(respuestas, list(INDICADORES))
+        muestra = respuestas[list(INDICADORES)].sample(n=max_puntos, random_state=0)
+        return figuras_kdd(promedios, conteo_carreras, factores, muestra, cajas, len(respuestas))
+    return figuras_kdd(promedios, conteo_carreras, factores, respuestas)
+
+def opciones_filtros_kdd(cubo):
+    """
+    Valores de cada dimensión del cubo por los que se pueden filtrar las figuras.
+    """
+    opciones = {}
+    for dimension in DIMENSIONES:
+        valores = cubo.conteos(por=[dimension]).index
+        opciones[dimension] = sorted(valores[valores.notna()].tolist())
+    return opciones
+
+def construir_figuras_sql(consultas, max_puntos=MAX_PUNTOS_DISTRIBUCION, filtros=None):
+    """
+    Las mismas figuras que construir_figuras_kdd, con las consultas SQL de
+    `consultas` (consultas_sql.ConsultasEncuesta): del Parquet solo se leen las
+    columnas de cada consulta y las filas que cumplen `filtros`.
+    """
+    medias = consultas.medias(list(INDICADORES) + COL_GROUPS['Ind3_Factores'], filtros)
+    total = int(medias['n_respuestas'])
+    conteo_carreras = consultas.conteos_por_carrera(filtros)
+    factores = medias[COL_GROUPS['Ind3_Factores']]
+    if total > max_puntos:
+        muestra = consultas.indicadores(filtros, limite=max_puntos)
+        return figuras_kdd(medias, conteo_carreras, factores, muestra, consultas.cajas_indicadores(filtros), total)
+    return figuras_kdd(medias, conteo_carreras, factores, consultas.indicadores(filtros))
+
+@metricas.medido('analasis_KDD')
+def preparar_datos_para_dashboard_interactivo():
+    warnings.filterwarnings('ignore')
+
+    print(f"Iniciando el procesamiento del archivo: {ruta_encuesta_limpia()}")
+
+    df_main, cubo = cargar_datos_kdd()
+    with metricas.tramo('graficos', filas=len(df_main)):
+        figuras = construir_figuras_kdd(df_main, cubo)
 
     # === Mostrar gráficos ===
-    fig1.show()
-    fig2.show()
-    fig3.show()
-    fig4.show()
+    for fig in figuras.values():
+        fig.show()
 
     print("\n✅ Gráficos interactivos generados correctamente. Listos para integrar en dashboard.")
 
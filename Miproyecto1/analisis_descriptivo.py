@@ -1,10 +1,26 @@
 import pandas as pd
 import numpy as np
-import scipy.stats as stats
 import matplotlib.pyplot as plt
 import seaborn as sns
 import warnings
+from carga_datos import cargar_encuesta_limpia, ruta_encuesta_limpia, ARCHIVO_CSV
+from esquema_encuesta import RENAME_DICT, NOMBRES_ORIGINALES, COL_GROUPS, codificar_likert
+from correlaciones import correlaciones_hipotesis
+from anova_grupos import EstadisticosGrupos
+from carreras import catalogo_carreras
+from remuestreo import intervalos_medias, intervalos_correlaciones, pruebas_anova, N_REMUESTRAS
+import metricas
 
+# Hipótesis de correlación: (clave, variable X, variable Y). Todas se buscan en la
+# misma matriz de correlaciones, así que agregar hipótesis no cuesta más cálculo
+HIPOTESIS_CORRELACION = [
+    ('H1', 'COMP_DIGITAL', 'PERCEP_IA'),
+    ('H2', 'COMP_DIGITAL', 'COMP_PERTINENCIA'),
+    ('H4', 'PERCEP_IA', 'DOMINIO_DATOS'),
+    ('H5', 'COMP_DIGITAL', 'DOMINIO_DATOS'),
+]
+
+@metricas.medido('analisis_descriptivo')
 def run_full_analysis():
     """
     Script único para cargar, procesar y analizar la encuesta de percepción
@@ -18,129 +34,74 @@ def run_full_analysis():
     
     print("Iniciando el script de análisis integral...")
 
-    # --- 1. Definición de Mapeos y Columnas Clave ---
-    
-    # Diccionarios de mapeo según el archivo "Indicadores.xlsx"
-    map_competencias = {
-        'Ninguno': 1,
-        'Básico': 2,
-        'Intermedio': 3,
-        'Avanzado': 4,
-        'Experto': 5
-    }
-    
-    map_acuerdo = {
-        'Totalmente en desacuerdo': 1,
-        'En desacuerdo': 2,
-        'Neutral': 3,
-        'De acuerdo': 4,
-        'Totalmente de acuerdo': 5
-    }
-    
-    map_importancia = {
-        'Sin importancia': 1,
-        'Poca importancia': 2,
-        'Neutral': 3,
-        'Importante': 4,
-        'Muy importante': 5
-    }
-    
-    # Definición de columnas (copiadas de la estructura del CSV)
-    
+    # --- 1. Definición de Columnas Clave ---
+    # Los mapeos Likert y los nombres cortos se definen en esquema_encuesta.py
+
     # Demográficas (para H3)
-    col_carrera = 'Por favor, escribe el nombre de tu carrera o programa de estudios.'
-    col_semestre = '¿Qué semestre estás cursando actualmente?'
-    
+    col_carrera = 'Demo_Carrera'
+    col_semestre = 'Demo_Semestre'
+
     # Indicador 1A: Competencias Técnicas (para H1, H2, H3, H5)
-    cols_dc = [
-        'Análisis e interpretación de datos.',
-        'Fundamentos de ciberseguridad.',
-        'Conceptos básicos de programación y automatización.',
-        'Manejo de herramientas de IA (ej. ChatGPT, Copilot, Gemini, DALL-E)'
-    ]
-    
+    cols_dc = COL_GROUPS['Ind1_Tecnicas']
+
     # Indicador 1B: Habilidades Blandas
-    cols_blandas = [
-        'Pensamiento crítico y resolución de problemas complejos',
-        'Comunicación efectiva en entornos digitales',
-        'Adaptabilidad y aprendizaje continuo',
-        'Creatividad e innovación',
-        'Colaboración en equipos multidisciplinarios'
-    ]
-    
+    cols_blandas = COL_GROUPS['Ind1_Blandas']
+
     # Indicador 2: Pertinencia de la Formación (para H2)
-    cols_pertinencia = [
-        'El currículo de mi carrera está alineado con las habilidades demandadas por el mercado laboral digital.',
-        'Mi universidad promueve activamente el desarrollo de competencias digitales y blandas.',
-        'Siento que la formación que he recibido me prepara para trabajos que aún no existen.',
-        'El uso de la tecnología y la IA está bien integrado en las asignaturas de mi carrera.',
-        'La metodología de enseñanza en mi carrera fomenta la adaptabilidad y el aprendizaje continuo.'
-    ]
-    
+    cols_pertinencia = COL_GROUPS['Ind2_Pertinencia']
+
     # Indicador 3A: Confianza en Empleabilidad
     # Variable específica para H1 y H4: Percepción del impacto de la IA
-    col_ai_impact = 'Creo que mi conocimiento sobre herramientas de IA mejorará mis oportunidades laborales.'
-    
+    col_ai_impact = 'P4_IA_Oportunidades'
+
     # Indicador 3B: Importancia de Factores
-    cols_factores = [
-        'Habilidades técnicas y digitales (ej. programación, análisis de datos)',
-        'Habilidades blandas (ej. pensamiento crítico, adaptabilidad)',
-        'Experiencia práctica o pasantías',
-        'Red de contactos (networking)',
-        'Título académico de la universidad'
-    ]
-    
+    cols_factores = COL_GROUPS['Ind3_Factores']
+
     # Indicador 4A: Percepción Universidad y Profesorado
-    cols_univ_prof = [
-        'El profesorado de mi carrera está capacitado para integrar herramientas de IA en la enseñanza.',
-        'Mi universidad fomenta la innovación en las metodologías de enseñanza para adaptarse a la era digital.',
-        'Mi universidad tiene los recursos adecuados (plataformas, software) para formar profesionales en la era digital.',
-        'En general, recomendaría mi universidad como una institución que prepara para los desafíos del mercado laboral digital.'
-    ]
+    cols_univ_prof = COL_GROUPS['Ind4_Universidad']
 
     # --- 2. Carga y Limpieza de Datos ---
     
-    file_path = "encuesta_limpia_ESPOCH.csv"
+    cols_likert = cols_dc + cols_blandas + cols_pertinencia + [col_ai_impact] + cols_factores + cols_univ_prof
+    columnas_usadas = [col_carrera, col_semestre] + cols_likert
+    nombres_originales = [largo for largo, corto in RENAME_DICT.items() if corto in columnas_usadas]
     try:
-        df = pd.read_csv(file_path)
+        # Prefiere el Parquet y lee solo las columnas que se usan
+        with metricas.tramo('carga') as medida:
+            df = cargar_encuesta_limpia(columnas=nombres_originales, respaldo=ARCHIVO_CSV).rename(columns=RENAME_DICT)
+            medida.filas = len(df)
     except FileNotFoundError:
-        print(f"Error: No se encontró el archivo en la ruta: {file_path}")
+        print(f"Error: No se encontró el archivo en la ruta: {ruta_encuesta_limpia(respaldo=ARCHIVO_CSV)}")
         return
 
-    # Lista de todas las columnas a procesar y sus mapeos
-    all_cols_to_process = [
-        (cols_dc, map_competencias),
-        (cols_blandas, map_competencias),
-        (cols_pertinencia, map_acuerdo),
-        ([col_ai_impact], map_acuerdo), # Como lista para el loop
-        (cols_factores, map_importancia),
-        (cols_univ_prof, map_acuerdo)
-    ]
-    
-    # Aplicar mapeos y conversión a numérico
-    for col_list, mapping in all_cols_to_process:
-        for col in col_list:
-            if col in df.columns:
-                df[col] = df[col].map(mapping)
-                df[col] = pd.to_numeric(df[col], errors='coerce')
-            else:
-                print(f"Advertencia: La columna '{col}' no se encontró. Se omitirá.")
+    # Aplicar mapeos Likert a todas las columnas en una sola pasada vectorizada
+    for col in cols_likert:
+        if col not in df.columns:
+            print(f"Advertencia: La columna '{NOMBRES_ORIGINALES.get(col, col)}' no se encontró. Se omitirá.")
+    with metricas.tramo('mapeo_likert', filas=len(df)):
+        likert = codificar_likert(df, [c for c in cols_likert if c in df.columns])
+        df[likert.columns] = likert
 
     # --- 3. Ingeniería de Indicadores (Promedios) ---
     
     # Promedios de los indicadores
-    df['COMP_DIGITAL'] = df[cols_dc].mean(axis=1)
-    df['COMP_BLANDAS'] = df[cols_blandas].mean(axis=1)
-    df['COMP_PERTINENCIA'] = df[cols_pertinencia].mean(axis=1)
-    df['COMP_FACTORES'] = df[cols_factores].mean(axis=1)
-    df['COMP_UNIV_PROF'] = df[cols_univ_prof].mean(axis=1)
+    with metricas.tramo('indicadores', filas=len(df)):
+        df['COMP_DIGITAL'] = df[cols_dc].mean(axis=1)
+        df['COMP_BLANDAS'] = df[cols_blandas].mean(axis=1)
+        df['COMP_PERTINENCIA'] = df[cols_pertinencia].mean(axis=1)
+        df['COMP_FACTORES'] = df[cols_factores].mean(axis=1)
+        df['COMP_UNIV_PROF'] = df[cols_univ_prof].mean(axis=1)
     
     # Variables específicas para hipótesis
     df['PERCEP_IA'] = df[col_ai_impact]
-    df['DOMINIO_DATOS'] = df['Análisis e interpretación de datos.'] # Proxy para H4 y H5
+    df['DOMINIO_DATOS'] = df['P1_Analisis_Datos'] # Proxy para H4 y H5
 
     # Limpieza de variables demográficas
-    df['CARRERA'] = df[col_carrera].str.strip().str.title()
+    # Carrera: código del catálogo (une 'FINANZAS', 'Lic en finanzas'...) y su nombre canónico
+    with metricas.tramo('carreras', filas=len(df)):
+        catalogo = catalogo_carreras()
+        df['COD_CARRERA'] = catalogo.codificar(df[col_carrera])
+    df['CARRERA'] = catalogo.nombre(df['COD_CARRERA'])
     df['SEMESTRE'] = df[col_semestre].str.strip()
 
     # --- 4. Análisis Descriptivo y Frecuencias ---
@@ -150,7 +111,9 @@ def run_full_analysis():
     print("="*50)
     
     print("\n--- Frecuencia por Carrera (Top 10) ---")
-    print(df['CARRERA'].value_counts().head(10).to_markdown(numalign="left", stralign="left"))
+    frecuencia_carreras = df['COD_CARRERA'].value_counts().head(10)
+    frecuencia_carreras.index = catalogo.nombre(frecuencia_carreras.index).rename('CARRERA')
+    print(frecuencia_carreras.to_markdown(numalign="left", stralign="left"))
     
     print("\n--- Frecuencia por Semestre ---")
     print(df['SEMESTRE'].value_counts().to_markdown(numalign="left", stralign="left"))
@@ -160,16 +123,20 @@ def run_full_analysis():
     print("="*50)
     
     promedios = {
-        "Indicador 1 (Competencias Digitales)": df['COMP_DIGITAL'].mean(),
-        "Indicador 1 (Competencias Blandas)": df['COMP_BLANDAS'].mean(),
-        "Indicador 2 (Pertinencia Formación)": df['COMP_PERTINENCIA'].mean(),
-        "Indicador 3 (Importancia Factores)": df['COMP_FACTORES'].mean(),
-        "Indicador 4 (Percepción Univ/Prof)": df['COMP_UNIV_PROF'].mean(),
-        "Variable (Percepción Impacto IA)": df['PERCEP_IA'].mean()
+        "Indicador 1 (Competencias Digitales)": 'COMP_DIGITAL',
+        "Indicador 1 (Competencias Blandas)": 'COMP_BLANDAS',
+        "Indicador 2 (Pertinencia Formación)": 'COMP_PERTINENCIA',
+        "Indicador 3 (Importancia Factores)": 'COMP_FACTORES',
+        "Indicador 4 (Percepción Univ/Prof)": 'COMP_UNIV_PROF',
+        "Variable (Percepción Impacto IA)": 'PERCEP_IA'
     }
+    # Intervalos de confianza bootstrap (percentiles de N_REMUESTRAS remuestras)
+    with metricas.tramo('remuestreo', filas=len(df)):
+        intervalos = intervalos_medias(df, list(promedios.values()))
     
-    for key, val in promedios.items():
-        print(f"- {key}: {val:.2f}")
+    for key, col in promedios.items():
+        fila = intervalos.loc[col]
+        print(f"- {key}: {fila['media']:.2f} (IC 95%: {fila['ic_inf']:.2f} - {fila['ic_sup']:.2f})")
 
     # --- 5. Diagnóstico Avanzado: Prueba de Hipótesis ---
 
@@ -188,61 +155,93 @@ def run_full_analysis():
         else:
             return f"No se encontró correlación estadísticamente significativa (r={r:.3f}, p={p:.4f}). Hipótesis RECHAZADA."
     
-    # Preparar datos (eliminando NaNs para las pruebas)
-    df_h1 = df[['COMP_DIGITAL', 'PERCEP_IA']].dropna()
-    df_h2 = df[['COMP_DIGITAL', 'COMP_PERTINENCIA']].dropna()
-    df_h4 = df[['PERCEP_IA', 'DOMINIO_DATOS']].dropna()
-    df_h5 = df[['COMP_DIGITAL', 'DOMINIO_DATOS']].dropna()
+    # Matrices de Pearson y Spearman (con p-valores y n por par) de todos los
+    # indicadores y preguntas en una sola pasada; cada hipótesis es una búsqueda
+    variables = ['COMP_DIGITAL', 'COMP_BLANDAS', 'COMP_PERTINENCIA', 'COMP_FACTORES',
+                 'COMP_UNIV_PROF', 'PERCEP_IA', 'DOMINIO_DATOS'] + list(likert.columns)
+    with metricas.tramo('correlaciones', filas=len(df)):
+        correlaciones = correlaciones_hipotesis(df[variables], HIPOTESIS_CORRELACION)
+    # Con muestras chicas el p-valor asintótico no basta: IC bootstrap de r y
+    # p-valor de una prueba de permutación
+    with metricas.tramo('remuestreo', filas=len(df)):
+        remuestras = intervalos_correlaciones(df, HIPOTESIS_CORRELACION)
+
+    def mostrar_correlacion(clave):
+        fila = correlaciones.loc[clave]
+        print(interpretar_corr(fila['r_pearson'], fila['p_pearson']))
+        print(f"(Spearman: rho={fila['r_spearman']:.3f}, p={fila['p_spearman']:.4f}; n={fila['n']})")
+        fila = remuestras.loc[clave]
+        print(f"(Remuestreo, {N_REMUESTRAS} remuestras: IC 95% de r = [{fila['ic_inf']:.3f}, {fila['ic_sup']:.3f}]; p de permutación = {fila['p_perm']:.4f})")
 
     # H1: Correlación entre Competencias Digitales y Percepción de IA
     print("\n--- H1: Competencias Digitales vs Percepción Impacto IA ---")
-    r_h1, p_h1 = stats.pearsonr(df_h1['COMP_DIGITAL'], df_h1['PERCEP_IA'])
-    print(interpretar_corr(r_h1, p_h1))
+    mostrar_correlacion('H1')
 
     # H2: Correlación entre Competencias Digitales y Pertinencia de Formación
     print("\n--- H2: Competencias Digitales vs Pertinencia de Formación ---")
-    r_h2, p_h2 = stats.pearsonr(df_h2['COMP_DIGITAL'], df_h2['COMP_PERTINENCIA'])
-    print(interpretar_corr(r_h2, p_h2))
+    mostrar_correlacion('H2')
 
     # H3: Diferencias de Competencias Digitales entre Carreras (ANOVA)
     print("\n--- H3: Diferencias de Competencias Digitales por Carrera ---")
+    # Conteo, suma y suma de cuadrados (y frecuencias) de todos los indicadores por
+    # carrera en una sola pasada; ANOVA y Kruskal-Wallis salen de esos estadísticos
+    indicadores = ['COMP_DIGITAL', 'COMP_BLANDAS', 'COMP_PERTINENCIA', 'COMP_FACTORES', 'COMP_UNIV_PROF']
+    with metricas.tramo('anova', filas=len(df)):
+        por_carrera = EstadisticosGrupos.desde_datos(df, 'COD_CARRERA', indicadores)
     # Filtrar carreras con suficientes respuestas (ej. > 5) para que ANOVA sea robusto
-    carreras_validas = df['CARRERA'].value_counts()[df['CARRERA'].value_counts() > 5].index
-    df_h3 = df[df['CARRERA'].isin(carreras_validas) & df['COMP_DIGITAL'].notna()]
+    conteo_carreras = por_carrera.conteos()
+    carreras_validas = conteo_carreras[conteo_carreras > 5].index
     
     if len(carreras_validas) > 1:
-        grupos_h3 = [df_h3['COMP_DIGITAL'][df_h3['CARRERA'] == c] for c in carreras_validas]
-        f_val_h3, p_val_h3 = stats.f_oneway(*grupos_h3)
+        with metricas.tramo('anova'):
+            por_carrera = por_carrera.seleccionar(carreras_validas)
+            anova = por_carrera.anova()
+            kruskal = por_carrera.kruskal()
+        f_val_h3, p_val_h3 = anova.at['COMP_DIGITAL', 'F'], anova.at['COMP_DIGITAL', 'p']
         
         if p_val_h3 < 0.05:
             print(f"Prueba ANOVA significativa (F={f_val_h3:.2f}, p={p_val_h3:.4f}). Existen diferencias significativas en el promedio de competencias digitales entre carreras. Hipótesis VALIDADA.")
         else:
             print(f"Prueba ANOVA no significativa (F={f_val_h3:.2f}, p={p_val_h3:.4f}). No se encontraron diferencias significativas entre carreras. Hipótesis RECHAZADA.")
+
+        df_h3 = df[df['COD_CARRERA'].isin(carreras_validas) & df['COMP_DIGITAL'].notna()]
+        # p-valor de permutación del F e IC bootstrap de eta² (grupos chicos)
+        with metricas.tramo('remuestreo', filas=len(df_h3)):
+            permutacion = pruebas_anova(df[df['COD_CARRERA'].isin(carreras_validas)], 'COD_CARRERA', indicadores)
+
+        print("\nComparación por carrera de todos los indicadores (ANOVA, Kruskal-Wallis y remuestreo):")
+        comparacion = pd.concat({
+            'ANOVA': anova[['F', 'p', 'eta2']],
+            'Kruskal': kruskal[['H', 'p', 'eta2']],
+            'Remuestreo': permutacion[['p_perm', 'ic_inf', 'ic_sup']].rename(columns={'ic_inf': 'eta2_inf', 'ic_sup': 'eta2_sup'}),
+        }, axis=1)
+        print(comparacion.round(4).to_string())
         
         # Generar gráfico Boxplot
         plt.figure(figsize=(15, 8))
-        sns.boxplot(data=df_h3, x='CARRERA', y='COMP_DIGITAL', palette='viridis')
+        sns.boxplot(data=df_h3, x='CARRERA', y='COMP_DIGITAL', palette='viridis',
+                    order=catalogo.nombre(carreras_validas))
         plt.title('H3: Promedio de Competencias Digitales por Carrera (N > 5)')
         plt.ylabel('Promedio Competencias Digitales (1-5)')
         plt.xlabel('Carrera')
         plt.xticks(rotation=45, ha='right')
         plt.tight_layout()
-        plt.savefig('H3_competencias_por_carrera.png')
+        with metricas.tramo('graficos'):
+            plt.savefig('H3_competencias_por_carrera.png')
         print("-> Gráfico 'H3_competencias_por_carrera.png' guardado.")
     else:
         print("No hay suficientes carreras con >5 respuestas para realizar una comparativa ANOVA.")
 
     # H4: Correlación entre Percepción de IA e Interés en BI (Proxy: Dominio de Datos)
     print("\n--- H4: Percepción IA vs Interés/Dominio en Análisis de Datos (Proxy) ---")
-    r_h4, p_h4 = stats.pearsonr(df_h4['PERCEP_IA'], df_h4['DOMINIO_DATOS'])
-    print(interpretar_corr(r_h4, p_h4))
+    mostrar_correlacion('H4')
 
     # H5: Correlación entre Competencias Digitales y Uso de BI (Proxy: Dominio de Datos)
     print("\n--- H5: Competencias Digitales vs Interés/Dominio en Análisis de Datos (Proxy) ---")
-    r_h5, p_h5 = stats.pearsonr(df_h5['COMP_DIGITAL'], df_h5['DOMINIO_DATOS'])
-    print(interpretar_corr(r_h5, p_h5))
+    mostrar_correlacion('H5')
     
-    # Generar gráfico Regplot
+    # Generar gráfico Regplot (solo con los pares completos)
+    df_h5 = df[['COMP_DIGITAL', 'DOMINIO_DATOS']].dropna()
     plt.figure(figsize=(10, 6))
     sns.regplot(data=df_h5, x='COMP_DIGITAL', y='DOMINIO_DATOS',
                 line_kws={"color": "red", "lw": 2},
@@ -251,7 +250,8 @@ def run_full_analysis():
     plt.xlabel('Promedio Competencias Digitales (General)')
     plt.ylabel('Dominio de Análisis de Datos (Proxy)')
     plt.tight_layout()
-    plt.savefig('H5_competencias_vs_datos.png')
+    with metricas.tramo('graficos'):
+        plt.savefig('H5_competencias_vs_datos.png')
     print("-> Gráfico 'H5_competencias_vs_datos.png' guardado.")
 
     print("\n" + "="*50)
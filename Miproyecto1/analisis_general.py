@@ -1,8 +1,72 @@
 import pandas as pd
 import numpy as np
 import warnings
+import matplotlib
+matplotlib.use('Agg')  # Sin ventanas: en un servidor plt.show() se bloquearía
 import matplotlib.pyplot as plt
+from carga_datos import cargar_encuesta_limpia, ruta_encuesta_limpia
+from esquema_encuesta import (RENAME_DICT, COL_GROUPS, COLUMNAS_UTILES, INDICADORES, codificar_likert, agregar_indicadores,
+                             compactar_encuesta, reporte_memoria)
+from cubo_indicadores import CuboIndicadores, cargar_cubo_vigente
+from carreras import catalogo_carreras
+from graficos import renderizar_graficos
+from remuestreo import intervalos_medias
+import metricas
+
+# --- Gráficos (funciones de módulo para poder dibujarlos en otros procesos) ---
+COLUMNAS_DISTRIBUCION = ['Promedio_Ind1_Tecnicas', 'Promedio_Ind1_Blandas',
+                         'Promedio_Ind2_Pertinencia', 'Promedio_Ind3_Confianza',
+                         'Promedio_Ind4_Universidad']
+
+# 1️⃣ Promedios generales
+def grafico_promedios_generales(df_kpi_generales):
+    plt.style.use('ggplot')
+    plt.figure(figsize=(8, 5))
+    # Barras de error: intervalo de confianza bootstrap del 95 %
+    error = [df_kpi_generales['Promedio'] - df_kpi_generales['IC_inf'],
+             df_kpi_generales['IC_sup'] - df_kpi_generales['Promedio']]
+    plt.bar(df_kpi_generales['Indicador'], df_kpi_generales['Promedio'], yerr=error, capsize=4)
+    plt.title("Promedios Generales por Indicador")
+    plt.ylabel("Promedio (1-5)")
+    plt.xticks(rotation=20)
+    plt.tight_layout()
+
+# 2️⃣ Promedios por carrera
+def grafico_promedios_por_carrera(df_kpi_por_carrera):
+    plt.style.use('ggplot')
+    df_kpi_por_carrera.plot(x='Carrera', kind='bar', figsize=(10,6))
+    plt.title("Promedios por Carrera")
+    plt.ylabel("Promedio (1-5)")
+    plt.xticks(rotation=45, ha='right')
+    plt.tight_layout()
+
+# 3️⃣ Ranking de factores
+def grafico_factores_empleabilidad(df_factores):
+    plt.style.use('ggplot')
+    plt.figure(figsize=(8,5))
+    plt.barh(df_factores['Factor'], df_factores['Importancia_Promedio'])
+    plt.title("Ranking de Factores de Empleabilidad")
+    plt.xlabel("Importancia Promedio (1-5)")
+    plt.tight_layout()
+
+# 4️⃣ Frecuencia de carreras
+def grafico_frecuencia_carreras(df_frec_carrera):
+    plt.style.use('ggplot')
+    plt.figure(figsize=(8,5))
+    plt.barh(df_frec_carrera['Carrera'], df_frec_carrera['Cantidad_Respuestas'])
+    plt.title("Cantidad de Respuestas por Carrera")
+    plt.tight_layout()
+
+# 5️⃣ Distribución de indicadores por carrera
+def grafico_distribucion_indicadores(df_indicadores):
+    plt.style.use('ggplot')
+    plt.figure(figsize=(10,6))
+    df_indicadores.boxplot(column=COLUMNAS_DISTRIBUCION)
+    plt.title("Distribución de Promedios por Indicador")
+    plt.ylabel("Valor (1-5)")
+    plt.tight_layout()
 
+@metricas.medido('analisis_general')
 def preparar_datos_para_dashboard():
     """
     Carga, limpia, transforma y exporta los datos de la encuesta,
@@ -10,100 +74,46 @@ def preparar_datos_para_dashboard():
     """
     
     warnings.filterwarnings('ignore')
-    file_path = "encuesta_limpia_ESPOCH.xlsx"
-    print(f"Iniciando el procesamiento del archivo: {file_path}")
-
-    # --- Definición de mapeos ---
-    map_competencias = {
-        'Ninguno': 1, 'Básico': 2, 'Intermedio': 3, 'Avanzado': 4, 'Experto': 5
-    }
-    map_acuerdo = {
-        'Totalmente en desacuerdo': 1, 'En desacuerdo': 2, 'Neutral': 3,
-        'De acuerdo': 4, 'Totalmente de acuerdo': 5
-    }
-    map_importancia = {
-        'Sin importancia': 1, 'Poca importancia': 2, 'Neutral': 3,
-        'Importante': 4, 'Muy importante': 5
-    }
-
-    # --- Nombres cortos ---
-    rename_dict = {
-        'Por favor, escribe el nombre de tu carrera o programa de estudios.': 'Demo_Carrera',
-        '¿Qué semestre estás cursando actualmente?': 'Demo_Semestre',
-        '¿Cuál es tu edad?': 'Demo_Edad',
-        '¿Con qué género te identificas?': 'Demo_Genero',
-        'Análisis e interpretación de datos.': 'P1_Analisis_Datos',
-        'Fundamentos de ciberseguridad.': 'P1_Ciberseguridad',
-        'Conceptos básicos de programación y automatización.': 'P1_Programacion',
-        'Manejo de herramientas de IA (ej. ChatGPT, Copilot, Gemini, DALL-E)': 'P1_Manejo_IA',
-        'Pensamiento crítico y resolución de problemas complejos': 'P2_Pensamiento_Critico',
-        'Comunicación efectiva en entornos digitales': 'P2_Comunicacion_Digital',
-        'Adaptabilidad y aprendizaje continuo': 'P2_Adaptabilidad',
-        'Creatividad e innovación': 'P2_Creatividad',
-        'Colaboración en equipos multidisciplinarios': 'P2_Colaboracion',
-        'El currículo de mi carrera está alineado con las habilidades demandadas por el mercado laboral digital.': 'P3_Curriculo_Alineado',
-        'Mi universidad promueve activamente el desarrollo de competencias digitales y blandas.': 'P3_Promueve_Competencias',
-        'Siento que la formación que he recibido me prepara para trabajos que aún no existen.': 'P3_Prepara_Futuro',
-        'El uso de la tecnología y la IA está bien integrado en las asignaturas de mi carrera.': 'P3_IA_Integrada',
-        'La metodología de enseñanza en mi carrera fomenta la adaptabilidad y el aprendizaje continuo.': 'P3_Metodologia_Adaptable',
-        'Me siento seguro(a) de que mi formación académica me prepara para conseguir un empleo relevante en mi área.': 'P4_Confianza_Empleo',
-        'Mi perfil de egreso es competitivo en el mercado laboral actual.': 'P4_Perfil_Competitivo',
-        'Considero que mis habilidades blandas (ej. comunicación, creatividad) me dan una ventaja en el mercado laboral.': 'P4_Ventaja_Blandas',
-        'Creo que mi conocimiento sobre herramientas de IA mejorará mis oportunidades laborales.': 'P4_IA_Oportunidades',
-        'Habilidades técnicas y digitales (ej. programación, análisis de datos)': 'P5_Factor_Tecnicas',
-        'Habilidades blandas (ej. pensamiento crítico, adaptabilidad)': 'P5_Factor_Blandas',
-        'Experiencia práctica o pasantías': 'P5_Factor_Experiencia',
-        'Red de contactos (networking)': 'P5_Factor_Networking',
-        'Título académico de la universidad': 'P5_Factor_Titulo',
-        'El profesorado de mi carrera está capacitado para integrar herramientas de IA en la enseñanza.': 'P6_Profesor_Capacitado_IA',
-        'Mi universidad fomenta la innovación en las metodologías de enseñanza para adaptarse a la era digital.': 'P6_Universidad_Innova',
-        'Mi universidad tiene los recursos adecuados (plataformas, software) para formar profesionales en la era digital.': 'P6_Recursos_Adecuados',
-        'En general, recomendaría mi universidad como una institución que prepara para los desafíos del mercado laboral digital.': 'P6_Recomendaria_Universidad'
-    }
-
-    # --- Grupos de columnas ---
-    col_groups = {
-        'Ind1_Tecnicas': ['P1_Analisis_Datos', 'P1_Ciberseguridad', 'P1_Programacion', 'P1_Manejo_IA'],
-        'Ind1_Blandas': ['P2_Pensamiento_Critico', 'P2_Comunicacion_Digital', 'P2_Adaptabilidad', 'P2_Creatividad', 'P2_Colaboracion'],
-        'Ind2_Pertinencia': ['P3_Curriculo_Alineado', 'P3_Promueve_Competencias', 'P3_Prepara_Futuro', 'P3_IA_Integrada', 'P3_Metodologia_Adaptable'],
-        'Ind3_Confianza': ['P4_Confianza_Empleo', 'P4_Perfil_Competitivo', 'P4_Ventaja_Blandas', 'P4_IA_Oportunidades'],
-        'Ind3_Factores': ['P5_Factor_Tecnicas', 'P5_Factor_Blandas', 'P5_Factor_Experiencia', 'P5_Factor_Networking', 'P5_Factor_Titulo'],
-        'Ind4_Universidad': ['P6_Profesor_Capacitado_IA', 'P6_Universidad_Innova', 'P6_Recursos_Adecuados', 'P6_Recomendaria_Universidad']
-    }
+    print(f"Iniciando el procesamiento del archivo: {ruta_encuesta_limpia()}")
 
     try:
-        df = pd.read_excel(file_path)
+        # Prefiere el Parquet y lee solo las columnas que se usan
+        with metricas.tramo('carga') as medida:
+            df = cargar_encuesta_limpia(columnas=list(RENAME_DICT.keys()))
+            medida.filas = len(df)
     except Exception as e:
         print(f"Error al leer el archivo: {e}")
         return
 
-    df = df.rename(columns=rename_dict)
-    columnas_utiles = list(rename_dict.values())
-    df_main = df[columnas_utiles].copy()
-
-    # --- Mapeo de valores ---
-    for grupo, cols in {
-        'competencias': col_groups['Ind1_Tecnicas'] + col_groups['Ind1_Blandas'],
-        'acuerdo': col_groups['Ind2_Pertinencia'] + col_groups['Ind3_Confianza'] + col_groups['Ind4_Universidad'],
-        'importancia': col_groups['Ind3_Factores']
-    }.items():
-        if grupo == 'competencias':
-            mapa = map_competencias
-        elif grupo == 'acuerdo':
-            mapa = map_acuerdo
-        else:
-            mapa = map_importancia
-        for c in cols:
-            if c in df_main.columns:
-                df_main[c] = df_main[c].astype(str).str.strip().map(mapa)
-                df_main[c] = pd.to_numeric(df_main[c], errors='coerce')
+    df = df.rename(columns=RENAME_DICT)
+    df_main = df[COLUMNAS_UTILES].copy()
+
+    # --- Mapeo de valores (las 27 preguntas Likert en una sola pasada vectorizada) ---
+    with metricas.tramo('mapeo_likert', filas=len(df_main)):
+        likert = codificar_likert(df_main)
+        df_main[likert.columns] = likert
 
     # --- Indicadores ---
-    df_main['Promedio_Ind1_Tecnicas'] = df_main[col_groups['Ind1_Tecnicas']].mean(axis=1)
-    df_main['Promedio_Ind1_Blandas'] = df_main[col_groups['Ind1_Blandas']].mean(axis=1)
-    df_main['Promedio_Ind2_Pertinencia'] = df_main[col_groups['Ind2_Pertinencia']].mean(axis=1)
-    df_main['Promedio_Ind3_Confianza'] = df_main[col_groups['Ind3_Confianza']].mean(axis=1)
-    df_main['Promedio_Ind4_Universidad'] = df_main[col_groups['Ind4_Universidad']].mean(axis=1)
+    with metricas.tramo('indicadores', filas=len(df_main)):
+        agregar_indicadores(df_main)
+
+    # --- Compactación (Likert Int8, indicadores float32, demografía categórica) ---
+    with metricas.tramo('compactacion', filas=len(df_main)):
+        df_compacto = compactar_encuesta(df_main)
+        reporte = reporte_memoria(df_main, df_compacto)
+        df_main = df_compacto
+    metricas.anotar(memoria_antes_mb=round(reporte.loc['TOTAL', 'mb_antes'], 3),
+                    memoria_despues_mb=round(reporte.loc['TOTAL', 'mb_despues'], 3))
+    print("\nMemoria por columna (MB) antes y después de compactar:")
+    print(reporte.round(3).to_string())
+
+    # --- Cubo de indicadores ---
+    # Las medias y conteos salen del cubo guardado por limpiar_datos.py; si no está
+    # (o no corresponde al Parquet actual) se construye aquí
+    with metricas.tramo('cubo'):
+        cubo = cargar_cubo_vigente()
+        if cubo is None:
+            cubo = CuboIndicadores.desde_encuesta(df)
 
     # --- KPI Generales ---
     df_kpi_generales = pd.DataFrame({
@@ -112,30 +122,31 @@ def preparar_datos_para_dashboard():
             'Pertinencia Formación', 'Confianza Empleabilidad',
             'Percepción Universidad'
         ],
-        'Promedio': [
-            df_main['Promedio_Ind1_Tecnicas'].mean(),
-            df_main['Promedio_Ind1_Blandas'].mean(),
-            df_main['Promedio_Ind2_Pertinencia'].mean(),
-            df_main['Promedio_Ind3_Confianza'].mean(),
-            df_main['Promedio_Ind4_Universidad'].mean()
-        ]
+        'Promedio': cubo.medias(medidas=list(INDICADORES)).iloc[0].to_numpy()
     })
+    # Intervalos de confianza bootstrap de cada promedio (necesitan las respuestas)
+    with metricas.tramo('remuestreo', filas=len(df_main)):
+        intervalos = intervalos_medias(df_main, list(INDICADORES))
+    df_kpi_generales['IC_inf'] = intervalos['ic_inf'].to_numpy()
+    df_kpi_generales['IC_sup'] = intervalos['ic_sup'].to_numpy()
+    print("\nPromedios generales (IC 95% bootstrap):")
+    print(df_kpi_generales.round(3).to_string(index=False))
 
     # --- KPI por carrera ---
-    conteo_carreras = df_main['Demo_Carrera'].value_counts()
+    # Se agrupa por el código del catálogo de carreras; el nombre canónico solo se
+    # agrega para las etiquetas de los gráficos
+    catalogo = catalogo_carreras()
+    conteo_carreras = cubo.conteos(por=['Cod_Carrera'])
+    conteo_carreras = conteo_carreras[conteo_carreras.index.notna()].sort_values(ascending=False, kind='stable')
     carreras_principales = conteo_carreras[conteo_carreras > 5].index
-    df_kpi_por_carrera = (
-        df_main[df_main['Demo_Carrera'].isin(carreras_principales)]
-        .groupby('Demo_Carrera')[
-            ['Promedio_Ind1_Tecnicas', 'Promedio_Ind1_Blandas', 
-             'Promedio_Ind2_Pertinencia', 'Promedio_Ind3_Confianza', 
-             'Promedio_Ind4_Universidad']
-        ].mean()
-        .reset_index()
+    df_kpi_por_carrera = cubo.medias(
+        por=['Cod_Carrera'], filtros={'Cod_Carrera': carreras_principales}, medidas=list(INDICADORES)
     )
+    df_kpi_por_carrera.insert(0, 'Carrera', catalogo.nombre(df_kpi_por_carrera.index).to_numpy())
+    df_kpi_por_carrera = df_kpi_por_carrera.reset_index(drop=True)
 
     # --- Factores ---
-    df_factores = df_main[col_groups['Ind3_Factores']].mean().reset_index()
+    df_factores = cubo.medias(medidas=COL_GROUPS['Ind3_Factores']).iloc[0].reset_index()
     df_factores.columns = ['Factor', 'Importancia_Promedio']
     df_factores['Factor'] = df_factores['Factor'].map({
         'P5_Factor_Tecnicas': 'Habilidades Técnicas',
@@ -147,60 +158,28 @@ def preparar_datos_para_dashboard():
     df_factores = df_factores.sort_values(by='Importancia_Promedio', ascending=False)
 
     # --- FRECUENCIAS ---
-    df_frec_carrera = conteo_carreras.reset_index()
-    df_frec_carrera.columns = ['Carrera', 'Cantidad_Respuestas']
+    df_frec_carrera = pd.DataFrame({
+        'Carrera': catalogo.nombre(conteo_carreras.index).to_numpy(),
+        'Cantidad_Respuestas': conteo_carreras.to_numpy(),
+    })
 
     # --- Visualizaciones ---
-    plt.style.use('ggplot')
-
-    # 1️⃣ Promedios generales
-    plt.figure(figsize=(8, 5))
-    plt.bar(df_kpi_generales['Indicador'], df_kpi_generales['Promedio'])
-    plt.title("Promedios Generales por Indicador")
-    plt.ylabel("Promedio (1-5)")
-    plt.xticks(rotation=20)
-    plt.tight_layout()
-    plt.savefig("grafico_promedios_generales.png")
-    plt.show()
-
-    # 2️⃣ Promedios por carrera
-    df_kpi_por_carrera.plot(x='Demo_Carrera', kind='bar', figsize=(10,6))
-    plt.title("Promedios por Carrera")
-    plt.ylabel("Promedio (1-5)")
-    plt.xticks(rotation=45, ha='right')
-    plt.tight_layout()
-    plt.savefig("grafico_promedios_por_carrera.png")
-    plt.show()
-
-    # 3️⃣ Ranking de factores
-    plt.figure(figsize=(8,5))
-    plt.barh(df_factores['Factor'], df_factores['Importancia_Promedio'])
-    plt.title("Ranking de Factores de Empleabilidad")
-    plt.xlabel("Importancia Promedio (1-5)")
-    plt.tight_layout()
-    plt.savefig("grafico_factores_empleabilidad.png")
-    plt.show()
-
-    # 4️⃣ Frecuencia de carreras
-    plt.figure(figsize=(8,5))
-    plt.barh(df_frec_carrera['Carrera'], df_frec_carrera['Cantidad_Respuestas'])
-    plt.title("Cantidad de Respuestas por Carrera")
-    plt.tight_layout()
-    plt.savefig("grafico_frecuencia_carreras.png")
-    plt.show()
-
-    # 5️⃣ Distribución de indicadores por carrera
-    plt.figure(figsize=(10,6))
-    df_main.boxplot(column=['Promedio_Ind1_Tecnicas','Promedio_Ind1_Blandas',
-                            'Promedio_Ind2_Pertinencia','Promedio_Ind3_Confianza',
-                            'Promedio_Ind4_Universidad'])
-    plt.title("Distribución de Promedios por Indicador")
-    plt.ylabel("Valor (1-5)")
-    plt.tight_layout()
-    plt.savefig("grafico_distribucion_indicadores.png")
-    plt.show()
+    # Cada gráfico recibe solo sus datos agregados; los que no cambiaron no se
+    # vuelven a dibujar y el resto se dibuja en paralelo (ver graficos.py)
+    tareas = [
+        ("grafico_promedios_generales.png", grafico_promedios_generales, df_kpi_generales),
+        ("grafico_promedios_por_carrera.png", grafico_promedios_por_carrera, df_kpi_por_carrera),
+        ("grafico_factores_empleabilidad.png", grafico_factores_empleabilidad, df_factores),
+        ("grafico_frecuencia_carreras.png", grafico_frecuencia_carreras, df_frec_carrera),
+        ("grafico_distribucion_indicadores.png", grafico_distribucion_indicadores, df_main[COLUMNAS_DISTRIBUCION]),
+    ]
+    with metricas.tramo('graficos', filas=len(tareas)):
+        generados, omitidos, errores = renderizar_graficos(tareas)
+    for archivo, error in errores.items():
+        print(f"Error al generar {archivo}: {error}")
 
     print("\nGráficos generados y guardados como archivos PNG.")
+    print(f"({len(generados)} generados, {len(omitidos)} sin cambios desde la última ejecución)")
 
 if __name__ == "__main__":
     preparar_datos_para_dashboard()
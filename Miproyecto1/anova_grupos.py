@@ -0,0 +1,142 @@
+import numpy as np
+import pandas as pd
+import scipy.stats as stats
+
+
+def _columnas(medidas):
+    return [f'{m}__{e}' for m in medidas for e in ('n', 'suma', 'suma2')]
+
+
+def anova_desde_sumas(tabla, medidas):
+    """
+    ANOVA de un factor de cada medida a partir de sus estadísticos por grupo
+    (columnas '<medida>__n', '__suma' y '__suma2', una fila por grupo; sirve
+    también un nivel del CuboIndicadores). Da el mismo F que stats.f_oneway.
+
+    Devuelve un DataFrame indexado por medida con grupos, n, F, p y eta2
+    (suma de cuadrados entre grupos / total).
+    """
+    filas = {}
+    for m in medidas:
+        n = tabla[f'{m}__n'].to_numpy(dtype=np.float64)
+        suma = tabla[f'{m}__suma'].to_numpy(dtype=np.float64)
+        suma2 = tabla[f'{m}__suma2'].to_numpy(dtype=np.float64)
+        con_datos = n > 0
+        n, suma, suma2 = n[con_datos], suma[con_datos], suma2[con_datos]
+        k, total = len(n), n.sum()
+
+        media = suma / n
+        media_global = suma.sum() / total if total else np.nan
+        entre = (n * (media - media_global) ** 2).sum()
+        dentro = np.maximum(suma2 - suma * media, 0).sum()
+        if k > 1 and total > k:
+            with np.errstate(divide='ignore', invalid='ignore'):
+                f = (entre / (k - 1)) / (dentro / (total - k))
+                eta2 = entre / (entre + dentro)
+            p = stats.f.sf(f, k - 1, total - k)
+        else:
+            f = p = eta2 = np.nan
+        filas[m] = {'grupos': k, 'n': int(total), 'F': f, 'p': p, 'eta2': eta2}
+    return pd.DataFrame.from_dict(filas, orient='index')
+
+
+def kruskal_desde_frecuencias(frecuencias):
+    """
+    Kruskal-Wallis de cada medida a partir de cuántas veces aparece cada valor en
+    cada grupo (Series indexada por medida, grupo y valor). Los rangos promedio
+    de cada valor salen de los totales por valor, con la misma corrección por
+    empates que stats.kruskal.
+
+    Devuelve un DataFrame indexado por medida con grupos, n, H, p y eta2
+    (eta² basada en H: (H - k + 1) / (n - k)).
+    """
+    filas = {}
+    for m, conteos in frecuencias.groupby(level=0, sort=False):
+        tabla = conteos.droplevel(0).unstack(fill_value=0).sort_index(axis=1)
+        tabla = tabla[tabla.sum(axis=1) > 0]
+        c = tabla.to_numpy(dtype=np.float64)  # grupos x valores distintos
+        por_valor = c.sum(axis=0)
+        por_grupo = c.sum(axis=1)
+        k, total = len(por_grupo), por_valor.sum()
+
+        rango_medio = np.cumsum(por_valor) - (por_valor - 1) / 2
+        suma_rangos = c @ rango_medio
+        empates = 1 - ((por_valor ** 3 - por_valor).sum() / (total ** 3 - total)) if total > 1 else 0
+        if k > 1 and empates > 0:
+            h = (12 / (total * (total + 1)) * (suma_rangos ** 2 / por_grupo).sum() - 3 * (total + 1)) / empates
+            p = stats.chi2.sf(h, k - 1)
+            eta2 = (h - k + 1) / (total - k) if total > k else np.nan
+        else:
+            h = p = eta2 = np.nan
+        filas[m] = {'grupos': k, 'n': int(total), 'H': h, 'p': p, 'eta2': eta2}
+    return pd.DataFrame.from_dict(filas, orient='index')
+
+
+class EstadisticosGrupos:
+    """
+    Estadísticos suficientes de varias medidas por grupo para comparar grupos:
+    conteo, suma y suma de cuadrados (ANOVA) y frecuencia de cada valor (Kruskal-
+    Wallis), obtenidos en una sola pasada de groupby.
+
+    Son aditivos: los de dos lotes de respuestas se combinan sumándolos, así que
+    las pruebas se pueden actualizar con respuestas nuevas sin releer las anteriores.
+    """
+
+    def __init__(self, sumas, frecuencias):
+        self.sumas = sumas              # Indexado por grupo: n_respuestas + _columnas(medidas)
+        self.frecuencias = frecuencias  # Series indexada por (medida, grupo, valor)
+
+    @property
+    def medidas(self):
+        return [c[:-len('__n')] for c in self.sumas.columns if c.endswith('__n')]
+
+    @classmethod
+    def desde_datos(cls, df, grupo, medidas):
+        """
+        Calcula los estadísticos de `medidas` (columnas numéricas de `df`) por la
+        columna `grupo`; las filas sin grupo se descartan.
+        """
+        medidas = list(medidas)
+        grupos = df[grupo]
+        valores = df[medidas].to_numpy(dtype=np.float64, na_value=np.nan)
+        presentes = ~np.isnan(valores)
+        ceros = np.where(presentes, valores, 0.0)
+
+        datos = {grupo: grupos.to_numpy(), 'n_respuestas': np.ones(len(df), dtype=np.int64)}
+        for i, m in enumerate(medidas):
+            datos[f'{m}__n'] = presentes[:, i].astype(np.int64)
+            datos[f'{m}__suma'] = ceros[:, i]
+            datos[f'{m}__suma2'] = ceros[:, i] ** 2
+        sumas = pd.DataFrame(datos).groupby(grupo, sort=True).sum()
+
+        filas, columnas = np.nonzero(presentes & grupos.notna().to_numpy()[:, None])
+        largo = pd.DataFrame({
+            'medida': np.asarray(medidas, dtype=object)[columnas],
+            grupo: grupos.to_numpy()[filas],
+            'valor': valores[filas, columnas],
+        })
+        frecuencias = largo.groupby(['medida', grupo, 'valor'], sort=True).size()
+        return cls(sumas, frecuencias)
+
+    def combinar(self, otro):
+        sumas = pd.concat([self.sumas, otro.sumas]).groupby(level=0, sort=True).sum()
+        frecuencias = pd.concat([self.frecuencias, otro.frecuencias]).groupby(level=[0, 1, 2], sort=True).sum()
+        return EstadisticosGrupos(sumas, frecuencias)
+
+    def seleccionar(self, grupos):
+        """
+        Estadísticos restringidos a los `grupos` indicados.
+        """
+        grupos = list(grupos)
+        sumas = self.sumas[self.sumas.index.isin(grupos)]
+        frecuencias = self.frecuencias[self.frecuencias.index.get_level_values(1).isin(grupos)]
+        return EstadisticosGrupos(sumas, frecuencias)
+
+    def conteos(self):
+        return self.sumas['n_respuestas']
+
+    def anova(self):
+        return anova_desde_sumas(self.sumas, self.medidas)
+
+    def kruskal(self):
+        return kruskal_desde_frecuencias(self.frecuencias).reindex(self.medidas)
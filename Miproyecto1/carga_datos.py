@@ -0,0 +1,59 @@
+import os
+import pandas as pd
+import pyarrow.parquet as pq
+
+# --- Archivos de la encuesta limpia (generados por limpiar_datos.py) ---
+ARCHIVO_PARQUET = 'encuesta_limpia_ESPOCH.parquet'
+ARCHIVO_EXCEL = 'encuesta_limpia_ESPOCH.xlsx'
+ARCHIVO_CSV = 'encuesta_limpia_ESPOCH.csv'
+ARCHIVO_CUBO = 'cubo_indicadores_ESPOCH.parquet'  # Estadísticos agregados (cubo_indicadores.py)
+
+
+def columnas_disponibles(ruta_parquet):
+    """
+    Devuelve los nombres de columna del Parquet leyendo solo sus metadatos.
+    """
+    return pq.read_schema(ruta_parquet).names
+
+
+def leer_parquet(ruta, columnas=None):
+    """
+    Lee un Parquet con proyección de columnas y lectura mapeada en memoria.
+    Las columnas pedidas que no existan en el archivo se ignoran.
+    """
+    if columnas is not None:
+        disponibles = set(columnas_disponibles(ruta))
+        columnas = [c for c in columnas if c in disponibles]
+    return pd.read_parquet(ruta, columns=columnas, engine='pyarrow', memory_map=True)
+
+
+def ruta_encuesta_limpia(carpeta='.', respaldo=ARCHIVO_EXCEL):
+    """
+    Archivo del que cargar_encuesta_limpia lee la encuesta: el Parquet si existe,
+    si no el de `respaldo`.
+    """
+    ruta_parquet = os.path.join(carpeta, ARCHIVO_PARQUET)
+    if os.path.exists(ruta_parquet):
+        return ruta_parquet
+    return os.path.join(carpeta, respaldo)
+
+
+def cargar_encuesta_limpia(columnas=None, carpeta='.', respaldo=ARCHIVO_EXCEL):
+    """
+    Carga la encuesta limpia prefiriendo el archivo Parquet.
+
+    Si el Parquet no existe (por ejemplo, con salidas generadas por una versión
+    anterior de limpiar_datos.py) se lee el archivo de `respaldo` (XLSX o CSV).
+    Con `columnas` solo se leen esas columnas.
+    """
+    ruta = ruta_encuesta_limpia(carpeta, respaldo)
+    if ruta.endswith('.parquet'):
+        return leer_parquet(ruta, columnas)
+
+    usecols = None
+    if columnas is not None:
+        seleccion = set(columnas)
+        usecols = lambda c: c in seleccion
+    if ruta.lower().endswith('.csv'):
+        return pd.read_csv(ruta, usecols=usecols)
+    return pd.read_excel(ruta, usecols=usecols)
@@ -0,0 +1,111 @@
+import os
+import json
+import numpy as np
+import pandas as pd
+from coincidencia_difusa import ResolutorDifuso, normalizar_texto
+
+# Catálogo de carreras (código, nombre canónico y escrituras conocidas). Está junto
+# al código para que los análisis y app.py lo encuentren desde cualquier carpeta
+CARPETA_MODULO = os.path.dirname(os.path.abspath(__file__))
+ARCHIVO_CATALOGO_CARRERAS = os.path.join(CARPETA_MODULO, 'catalogo_carreras.json')
+
+# Caché de las escrituras ya resueltas contra el catálogo (también junto al código,
+# para no dejar una copia en cada carpeta desde la que se ejecuta un análisis)
+ARCHIVO_RESOLUCIONES_CARRERAS = os.path.join(CARPETA_MODULO, '.cache_carreras', 'resoluciones_carreras.json')
+
+# Similitud mínima (Dice sobre trigramas) para aceptar una escritura que no está en
+# el catálogo (ej. 'tecnologias de la informacon'). Con un umbral más bajo se unían
+# escrituras que solo comparten parte del nombre; lo que no llega al umbral queda
+# como NOMBRE_OTRA y aparece en el reporte de carreras sin equivalente, para
+# agregarlo al catálogo a mano
+UMBRAL_SIMILITUD_CARRERA = 0.85
+
+# Palabras que no distinguen una carrera de otra ('Carrera de Finanzas', 'Lic en
+# finanzas', 'Ing. Forestal'...); se quitan antes de comparar
+PALABRAS_GENERICAS = {
+    'carrera', 'de', 'del', 'en', 'la', 'las', 'los', 'el', 'y', 'e',
+    'ing', 'ingenieria', 'ingeniero', 'ingeniera',
+    'lic', 'licenciatura', 'licenciado', 'licenciada',
+}
+
+# Código de las escrituras que no se parecen a ninguna carrera del catálogo
+CODIGO_OTRA = 0
+NOMBRE_OTRA = 'Otra carrera'
+
+
+def clave_carrera(valor):
+    """
+    Forma comparable de una escritura de carrera: normalizada (sin tildes,
+    mayúsculas ni puntuación) y sin PALABRAS_GENERICAS.
+    """
+    return ' '.join(p for p in normalizar_texto(valor).split() if p not in PALABRAS_GENERICAS)
+
+
+class CatalogoCarreras:
+    """
+    Traduce las carreras escritas a mano (Demo_Carrera) a un código entero del
+    catálogo, para agrupar 'Finanzas', 'FINANZAS' y 'Lic en finanzas' juntas.
+
+    Cada escritura distinta se resuelve una sola vez: primero por coincidencia
+    exacta de su clave y si no, aproximada (ResolutorDifuso, con caché en disco).
+    Las que no se parecen a ninguna carrera reciben CODIGO_OTRA y se acumulan en
+    `sin_catalogo` para agregarlas al catálogo si corresponde.
+    """
+
+    def __init__(self, ruta=ARCHIVO_CATALOGO_CARRERAS, ruta_cache=ARCHIVO_RESOLUCIONES_CARRERAS,
+                 umbral=UMBRAL_SIMILITUD_CARRERA):
+        with open(ruta, 'r', encoding='utf-8') as f:
+            carreras = json.load(f)['carreras']
+        self.nombres = {CODIGO_OTRA: NOMBRE_OTRA}
+        self.claves = {}
+        for carrera in carreras:
+            self.nombres[carrera['codigo']] = carrera['nombre']
+            for variante in [carrera['nombre']] + carrera['variantes']:
+                self.claves[clave_carrera(variante)] = carrera['codigo']
+        self.resolutor = ResolutorDifuso(self.claves, umbral=umbral, ruta_cache=ruta_cache)
+        self.firma = self.resolutor.firma
+        self.sin_catalogo = {}
+
+    def codigo(self, valor):
+        clave = clave_carrera(valor)
+        codigo = self.claves.get(clave)
+        if codigo is None and clave:
+            codigo = self.resolutor.resolver(clave)
+        if codigo is None:
+            self.sin_catalogo[str(valor)] = CODIGO_OTRA
+            return CODIGO_OTRA
+        return codigo
+
+    def codificar(self, serie):
+        """
+        Código de carrera (Int16, nulo si no hay respuesta) de cada fila de `serie`.
+        """
+        codigos, unicos = pd.factorize(serie, use_na_sentinel=True)
+        resueltas = len(self.resolutor.resoluciones)
+        por_unico = np.array([self.codigo(valor) for valor in unicos] + [-1], dtype=np.int16)
+        if len(self.resolutor.resoluciones) > resueltas:  # Solo si se resolvió alguna escritura nueva
+            self.resolutor.guardar()
+        resultado = pd.array(por_unico[codigos], dtype='Int16')
+        resultado[codigos == -1] = pd.NA
+        return pd.Series(resultado, index=serie.index, name='Cod_Carrera')
+
+    def nombre(self, codigos):
+        """
+        Nombre canónico de cada código (Series o valor suelto).
+        """
+        if isinstance(codigos, (pd.Series, pd.Index)):
+            return codigos.map(self.nombres)
+        return self.nombres.get(codigos)
+
+
+_CATALOGO = None
+
+
+def catalogo_carreras():
+    """
+    Catálogo por defecto, cargado una sola vez por proceso.
+    """
+    global _CATALOGO
+    if _CATALOGO is None:
+        _CATALOGO = CatalogoCarreras()
+    return _CATALOGO
@@ -0,0 +1,146 @@
+import os
+import re
+import json
+import hashlib
+from collections import defaultdict
+import numpy as np
+from unidecode import unidecode
+
+
+def normalizar_texto(valor_original):
+    """
+    Estandariza el texto: sin tildes, en minúsculas, sin puntuación y sin espacios extra.
+    """
+    texto = str(valor_original)
+    texto_limpio = unidecode(texto)  # Quitar tildes (ej. Politécnica -> Politecnica)
+    texto_limpio = texto_limpio.lower()  # Convertir a minúsculas
+    texto_limpio = re.sub(r'[^\w\s]', '', texto_limpio)  # Quitar puntuación y caracteres especiales
+    texto_limpio = re.sub(r'\s+', ' ', texto_limpio).strip()  # Quitar espacios extra
+    return texto_limpio
+
+
+def ngramas(texto, n=3):
+    """
+    Devuelve el conjunto de n-gramas de caracteres del texto (con un espacio de relleno
+    a cada lado, para que el inicio y el final de las palabras también cuenten).
+    """
+    relleno = f" {texto} "
+    if len(relleno) <= n:
+        return {relleno}
+    return {relleno[i:i + n] for i in range(len(relleno) - n + 1)}
+
+
+class IndiceNgramas:
+    """
+    Índice invertido de n-gramas de caracteres para búsqueda aproximada.
+
+    Solo cuentan las entradas que comparten al menos un n-grama con la consulta: las
+    listas de posiciones de sus n-gramas se concatenan y se cuentan con `bincount`,
+    y la similitud (coeficiente de Dice entre conjuntos de n-gramas) se calcula de
+    forma vectorizada para todo el catálogo, sin distancias de edición par a par.
+    """
+
+    def __init__(self, n=3):
+        self.n = n
+        self._claves = []
+        self._valores = []
+        self._tamanos = []
+        self._invertido = defaultdict(list)  # n-grama -> posiciones en _claves
+        self._congelado = None  # (n-grama -> np.array de posiciones, tamaños) para consultar
+
+    def agregar(self, clave, valor):
+        posicion = len(self._claves)
+        gramas = ngramas(clave, self.n)
+        self._claves.append(clave)
+        self._valores.append(valor)
+        self._tamanos.append(len(gramas))
+        for g in gramas:
+            self._invertido[g].append(posicion)
+        self._congelado = None
+
+    def _congelar(self):
+        if self._congelado is None:
+            listas = {g: np.asarray(pos, dtype=np.int32) for g, pos in self._invertido.items()}
+            self._congelado = (listas, np.asarray(self._tamanos, dtype=np.float64))
+        return self._congelado
+
+    def buscar(self, texto, umbral):
+        """
+        Devuelve (valor, clave, similitud) de la entrada más parecida con
+        similitud >= umbral, o None si ninguna llega al umbral.
+        """
+        listas, tamanos = self._congelar()
+        gramas = ngramas(texto, self.n)
+        posiciones = [listas[g] for g in gramas if g in listas]
+        if not posiciones:
+            return None
+
+        comunes = np.bincount(np.concatenate(posiciones), minlength=len(tamanos))
+        similitudes = 2 * comunes / (len(gramas) + tamanos)
+        mejor = int(np.argmax(similitudes))
+        if similitudes[mejor] < umbral:
+            return None
+        return self._valores[mejor], self._claves[mejor], float(similitudes[mejor])
+
+
+class ResolutorDifuso:
+    """
+    Resuelve textos ya normalizados contra un catálogo {variante: valor canónico}.
+
+    Cada resolución (coincida o no) se guarda en un caché JSON en disco. El caché
+    se descarta si cambian el catálogo, el umbral o el tamaño de n-grama. Las
+    coincidencias aproximadas que no estaban en el caché se acumulan en
+    `nuevas_coincidencias` para revisarlas en el reporte.
+    """
+
+    def __init__(self, catalogo, umbral=0.8, ruta_cache=None, n=3):
+        self.umbral = umbral
+        self.ruta_cache = ruta_cache
+        self.indice = IndiceNgramas(n)
+        for variante, canonico in sorted(catalogo.items()):
+            self.indice.agregar(variante, canonico)
+
+        contenido = json.dumps([sorted(catalogo.items()), umbral, n], ensure_ascii=False)
+        self.firma = hashlib.sha1(contenido.encode('utf-8')).hexdigest()
+        self.resoluciones = self._cargar()
+        self.nuevas_coincidencias = []
+        self._modificado = False
+
+    def _cargar(self):
+        if not self.ruta_cache:
+            return {}
+        try:
+            with open(self.ruta_cache, 'r', encoding='utf-8') as f:
+                datos = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+        if datos.get('firma') != self.firma:
+            return {}
+        return datos.get('resoluciones', {})
+
+    def resolver(self, texto):
+        """
+        Devuelve el valor canónico del texto, o None si no se parece a ninguna variante.
+        """
+        if texto in self.resoluciones:
+            return self.resoluciones[texto][0]
+
+        coincidencia = self.indice.buscar(texto, self.umbral)
+        if coincidencia is None:
+            self.resoluciones[texto] = [None, None]
+        else:
+            valor, variante, similitud = coincidencia
+            self.resoluciones[texto] = [valor, round(similitud, 4)]
+            self.nuevas_coincidencias.append((texto, variante, valor, similitud))
+        self._modificado = True
+        return self.resoluciones[texto][0]
+
+    def guardar(self):
+        if not self.ruta_cache or not self._modificado:
+            return
+        os.makedirs(os.path.dirname(self.ruta_cache) or '.', exist_ok=True)
+        temporal = f'{self.ruta_cache}.{os.getpid()}.tmp'  # Varios procesos pueden guardar a la vez
+        with open(temporal, 'w', encoding='utf-8') as f:
+            json.dump({'firma': self.firma, 'resoluciones': self.resoluciones}, f, ensure_ascii=False)
+        os.replace(temporal, self.ruta_cache)
+        self._modificado = False
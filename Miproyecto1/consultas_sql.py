@@ -0,0 +1,202 @@
+import os
+import pandas as pd
+from carga_datos import ARCHIVO_PARQUET
+from esquema_encuesta import ESCALAS, ESCALA_POR_COLUMNA, NOMBRES_ORIGINALES, COL_GROUPS, INDICADORES
+from carreras import catalogo_carreras
+
+try:
+    import duckdb  # Opcional: sin él los gráficos salen del cubo de indicadores
+except ImportError:
+    duckdb = None
+
+# Dimensiones por las que se pueden filtrar las consultas y la columna de la
+# encuesta de la que salen. La carrera se filtra por código del catálogo, igual
+# que en el cubo (cubo_indicadores.py)
+DIMENSIONES_FILTRO = {
+    'Cod_Carrera': 'Demo_Carrera',
+    'Demo_Semestre': 'Demo_Semestre',
+    'Demo_Genero': 'Demo_Genero',
+    'Demo_Edad': 'Demo_Edad',
+}
+
+
+def disponible():
+    """
+    True si DuckDB está instalado.
+    """
+    return duckdb is not None
+
+
+def _identificador(columna):
+    """
+    Nombre original (entre comillas dobles) de una columna con nombre corto.
+    """
+    nombre = NOMBRES_ORIGINALES.get(columna, columna)
+    return '"' + nombre.replace('"', '""') + '"'
+
+
+def _literal(texto):
+    return "'" + str(texto).replace("'", "''") + "'"
+
+
+def expresion_likert(columna):
+    """
+    Expresión SQL que codifica una pregunta Likert a 1-5 (nula si falta o no
+    pertenece a la escala), como codificar_likert.
+    """
+    casos = ' '.join(
+        f'WHEN {_literal(etiqueta)} THEN {valor}'
+        for valor, etiqueta in enumerate(ESCALAS[ESCALA_POR_COLUMNA[columna]], start=1)
+    )
+    return f'CASE trim(CAST({_identificador(columna)} AS VARCHAR)) {casos} END'
+
+
+def expresion_indicador(indicador):
+    """
+    Promedio por fila de las preguntas del grupo del indicador, ignorando las
+    faltantes (como agregar_indicadores).
+    """
+    preguntas = ', '.join(expresion_likert(c) for c in COL_GROUPS[INDICADORES[indicador]])
+    return f'list_avg([{preguntas}])'
+
+
+class ConsultasEncuesta:
+    """
+    Consultas del dashboard (KPIs, conteos por carrera, factores y distribución)
+    en SQL sobre el Parquet de la encuesta limpia, con DuckDB embebido.
+
+    DuckDB lee del archivo solo las columnas que usa cada consulta y aplica los
+    filtros durante la lectura, así que una vista filtrada no carga la tabla
+    completa en memoria: a pandas solo llegan los resultados agregados.
+    """
+
+    def __init__(self, ruta=ARCHIVO_PARQUET, catalogo=None):
+        if duckdb is None:
+            raise ImportError("DuckDB no está instalado (pip install -r requirements-sql.txt)")
+        self.ruta = ruta
+        self.catalogo = catalogo or catalogo_carreras()
+        self.conexion = duckdb.connect()
+        self._origen = f'read_parquet({_literal(os.path.abspath(ruta))})'
+        self._carreras = None
+
+    def carreras(self):
+        """
+        Código del catálogo de cada escritura distinta de la carrera (se leen solo
+        los valores únicos; la traducción se hace una vez por escritura).
+        """
+        if self._carreras is None:
+            columna = _identificador('Demo_Carrera')
+            escrituras = self.conexion.execute(
+                f'SELECT DISTINCT CAST({columna} AS VARCHAR) AS texto FROM {self._origen} WHERE {columna} IS NOT NULL'
+            ).fetchdf()['texto']
+            self._carreras = pd.DataFrame({
+                'texto': escrituras.astype(object),
+                'Cod_Carrera': self.catalogo.codificar(escrituras).astype('int64'),
+            })
+        return self._carreras
+
+    def _condiciones(self, filtros):
+        """
+        Cláusula WHERE (con sus parámetros) de `filtros` {dimensión: valor o lista}.
+        """
+        condiciones, parametros = [], []
+        for dimension, valor in (filtros or {}).items():
+            valores = list(valor) if isinstance(valor, (list, tuple, set, pd.Index)) else [valor]
+            if dimension == 'Cod_Carrera':
+                carreras = self.carreras()
+                valores = carreras.loc[carreras['Cod_Carrera'].isin(valores), 'texto'].tolist()
+            else:
+                valores = [str(v) for v in valores]
+            if not valores:
+                condiciones.append('FALSE')
+                continue
+            columna = _identificador(DIMENSIONES_FILTRO[dimension])
+            condiciones.append(f"CAST({columna} AS VARCHAR) IN ({', '.join('?' * len(valores))})")
+            parametros.extend(valores)
+        if not condiciones:
+            return '', parametros
+        return 'WHERE ' + ' AND '.join(condiciones), parametros
+
+    def _consulta(self, seleccion, filtros=None, resto=''):
+        """
+        Ejecuta `SELECT seleccion FROM <parquet> WHERE <filtros> resto` y devuelve
+        el resultado como DataFrame.
+        """
+        donde, parametros = self._condiciones(filtros)
+        sql = f'SELECT {seleccion} FROM {self._origen} {donde} {resto}'
+        return self.conexion.execute(sql, parametros).fetchdf()
+
+    def opciones_filtros(self):
+        """
+        Valores de cada dimensión de filtro, ordenados (la carrera, como códigos).
+        """
+        opciones = {'Cod_Carrera': sorted(self.carreras()['Cod_Carrera'].unique().tolist())}
+        for dimension, columna in DIMENSIONES_FILTRO.items():
+            if dimension != 'Cod_Carrera':
+                columna = _identificador(columna)
+                opciones[dimension] = self._consulta(
+                    f'DISTINCT CAST({columna} AS VARCHAR) AS valor', {},
+                    f'WHERE {columna} IS NOT NULL ORDER BY valor',
+                )['valor'].tolist()
+        return opciones
+
+    def medias(self, medidas, filtros=None):
+        """
+        Media de cada medida (indicador o pregunta Likert) y el número de
+        respuestas (`n_respuestas`) que cumplen `filtros`.
+        """
+        expresiones = ', '.join(
+            f'avg({expresion_indicador(m) if m in INDICADORES else expresion_likert(m)}) AS "{m}"'
+            for m in medidas
+        )
+        return self._consulta(f'count(*) AS n_respuestas, {expresiones}', filtros).iloc[0]
+
+    def conteos_por_carrera(self, filtros=None):
+        """
+        Número de respuestas por código de carrera, de mayor a menor.
+        """
+        carreras = self.carreras()
+        conteo = self._consulta(
+            f'CAST({_identificador("Demo_Carrera")} AS VARCHAR) AS texto, count(*) AS n', filtros, 'GROUP BY texto',
+        )
+        # Las escrituras de una misma carrera se suman por código (pocas filas)
+        conteo = conteo.merge(carreras, on='texto').groupby('Cod_Carrera')['n'].sum()
+        return conteo.sort_values(ascending=False, kind='stable')
+
+    def indicadores(self, filtros=None, limite=None):
+        """
+        Indicadores de cada respuesta; con `limite`, una muestra aleatoria
+        reproducible de hasta `limite` respuestas.
+        """
+        expresiones = ', '.join(f'{expresion_indicador(i)} AS "{i}"' for i in INDICADORES)
+        if not limite:
+            return self._consulta(expresiones, filtros)
+        # La muestra se toma después de filtrar (USING SAMPLE se aplica antes del WHERE)
+        donde, parametros = self._condiciones(filtros)
+        sql = (f'SELECT * FROM (SELECT {expresiones} FROM {self._origen} {donde}) '
+               f'USING SAMPLE reservoir({int(limite)} ROWS) REPEATABLE (0)')
+        return self.conexion.execute(sql, parametros).fetchdf()
+
+    def cajas_indicadores(self, filtros=None):
+        """
+        Cuartiles y bigotes de cada indicador (el valor más extremo dentro de 1.5
+        veces el rango intercuartílico, como Plotly), calculados en DuckDB.
+        """
+        expresiones = ', '.join(f'{expresion_indicador(i)} AS "{i}"' for i in INDICADORES)
+        donde, parametros = self._condiciones(filtros)
+        sql = f"""
+            WITH valores AS (
+                UNPIVOT (SELECT {expresiones} FROM {self._origen} {donde})
+                ON COLUMNS(*) INTO NAME indicador VALUE v
+            ),
+            cuartiles AS (
+                SELECT indicador, quantile_cont(v, [0.25, 0.5, 0.75]) AS q FROM valores GROUP BY indicador
+            )
+            SELECT indicador, q[1] AS q1, q[2] AS mediana, q[3] AS q3,
+                   min(v) FILTER (WHERE v >= q[1] - 1.5 * (q[3] - q[1])) AS minimo,
+                   max(v) FILTER (WHERE v <= q[3] + 1.5 * (q[3] - q[1])) AS maximo
+            FROM valores JOIN cuartiles USING (indicador)
+            GROUP BY indicador, q
+        """
+        cajas = self.conexion.execute(sql, parametros).fetchdf().set_index('indicador')
+        return cajas.reindex(list(INDICADORES))
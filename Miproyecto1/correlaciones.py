@@ -0,0 +1,99 @@
+import numpy as np
+import pandas as pd
+import scipy.stats as stats
+
+
+def _p_valores(r, n):
+    """
+    p-valor bilateral de la correlación (prueba t con n-2 grados de libertad, la
+    misma que usan stats.pearsonr y stats.spearmanr).
+    """
+    gl = n - 2
+    with np.errstate(divide='ignore', invalid='ignore'):
+        t = r * np.sqrt(gl / ((1 - r) * (1 + r)))
+        p = 2 * stats.t.sf(np.abs(t), gl)
+    return np.where(gl > 0, p, np.nan)
+
+
+def _pearson_por_pares(X):
+    """
+    Pearson de todas las columnas de X (con NaN) contra todas, usando en cada par
+    las filas donde ambas tienen valor. Todas las sumas por par salen de tres
+    productos de matrices, sin copiar los datos de cada par.
+    Devuelve (r, n) como arreglos k x k.
+    """
+    presentes = ~np.isnan(X)
+    with np.errstate(invalid='ignore'):
+        X = X - np.nanmean(X, axis=0)  # Centrar no cambia r y evita cancelaciones
+    X0 = np.where(presentes, X, 0.0)
+    M = presentes.astype(np.float64)
+
+    n = M.T @ M              # filas con ambos valores
+    suma = X0.T @ M          # [i, j] = suma de x_i donde también hay x_j
+    suma2 = (X0 ** 2).T @ M
+    cruzada = X0.T @ X0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        covarianza = cruzada - suma * suma.T / n
+        varianza = suma2 - suma ** 2 / n
+        r = covarianza / np.sqrt(varianza * varianza.T)
+    r = np.clip(r, -1.0, 1.0)
+    r[n < 2] = np.nan
+    return r, n
+
+
+def matriz_correlaciones(df, metodo='pearson'):
+    """
+    Matriz de correlaciones de todas las columnas de `df` con eliminación por pares.
+
+    Devuelve (r, p, n): DataFrames k x k con el coeficiente, su p-valor bilateral
+    y el número de observaciones completas de cada par. Con metodo='spearman' se
+    correlacionan los rangos promedio; los rangos de cada columna se calculan una
+    sola vez, y solo los pares en los que las dos columnas tienen faltantes en
+    filas distintas se vuelven a rankear sobre sus filas comunes (igual que
+    stats.spearmanr después de quitar los NaN del par).
+    """
+    columnas = df.columns
+    X = df.to_numpy(dtype=np.float64, na_value=np.nan)
+
+    if metodo == 'pearson':
+        r, n = _pearson_por_pares(X)
+    elif metodo == 'spearman':
+        rangos = pd.DataFrame(X).rank(method='average').to_numpy()
+        r, n = _pearson_por_pares(rangos)
+        disponibles = np.diag(n)
+        incompletos = (n < disponibles[:, None]) | (n < disponibles[None, :])
+        presentes = ~np.isnan(X)
+        for i, j in zip(*np.nonzero(np.triu(incompletos, k=1))):
+            filas = presentes[:, i] & presentes[:, j]
+            if filas.sum() < 2:
+                continue
+            r_par = np.corrcoef(stats.rankdata(X[filas, i]), stats.rankdata(X[filas, j]))[0, 1]
+            r[i, j] = r[j, i] = r_par
+    else:
+        raise ValueError(f"Método de correlación desconocido: {metodo}")
+
+    p = _p_valores(r, n)
+    np.fill_diagonal(p, 0.0)
+    return (pd.DataFrame(r, index=columnas, columns=columnas),
+            pd.DataFrame(p, index=columnas, columns=columnas),
+            pd.DataFrame(n.astype(np.int64), index=columnas, columns=columnas))
+
+
+def correlaciones_hipotesis(df, hipotesis, metodos=('pearson', 'spearman')):
+    """
+    Calcula las matrices de `metodos` una sola vez para todas las columnas de `df`
+    y busca en ellas cada hipótesis [(clave, variable_x, variable_y), ...].
+
+    Devuelve un DataFrame indexado por la clave con n y, por método, r_<método>
+    y p_<método>.
+    """
+    matrices = {metodo: matriz_correlaciones(df, metodo) for metodo in metodos}
+    filas = {}
+    for clave, x, y in hipotesis:
+        fila = {'x': x, 'y': y}
+        for metodo, (r, p, n) in matrices.items():
+            fila['n'] = int(n.at[x, y])
+            fila[f'r_{metodo}'] = r.at[x, y]
+            fila[f'p_{metodo}'] = p.at[x, y]
+        filas[clave] = fila
+    return pd.DataFrame.from_dict(filas, orient='index')
@@ -0,0 +1,245 @@
+import os
+import json
+import itertools
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from carga_datos import ARCHIVO_CUBO, ARCHIVO_PARQUET
+from esquema_encuesta import RENAME_DICT, COLUMNAS_LIKERT, INDICADORES, codificar_likert, agregar_indicadores
+from carreras import catalogo_carreras
+
+# Dimensiones del cubo y medidas de las que se guardan estadísticos. La carrera va
+# como código del catálogo (carreras.py), no como el texto escrito por cada alumno
+DIMENSIONES = ['Cod_Carrera', 'Demo_Semestre', 'Demo_Genero', 'Demo_Edad']
+MEDIDAS = list(INDICADORES) + COLUMNAS_LIKERT
+
+# Valor de una dimensión agregada (el total de todas sus categorías); en el código
+# de carrera, que es entero, se usa CODIGO_TODOS
+TODOS = '(Todos)'
+CODIGO_TODOS = -1
+
+
+def _columnas(medidas):
+    return [f'{m}__{e}' for m in medidas for e in ('n', 'suma', 'suma2')]
+
+
+def _dimension(serie):
+    """
+    Valores de una dimensión como texto (las edades enteras leídas del CSV como
+    float quedan '20' y no '20.0'); los faltantes siguen siendo nulos.
+    """
+    if pd.api.types.is_float_dtype(serie) and (serie.dropna() % 1 == 0).all():
+        serie = serie.astype('Int64')
+    return serie.astype('string')
+
+
+def _valor_todos(dimension):
+    return CODIGO_TODOS if dimension == 'Cod_Carrera' else TODOS
+
+
+def _sumas_base(df, catalogo):
+    """
+    Estadísticos del nivel más fino (una celda por combinación de DIMENSIONES) a
+    partir de las respuestas con texto, en una sola pasada de groupby.
+    """
+    df = df.rename(columns=RENAME_DICT)
+    valores = agregar_indicadores(codificar_likert(df, COLUMNAS_LIKERT))[MEDIDAS]
+    valores = valores.to_numpy(dtype=np.float64, na_value=np.nan)
+    presentes = ~np.isnan(valores)
+    valores = np.where(presentes, valores, 0.0)
+
+    datos = {'Cod_Carrera': catalogo.codificar(df['Demo_Carrera'])}
+    datos.update({d: _dimension(df[d]) for d in DIMENSIONES[1:]})
+    datos['n_respuestas'] = np.ones(len(df), dtype=np.int64)
+    for i, medida in enumerate(MEDIDAS):
+        datos[f'{medida}__n'] = presentes[:, i].astype(np.int64)
+        datos[f'{medida}__suma'] = valores[:, i]
+        datos[f'{medida}__suma2'] = valores[:, i] ** 2
+    return pd.DataFrame(datos).groupby(DIMENSIONES, dropna=False, sort=True).sum()
+
+
+def _firma_origen(ruta):
+    if not ruta or not os.path.exists(ruta):
+        return None
+    estado = os.stat(ruta)
+    return [estado.st_size, estado.st_mtime_ns]
+
+
+class CuboIndicadores:
+    """
+    Cubo de estadísticos suficientes (conteo, suma y suma de cuadrados) de cada
+    indicador y pregunta Likert por código de carrera, semestre, género y edad, con
+    todas sus agregaciones (los 2^4 niveles; en el archivo las dimensiones agregadas
+    valen TODOS, o CODIGO_TODOS en la carrera).
+
+    Los estadísticos son aditivos: dos cubos se combinan sumando sus celdas, y
+    cualquier conteo, media o varianza por grupo se calcula desde el nivel que
+    corresponde del cubo, sin volver a las respuestas individuales.
+    """
+
+    def __init__(self, base, niveles=None):
+        self.base = base  # Nivel más fino, indexado por DIMENSIONES
+        self._niveles = dict(niveles or {})
+
+    @classmethod
+    def desde_encuesta(cls, df, catalogo=None):
+        """
+        Construye el cubo a partir de la encuesta limpia (respuestas con texto,
+        nombres originales o cortos). `catalogo` traduce las carreras a códigos
+        (por defecto, el de catalogo_carreras.json).
+        """
+        return cls(_sumas_base(df, catalogo or catalogo_carreras()))
+
+    def combinar(self, otro):
+        base = pd.concat([self.base, otro.base]).groupby(level=DIMENSIONES, dropna=False, sort=True).sum()
+        return CuboIndicadores(base)
+
+    def nivel(self, dimensiones=()):
+        """
+        Sumas agregadas por `dimensiones` (subconjunto de DIMENSIONES); cada nivel
+        se calcula una sola vez desde el nivel más fino.
+        """
+        clave = tuple(d for d in DIMENSIONES if d in dimensiones)
+        if clave not in self._niveles:
+            if clave:
+                tabla = self.base.groupby(level=list(clave), dropna=False, sort=True).sum()
+            else:
+                tabla = pd.DataFrame([self.base.sum()]).astype(self.base.dtypes.to_dict())
+            self._niveles[clave] = tabla
+        return self._niveles[clave]
+
+    def _seleccion(self, por, filtros):
+        por = list(por)
+        filtros = dict(filtros or {})
+        tabla = self.nivel(set(por) | set(filtros))
+        if filtros:
+            tabla = tabla.reset_index()
+            mascara = np.ones(len(tabla), dtype=bool)
+            for dimension, valor in filtros.items():
+                valores = list(valor) if isinstance(valor, (list, tuple, set, pd.Index)) else [valor]
+                mascara &= tabla[dimension].isin(valores).to_numpy()
+            tabla = tabla[mascara].drop(columns=[d for d in filtros if d not in por])
+            if por:
+                return tabla.groupby(por, dropna=False, sort=True).sum()
+            return pd.DataFrame([tabla.sum()]).astype(self.base.dtypes.to_dict())
+        if len(por) > 1:
+            tabla = tabla.reorder_levels(por)
+        return tabla
+
+    def conteos(self, por=(), filtros=None):
+        """
+        Número de respuestas por las dimensiones `por` (con `filtros` {dimensión: valor o lista}).
+        """
+        return self._seleccion(por, filtros)['n_respuestas']
+
+    def _estadisticos(self, por, filtros, medidas):
+        medidas = list(medidas) if medidas is not None else MEDIDAS
+        tabla = self._seleccion(por, filtros)
+        n = tabla[[f'{m}__n' for m in medidas]].to_numpy(dtype=np.float64)
+        suma = tabla[[f'{m}__suma' for m in medidas]].to_numpy()
+        suma2 = tabla[[f'{m}__suma2' for m in medidas]].to_numpy()
+        return tabla.index, medidas, n, suma, suma2
+
+    def medias(self, por=(), filtros=None, medidas=None):
+        """
+        Media de cada medida por las dimensiones `por` (NaN si el grupo no tiene respuestas).
+        """
+        indice, medidas, n, suma, _ = self._estadisticos(por, filtros, medidas)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            media = np.where(n > 0, suma / n, np.nan)
+        return pd.DataFrame(media, index=indice, columns=medidas)
+
+    def varianzas(self, por=(), filtros=None, medidas=None):
+        """
+        Varianza muestral (ddof=1, como pandas) de cada medida por las dimensiones `por`.
+        """
+        indice, medidas, n, suma, suma2 = self._estadisticos(por, filtros, medidas)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            varianza = np.where(n > 1, (suma2 - suma ** 2 / n) / (n - 1), np.nan)
+        return pd.DataFrame(np.maximum(varianza, 0), index=indice, columns=medidas)
+
+    def a_tabla(self):
+        """
+        Todos los niveles en una sola tabla (columna 'nivel' = dimensiones agrupadas).
+        """
+        partes = []
+        for k in range(len(DIMENSIONES) + 1):
+            for clave in itertools.combinations(DIMENSIONES, k):
+                tabla = self.nivel(clave)
+                tabla = tabla.reset_index() if clave else tabla.copy()
+                for d in DIMENSIONES:
+                    if d not in clave:
+                        tabla[d] = _valor_todos(d)
+                tabla.insert(0, 'nivel', '+'.join(clave))
+                partes.append(tabla[['nivel'] + DIMENSIONES + ['n_respuestas'] + _columnas(MEDIDAS)])
+        return pd.concat(partes, ignore_index=True)
+
+    def guardar(self, ruta=ARCHIVO_CUBO, origen=None, catalogo=None):
+        """
+        Guarda el cubo en Parquet (archivo temporal + renombrado). `origen` es el
+        Parquet de la encuesta del que sale: se anota su tamaño y fecha para saber
+        después si el cubo sigue vigente. También se anota la firma del catálogo de
+        carreras con el que se codificaron las carreras.
+        """
+        tabla = pa.Table.from_pandas(self.a_tabla(), preserve_index=False)
+        metadatos = dict(tabla.schema.metadata or {})
+        metadatos[b'origen'] = json.dumps(_firma_origen(origen)).encode('utf-8')
+        metadatos[b'catalogo'] = (catalogo or catalogo_carreras()).firma.encode('utf-8')
+        temporal = ruta + '.tmp'
+        pq.write_table(tabla.replace_schema_metadata(metadatos), temporal, compression='zstd')
+        os.replace(temporal, ruta)
+
+    @classmethod
+    def cargar(cls, ruta=ARCHIVO_CUBO):
+        tabla = pd.read_parquet(ruta)
+        niveles = {}
+        for nombre, parte in tabla.groupby('nivel', sort=False):
+            clave = tuple(nombre.split('+')) if nombre else ()
+            parte = parte.drop(columns=['nivel'] + [d for d in DIMENSIONES if d not in clave])
+            for d in clave:
+                parte[d] = parte[d].astype('Int16' if d == 'Cod_Carrera' else 'string')
+            niveles[clave] = parte.set_index(list(clave)) if clave else parte.reset_index(drop=True)
+        return cls(niveles[tuple(DIMENSIONES)], niveles)
+
+
+def filtrar_encuesta(df, filtros, catalogo=None):
+    """
+    Respuestas de la encuesta (nombres cortos) que cumplen `filtros` {dimensión:
+    valor o lista}, con los mismos valores de dimensión que el cubo.
+    """
+    mascara = np.ones(len(df), dtype=bool)
+    for dimension, valor in filtros.items():
+        valores = list(valor) if isinstance(valor, (list, tuple, set, pd.Index)) else [valor]
+        if dimension == 'Cod_Carrera':
+            columna = (catalogo or catalogo_carreras()).codificar(df['Demo_Carrera'])
+        else:
+            columna = _dimension(df[dimension])
+        mascara &= columna.isin(valores).to_numpy(dtype=bool, na_value=False)
+    return df[mascara]
+
+
+def firma_catalogo_cubo(ruta=ARCHIVO_CUBO):
+    """
+    Firma del catálogo de carreras con el que se guardó el cubo (None si no la tiene).
+    """
+    metadatos = pq.read_schema(ruta).metadata or {}
+    firma = metadatos.get(b'catalogo')
+    return firma.decode('utf-8') if firma else None
+
+
+def cargar_cubo_vigente(carpeta='.', catalogo=None):
+    """
+    Devuelve el cubo guardado por limpiar_datos.py si corresponde al Parquet actual
+    de la encuesta y al catálogo de carreras, o None si no existe o quedó desactualizado.
+    """
+    ruta = os.path.join(carpeta, ARCHIVO_CUBO)
+    if not os.path.exists(ruta):
+        return None
+    metadatos = pq.read_schema(ruta).metadata or {}
+    origen = json.loads(metadatos.get(b'origen', b'null'))
+    if origen is None or origen != _firma_origen(os.path.join(carpeta, ARCHIVO_PARQUET)):
+        return None
+    if firma_catalogo_cubo(ruta) != (catalogo or catalogo_carreras()).firma:
+        return None
+    return CuboIndicadores.cargar(ruta)
@@ -0,0 +1,142 @@
+import os
+import re
+import datetime
+import numpy as np
+import pandas as pd
+
+# Versión de la representación con la que se calculan las huellas: si cambia, las
+# huellas guardadas por ejecuciones anteriores ya no son comparables
+VERSION_HUELLAS = 2
+
+# Representación de un valor faltante (None, NaN, NaT...) en la huella
+_FALTANTE = '\x00'
+
+
+def texto_canonico(valor):
+    """
+    Representación de texto de un valor que no depende del tipo con el que se leyó:
+    5, 5.0 y np.int8(5) dan '5'; las fechas, en formato ISO; el texto, sin
+    espacios sobrantes y en minúsculas. Todos los faltantes dan la misma marca.
+    """
+    if pd.api.types.is_scalar(valor) and pd.isna(valor):
+        return _FALTANTE
+    if isinstance(valor, (bool, np.bool_)):
+        return str(bool(valor)).lower()
+    if isinstance(valor, (int, np.integer)):
+        return str(int(valor))
+    if isinstance(valor, (float, np.floating)):
+        entero = float(valor).is_integer() and abs(valor) < 2**63
+        return str(int(valor)) if entero else str(np.float64(valor))
+    if isinstance(valor, (datetime.date, np.datetime64)):
+        return pd.Timestamp(valor).isoformat()
+    return re.sub(r'\s+', ' ', str(valor)).strip().lower()
+
+
+def _canonicos(unicos):
+    """
+    texto_canonico de un arreglo de valores distintos; el texto y los números se
+    resuelven vectorizados y el resto (fechas, mezclas) valor por valor.
+    """
+    unicos = np.asarray(unicos, dtype=object)
+    tipo = pd.api.types.infer_dtype(unicos, skipna=False)
+    if tipo == 'string':
+        return pd.Index(unicos, dtype=object).str.replace(r'\s+', ' ', regex=True).str.strip().str.lower().to_numpy()
+    if tipo in ('integer', 'floating', 'mixed-integer-float') and len(unicos):
+        numeros = unicos.astype(np.float64)
+        enteros = np.isfinite(numeros) & (numeros == np.round(numeros)) & (np.abs(numeros) < 2**63)
+        if tipo == 'integer':
+            return np.array([str(int(v)) for v in unicos], dtype=object) if np.abs(numeros).max() >= 2**53 \
+                else numeros.astype(np.int64).astype(str).astype(object)
+        resultado = numeros.astype(str).astype(object)
+        resultado[enteros] = numeros[enteros].astype(np.int64).astype(str)
+        resultado[np.isnan(numeros)] = _FALTANTE
+        return resultado
+    return np.array([texto_canonico(v) for v in unicos], dtype=object)
+
+
+def _huellas_columna(serie):
+    """
+    Huella de 64 bits del texto canónico de cada valor de la columna; se calcula
+    una vez por valor distinto y se reparte a las filas con los códigos.
+    """
+    codigos, unicos = pd.factorize(serie, use_na_sentinel=True)
+    canonicos = np.append(_canonicos(unicos), np.array([_FALTANTE], dtype=object))
+    return pd.util.hash_array(canonicos)[codigos]
+
+
+def huellas_filas(df, columnas=None):
+    """
+    Huella de 64 bits por fila calculada sobre `columnas`, o sobre todas las
+    columnas si es None.
+
+    Cada columna se pasa antes a su texto canónico (texto_canonico), así que la
+    misma fila tiene la misma huella aunque un bloque o una ejecución haya leído la
+    columna como int64, float64 (p. ej. por un NaN en el bloque) u object. Las
+    huellas de las columnas se combinan en orden (vectorizado, como
+    pd.util.hash_pandas_object).
+    """
+    if columnas is not None:
+        df = df[list(columnas)]
+    huellas = np.zeros(len(df), dtype=np.uint64)
+    with np.errstate(over='ignore'):
+        for i in range(df.shape[1]):
+            huellas = (huellas * np.uint64(1_000_003)) ^ _huellas_columna(df.iloc[:, i])
+    return huellas
+
+
+def _en_ordenado(ordenado, valores):
+    """
+    Máscara de los `valores` presentes en el arreglo ordenado (búsqueda binaria).
+    """
+    if len(ordenado) == 0 or len(valores) == 0:
+        return np.zeros(len(valores), dtype=bool)
+    posiciones = np.searchsorted(ordenado, valores)
+    posiciones[posiciones == len(ordenado)] = 0
+    return np.asarray(ordenado[posiciones]) == valores
+
+
+class AlmacenHuellas:
+    """
+    Conjunto de huellas de filas ya vistas, guardado en disco como un arreglo
+    ordenado de np.uint64 (8 bytes por fila).
+
+    El arreglo guardado se abre mapeado en memoria y se consulta con búsqueda
+    binaria, así que solo se leen las páginas que tocan las consultas; las huellas
+    nuevas se acumulan aparte (también ordenadas) y se combinan con las guardadas
+    una sola vez, en `guardar`. Cada lote cuesta O(filas nuevas · log n).
+    """
+
+    def __init__(self, ruta=None, cargar=True):
+        self.ruta = ruta
+        if cargar and ruta and os.path.exists(ruta):
+            self._guardadas = np.load(ruta, mmap_mode='r')
+        else:
+            self._guardadas = np.empty(0, dtype=np.uint64)
+        self._nuevas = np.empty(0, dtype=np.uint64)
+
+    def __len__(self):
+        return len(self._guardadas) + len(self._nuevas)
+
+    def contiene(self, huellas):
+        return _en_ordenado(self._guardadas, huellas) | _en_ordenado(self._nuevas, huellas)
+
+    def registrar(self, huellas):
+        """
+        Devuelve la máscara de huellas repetidas (dentro del lote o ya vistas antes)
+        y agrega las demás al almacén.
+        """
+        repetidas = pd.Series(huellas).duplicated().to_numpy() | self.contiene(huellas)
+        self._nuevas = np.union1d(self._nuevas, huellas[~repetidas])
+        return repetidas
+
+    def guardar(self):
+        if not self.ruta:
+            return
+        # Al reasignar se suelta el mapeo del archivo anterior antes de reemplazarlo
+        self._guardadas = np.union1d(self._guardadas, self._nuevas)
+        self._nuevas = np.empty(0, dtype=np.uint64)
+        os.makedirs(os.path.dirname(self.ruta) or '.', exist_ok=True)
+        temporal = self.ruta + '.tmp'
+        with open(temporal, 'wb') as f:
+            np.save(f, self._guardadas)
+        os.replace(temporal, self.ruta)
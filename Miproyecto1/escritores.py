@@ -0,0 +1,473 @@
+import os
+import csv
+import time
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+import pyarrow.parquet as pq
+from openpyxl import Workbook, load_workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font
+
+
+class EscritorIncremental:
+    """
+    Escritor de salida que recibe el DataFrame por bloques.
+
+    Todo se escribe en `<destino>.tmp` y solo al cerrar se renombra al nombre final
+    (os.replace es atómico), así que quien lea el archivo (p. ej. app.py) nunca ve
+    una salida escrita a medias. Con `anexar=True` el temporal empieza con el
+    contenido del archivo existente y los bloques se agregan a continuación; si no
+    llega ninguna fila nueva, el archivo existente se deja intacto.
+
+    `cerrar` equivale a `terminar` (el temporal queda completo) y `confirmar`
+    (el renombrado); GrupoEscritores los llama por separado para no reemplazar
+    ninguna salida hasta que todas estén terminadas.
+    """
+
+    # Los escritores de este proceso terminan cada llamada antes de volver
+    en_proceso_aparte = False
+
+    def __init__(self, destino, anexar=False):
+        self.destino = destino
+        self.temporal = destino + '.tmp'
+        self.anexar = anexar and os.path.exists(destino)
+        self.filas = 0
+        self._vacio = None
+        self._terminado = False
+
+    def escribir(self, df):
+        # Los bloques vacíos no se escriben (la cabecera y el esquema salen del primer
+        # bloque con filas); se guarda uno por si ningún bloque trae datos.
+        if len(df) == 0:
+            self._vacio = df
+            return
+        self._escribir(df)
+        self.filas += len(df)
+
+    def cerrar(self):
+        self.terminar()
+        self.confirmar()
+
+    def terminar(self):
+        """
+        Termina de escribir el temporal, sin reemplazar todavía el destino.
+        """
+        if self.filas == 0:
+            if self.anexar:
+                self.abortar()
+                return
+            if self._vacio is not None:
+                self._escribir(self._vacio)
+        self._cerrar()
+        self._terminado = True
+
+    def confirmar(self):
+        """
+        Reemplaza el destino por el temporal terminado (nada si no hubo cambios).
+        """
+        if self._terminado:
+            os.replace(self.temporal, self.destino)
+            self._terminado = False
+
+    def abortar(self):
+        if not self._terminado:
+            try:
+                self._cerrar()
+            except Exception:
+                pass
+        self._terminado = False
+        if os.path.exists(self.temporal):
+            os.remove(self.temporal)
+
+    def esperar(self):
+        """
+        Espera a que termine la última llamada (ver EscritorEnProceso).
+        """
+
+    def _escribir(self, df):
+        raise NotImplementedError
+
+    def _cerrar(self):
+        raise NotImplementedError
+
+
+class EscritorCSV(EscritorIncremental):
+    """
+    CSV en UTF-8 con BOM (para que Excel muestre bien las tildes); la cabecera
+    y el BOM se escriben una sola vez, con el primer bloque (al anexar ya están
+    en el archivo copiado).
+    """
+
+    def __init__(self, destino, anexar=False):
+        super().__init__(destino, anexar)
+        self._archivo = None
+
+    def _escribir(self, df):
+        if self._archivo is None:
+            if self.anexar:
+                shutil.copyfile(self.destino, self.temporal)
+                self._archivo = open(self.temporal, 'a', encoding='utf-8', newline='')
+            else:
+                self._archivo = open(self.temporal, 'w', encoding='utf-8-sig', newline='')
+        encabezado = self.filas == 0 and not self.anexar
+        df.to_csv(self._archivo, index=False, header=encabezado, quoting=csv.QUOTE_MINIMAL)
+
+    def _cerrar(self):
+        if self._archivo is not None and not self._archivo.closed:
+            self._archivo.close()
+
+
+class EscritorExcel(EscritorIncremental):
+    """
+    XLSX en modo `write_only` de openpyxl: las filas se vuelcan a disco a medida
+    que se agregan, sin mantener el libro completo en memoria. Un XLSX no admite
+    agregar filas en el lugar, así que al anexar las filas existentes se copian
+    primero (leídas en modo solo lectura).
+    """
+
+    def __init__(self, destino, anexar=False):
+        super().__init__(destino, anexar)
+        self._libro = None
+        self._hoja = None
+
+    def _agregar_encabezado(self, nombres):
+        encabezado = []
+        for nombre in nombres:
+            celda = WriteOnlyCell(self._hoja, value=str(nombre))
+            celda.font = Font(bold=True)
+            encabezado.append(celda)
+        self._hoja.append(encabezado)
+
+    def _abrir(self, columnas):
+        self._libro = Workbook(write_only=True)
+        self._hoja = self._libro.create_sheet('Sheet1')
+        if not self.anexar:
+            self._agregar_encabezado(columnas)
+            return
+        existente = load_workbook(self.destino, read_only=True)
+        try:
+            filas = existente.worksheets[0].iter_rows(values_only=True)
+            self._agregar_encabezado(next(filas, columnas))
+            for fila in filas:
+                self._hoja.append(fila)
+        finally:
+            existente.close()
+
+    def _escribir(self, df):
+        if self._libro is None:
+            self._abrir(df.columns)
+        valores = df.astype(object).where(df.notna(), None)
+        for fila in valores.itertuples(index=False, name=None):
+            self._hoja.append(fila)
+
+    def _cerrar(self):
+        if self._libro is not None:
+            self._libro.save(self.temporal)
+            self._libro = None
+
+
+def _tipo_comun(tipos, hay_nulos):
+    """
+    Tipo de Arrow que reúne los de una columna en todos los bloques, con la regla
+    de pandas al leer el archivo completo: una columna sin ningún valor es float64
+    (como en pd.read_excel), los enteros con faltantes pasan a float64 y una mezcla
+    de números y texto queda como texto.
+    """
+    tipos = [t for t in tipos if not pa.types.is_null(t)]
+    if not tipos:
+        return pa.float64()
+    try:
+        tipo = pa.unify_schemas([pa.schema([('c', t)]) for t in tipos], promote_options='permissive').field('c').type
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        return pa.large_string()
+    if pa.types.is_integer(tipo) and hay_nulos:
+        return pa.float64()
+    return tipo
+
+
+class _EscritorArrow(EscritorIncremental):
+    """
+    Base de los formatos de Arrow (Parquet y Feather).
+
+    Cada bloque se guarda tal cual (el texto como texto) en un Parquet intermedio
+    dentro de `<destino>.partes`. Al cerrar se decide el tipo de cada columna con
+    la columna completa (`preparar`, p. ej. categórica si tiene pocos valores
+    distintos, con la lista completa de categorías) y las partes se reescriben con
+    ese esquema único, una a la vez. Así el archivo es el mismo que si todas las
+    filas llegaran en un solo bloque: el modo streaming y el completo dan la misma
+    salida. La memoria del cierre es la de una columna completa o la de una parte.
+
+    Al anexar, el archivo existente es la primera parte, así que el esquema se
+    vuelve a decidir con las filas anteriores y las nuevas.
+    """
+
+    # Si el formato guarda las categóricas como diccionarios (si no, como texto)
+    admite_diccionarios = True
+
+    def __init__(self, destino, preparar=None, compresion='zstd', anexar=False):
+        super().__init__(destino, anexar)
+        self.preparar = preparar
+        self.compresion = compresion
+        self._carpeta = destino + '.partes'
+        self._partes = [destino] if self.anexar else []
+        self._columnas = None
+        self._escritor = None
+
+    def _escribir(self, df):
+        if self._columnas is None:
+            self._columnas = [str(c) for c in df.columns]
+            shutil.rmtree(self._carpeta, ignore_errors=True)
+            os.makedirs(self._carpeta)
+        # Texto y mezclas como texto; números y fechas con su tipo
+        neutro = {}
+        for col in df.columns:
+            serie = df[col]
+            numerica = pd.api.types.is_numeric_dtype(serie) and not pd.api.types.is_bool_dtype(serie)
+            if numerica or pd.api.types.is_datetime64_any_dtype(serie) or serie.isna().all():
+                neutro[str(col)] = serie
+            else:
+                neutro[str(col)] = serie.astype('string')
+        parte = os.path.join(self._carpeta, f'{len(self._partes):06d}.parquet')
+        pq.write_table(pa.Table.from_pandas(pd.DataFrame(neutro), preserve_index=False), parte, compression='lz4')
+        self._partes.append(parte)
+
+    def _leer(self, parte, columnas=None):
+        """
+        Columnas de una parte (las categóricas del archivo existente, como texto).
+        """
+        if parte == self.destino:
+            tabla = self._leer_existente(columnas)
+        else:
+            tabla = pq.read_table(parte, columns=columnas)
+        return pa.table([
+            columna.dictionary_decode() if pa.types.is_dictionary(columna.type) else columna
+            for columna in (c.combine_chunks() for c in tabla.columns)
+        ], names=tabla.column_names)
+
+    def _tipos_finales(self):
+        """
+        Tipo de pandas de cada columna, decidido con la columna completa.
+        """
+        tipos = {}
+        for col in self._columnas:
+            columnas = [self._leer(parte, [col]).column(0) for parte in self._partes]
+            tipo = _tipo_comun([c.type for c in columnas], any(c.null_count for c in columnas))
+            serie = pa.chunked_array([c.cast(tipo) for c in columnas], type=tipo).to_pandas()
+            if self.preparar is not None:
+                serie = self.preparar(serie.to_frame(col))[col]
+            tipos[col] = serie.dtype
+        return tipos
+
+    def _cerrar(self):
+        if self._columnas is None:
+            return
+        tipos = self._tipos_finales()
+        esquema = None
+        for parte in self._partes:
+            df = self._leer(parte).to_pandas()
+            df = pd.DataFrame({col: df[col].astype(tipos[col]) for col in self._columnas})
+            tabla = pa.Table.from_pandas(df, preserve_index=False)
+            if esquema is None:
+                esquema = pa.schema([
+                    campo.with_type(campo.type.value_type)
+                    if pa.types.is_dictionary(campo.type) and not self.admite_diccionarios else campo
+                    for campo in tabla.schema
+                ], metadata=tabla.schema.metadata)
+                self._abrir(esquema)
+            self._escritor.write_table(tabla.cast(esquema))
+        self._escritor.close()
+        self._escritor = None
+        self._limpiar_partes()
+
+    def abortar(self):
+        # Sin reescribir las partes: solo se descartan
+        self._terminado = False
+        try:
+            self._limpiar_partes()
+        finally:
+            if os.path.exists(self.temporal):
+                os.remove(self.temporal)
+
+    def _limpiar_partes(self):
+        if self._escritor is not None:
+            self._escritor.close()
+            self._escritor = None
+        shutil.rmtree(self._carpeta, ignore_errors=True)
+
+    def _abrir(self, esquema):
+        raise NotImplementedError
+
+    def _leer_existente(self, columnas):
+        raise NotImplementedError
+
+
+class EscritorParquet(_EscritorArrow):
+    """
+    Parquet con un grupo de filas por bloque.
+    """
+
+    def _abrir(self, esquema):
+        self._escritor = pq.ParquetWriter(self.temporal, esquema, compression=self.compresion)
+
+    def _leer_existente(self, columnas):
+        return pq.read_table(self.destino, columns=columnas)
+
+
+class EscritorFeather(_EscritorArrow):
+    """
+    Feather (formato de archivo IPC de Arrow), un lote de registros por bloque.
+    Las categóricas se guardan como texto.
+    """
+
+    admite_diccionarios = False
+
+    def _abrir(self, esquema):
+        opciones = pa.ipc.IpcWriteOptions(compression=self.compresion)
+        self._escritor = pa.ipc.new_file(self.temporal, esquema, options=opciones)
+
+    def _leer_existente(self, columnas):
+        return feather.read_table(self.destino, columns=columnas, memory_map=True)
+
+
+# --- Escritor en otro proceso (funciones de módulo para poder usarlas en el proceso hijo) ---
+
+_ESCRITOR = None
+
+
+def _iniciar_escritor(clase, destino, opciones):
+    # El escritor vive en el proceso hijo; solo viajan los bloques
+    global _ESCRITOR
+    _ESCRITOR = clase(destino, **opciones)
+
+
+def _llamar_escritor(metodo, *args):
+    inicio = time.perf_counter()
+    getattr(_ESCRITOR, metodo)(*args)
+    return time.perf_counter() - inicio
+
+
+class EscritorEnProceso:
+    """
+    Ejecuta un escritor (p. ej. EscritorExcel) en un proceso aparte, para que
+    escriba al mismo tiempo que los escritores del proceso principal: openpyxl
+    es código Python que retiene el GIL, así que en un hilo no se solaparía.
+
+    Las llamadas vuelven enseguida y el proceso hijo las atiende en orden; antes
+    de entregar una nueva se espera a que termine la anterior, así que en el hijo
+    hay como mucho un bloque en curso. Los errores del hijo se propagan en la
+    llamada siguiente o en `esperar`. `segundos` acumula el tiempo que el
+    escritor pasó trabajando en el hijo.
+    """
+
+    en_proceso_aparte = True
+
+    def __init__(self, clase, destino, **opciones):
+        self.destino = destino
+        self.temporal = destino + '.tmp'
+        self.segundos = 0.0
+        self._proceso = ProcessPoolExecutor(max_workers=1, initializer=_iniciar_escritor,
+                                            initargs=(clase, destino, opciones))
+        self._pendiente = None
+
+    def _enviar(self, metodo, *args):
+        self.esperar()
+        self._pendiente = self._proceso.submit(_llamar_escritor, metodo, *args)
+
+    def esperar(self):
+        pendiente, self._pendiente = self._pendiente, None
+        if pendiente is not None:
+            self.segundos += pendiente.result()
+
+    def escribir(self, df):
+        self._enviar('escribir', df)
+
+    def cerrar(self):
+        self.terminar()
+        self.confirmar()
+
+    def terminar(self):
+        self._enviar('terminar')
+
+    def confirmar(self):
+        try:
+            self._enviar('confirmar')
+            self.esperar()
+        finally:
+            self._proceso.shutdown()
+
+    def abortar(self):
+        try:
+            try:
+                self.esperar()
+            except Exception:
+                pass
+            self._enviar('abortar')
+            self.esperar()
+        except Exception:
+            pass  # El proceso hijo ya no responde: se borra el temporal desde aquí
+        finally:
+            self._proceso.shutdown(cancel_futures=True)
+        if os.path.exists(self.temporal):
+            os.remove(self.temporal)
+
+
+class GrupoEscritores:
+    """
+    Reparte cada bloque entre varios escritores y los cierra juntos.
+
+    Al cerrar, primero se terminan todos los temporales y solo si todos
+    terminaron bien se renombran; si alguno falla, se descartan todos y las
+    salidas anteriores quedan como estaban, así nunca conviven un CSV nuevo con
+    un Parquet viejo. `tiempos` tiene los segundos que cada escritor pasó
+    escribiendo y cerrando su archivo.
+
+    Los escritores en otro proceso (EscritorEnProceso, el del XLSX) trabajan al
+    mismo tiempo que los demás, que se ejecutan uno tras otro en este proceso:
+    su trabajo es código Python que retiene el GIL (csv, conversión de pandas),
+    y con un hilo por escritor la limpieza de 100 000 filas en CSV, Parquet y
+    Feather no tardaba menos (unos 22 s en ambos casos).
+    """
+
+    def __init__(self, escritores):
+        # Primero los de este proceso: así, al llegar a los de otro proceso, su
+        # bloque anterior tuvo todo ese tiempo para terminar
+        self.escritores = sorted(escritores, key=lambda escritor: escritor.en_proceso_aparte)
+        self._tiempos = {escritor.destino: 0.0 for escritor in self.escritores}
+
+    @property
+    def tiempos(self):
+        return {
+            escritor.destino: escritor.segundos if escritor.en_proceso_aparte else self._tiempos[escritor.destino]
+            for escritor in self.escritores
+        }
+
+    def _medir(self, escritor, metodo, *args):
+        inicio = time.perf_counter()
+        try:
+            metodo(*args)
+        finally:
+            self._tiempos[escritor.destino] += time.perf_counter() - inicio
+
+    def escribir(self, df):
+        for escritor in self.escritores:
+            self._medir(escritor, escritor.escribir, df)
+
+    def cerrar(self):
+        try:
+            # Los de otro proceso empiezan a cerrar primero y se esperan al final
+            for escritor in sorted(self.escritores, key=lambda escritor: not escritor.en_proceso_aparte):
+                self._medir(escritor, escritor.terminar)
+            for escritor in self.escritores:
+                escritor.esperar()
+        except Exception:
+            self.abortar()
+            raise
+        for escritor in self.escritores:
+            escritor.confirmar()
+
+    def abortar(self):
+        for escritor in self.escritores:
+            escritor.abortar()
@@ -0,0 +1,224 @@
+import numpy as np
+import pandas as pd
+
+# --- Escalas Likert (en orden: la posición + 1 es el valor numérico 1-5) ---
+ESCALAS = {
+    'competencias': ['Ninguno', 'Básico', 'Intermedio', 'Avanzado', 'Experto'],
+    'acuerdo': ['Totalmente en desacuerdo', 'En desacuerdo', 'Neutral', 'De acuerdo', 'Totalmente de acuerdo'],
+    'importancia': ['Sin importancia', 'Poca importancia', 'Neutral', 'Importante', 'Muy importante'],
+}
+
+# Tipos categóricos ordenados compilados una sola vez a partir de las escalas
+TIPOS_LIKERT = {nombre: pd.CategoricalDtype(etiquetas, ordered=True) for nombre, etiquetas in ESCALAS.items()}
+
+# --- Nombres cortos ---
+RENAME_DICT = {
+    'Por favor, escribe el nombre de tu carrera o programa de estudios.': 'Demo_Carrera',
+    '¿Qué semestre estás cursando actualmente?': 'Demo_Semestre',
+    '¿Cuál es tu edad?': 'Demo_Edad',
+    '¿Con qué género te identificas?': 'Demo_Genero',
+    'Análisis e interpretación de datos.': 'P1_Analisis_Datos',
+    'Fundamentos de ciberseguridad.': 'P1_Ciberseguridad',
+    'Conceptos básicos de programación y automatización.': 'P1_Programacion',
+    'Manejo de herramientas de IA (ej. ChatGPT, Copilot, Gemini, DALL-E)': 'P1_Manejo_IA',
+    'Pensamiento crítico y resolución de problemas complejos': 'P2_Pensamiento_Critico',
+    'Comunicación efectiva en entornos digitales': 'P2_Comunicacion_Digital',
+    'Adaptabilidad y aprendizaje continuo': 'P2_Adaptabilidad',
+    'Creatividad e innovación': 'P2_Creatividad',
+    'Colaboración en equipos multidisciplinarios': 'P2_Colaboracion',
+    'El currículo de mi carrera está alineado con las habilidades demandadas por el mercado laboral digital.': 'P3_Curriculo_Alineado',
+    'Mi universidad promueve activamente el desarrollo de competencias digitales y blandas.': 'P3_Promueve_Competencias',
+    'Siento que la formación que he recibido me prepara para trabajos que aún no existen.': 'P3_Prepara_Futuro',
+    'El uso de la tecnología y la IA está bien integrado en las asignaturas de mi carrera.': 'P3_IA_Integrada',
+    'La metodología de enseñanza en mi carrera fomenta la adaptabilidad y el aprendizaje continuo.': 'P3_Metodologia_Adaptable',
+    'Me siento seguro(a) de que mi formación académica me prepara para conseguir un empleo relevante en mi área.': 'P4_Confianza_Empleo',
+    'Mi perfil de egreso es competitivo en el mercado laboral actual.': 'P4_Perfil_Competitivo',
+    'Considero que mis habilidades blandas (ej. comunicación, creatividad) me dan una ventaja en el mercado laboral.': 'P4_Ventaja_Blandas',
+    'Creo que mi conocimiento sobre herramientas de IA mejorará mis oportunidades laborales.': 'P4_IA_Oportunidades',
+    'Habilidades técnicas y digitales (ej. programación, análisis de datos)': 'P5_Factor_Tecnicas',
+    'Habilidades blandas (ej. pensamiento crítico, adaptabilidad)': 'P5_Factor_Blandas',
+    'Experiencia práctica o pasantías': 'P5_Factor_Experiencia',
+    'Red de contactos (networking)': 'P5_Factor_Networking',
+    'Título académico de la universidad': 'P5_Factor_Titulo',
+    'El profesorado de mi carrera está capacitado para integrar herramientas de IA en la enseñanza.': 'P6_Profesor_Capacitado_IA',
+    'Mi universidad fomenta la innovación en las metodologías de enseñanza para adaptarse a la era digital.': 'P6_Universidad_Innova',
+    'Mi universidad tiene los recursos adecuados (plataformas, software) para formar profesionales en la era digital.': 'P6_Recursos_Adecuados',
+    'En general, recomendaría mi universidad como una institución que prepara para los desafíos del mercado laboral digital.': 'P6_Recomendaria_Universidad'
+}
+COLUMNAS_UTILES = list(RENAME_DICT.values())
+NOMBRES_ORIGINALES = {corto: largo for largo, corto in RENAME_DICT.items()}
+COLUMNAS_DEMOGRAFICAS = [c for c in COLUMNAS_UTILES if c.startswith('Demo_')]
+
+# Nombres cortos (solo para mostrar) de las demás columnas de la exportación, que
+# los análisis no usan: preguntas sin indicador y encabezados de sección (estos
+# se reconocen por el comienzo de su texto, que es muy largo). Las columnas de
+# KoBo (_id, _uuid...) ya son cortas y se muestran igual
+OTROS_NOMBRES_CORTOS = {
+    '¿En qué universidad estudias actualmente?': 'Demo_Universidad',
+    '¿En qué país estás cursando tus estudios?': 'Demo_Pais',
+    '¿A qué área principal pertenece tu carrera?': 'Demo_Area',
+    'El rol principal del profesorado será el de facilitador y guía del aprendizaje.': 'P6_Rol_Facilitador',
+    'El profesorado deberá enfocarse más en enseñar habilidades humanas (pensamiento crítico, ética, creatividad) que en transmitir información.': 'P6_Rol_Habilidades_Humanas',
+    'El rol del profesorado se reducirá significativamente, siendo reemplazado en gran medida por la IA.': 'P6_Rol_Reducido',
+}
+PREFIJOS_NOMBRES_CORTOS = {
+    '###¡Tu voz cuenta!': 'Seccion_Presentacion',
+    '**Instrucción:** Para comenzar': 'Seccion_Perfil',
+    '**Instrucción:** A continuación, evalúa en qué medida sientes que dominas': 'Seccion_Competencias',
+    '**Instrucción:** Evalúa en qué nivel estás de acuerdo': 'Seccion_Pertinencia',
+    '**Instrucción:** A continuación, evalúa tu nivel de confianza': 'Seccion_Empleabilidad',
+    '**Instrucción:** Para finalizar': 'Seccion_Universidad',
+}
+
+# --- Grupos de columnas ---
+COL_GROUPS = {
+    'Ind1_Tecnicas': ['P1_Analisis_Datos', 'P1_Ciberseguridad', 'P1_Programacion', 'P1_Manejo_IA'],
+    'Ind1_Blandas': ['P2_Pensamiento_Critico', 'P2_Comunicacion_Digital', 'P2_Adaptabilidad', 'P2_Creatividad', 'P2_Colaboracion'],
+    'Ind2_Pertinencia': ['P3_Curriculo_Alineado', 'P3_Promueve_Competencias', 'P3_Prepara_Futuro', 'P3_IA_Integrada', 'P3_Metodologia_Adaptable'],
+    'Ind3_Confianza': ['P4_Confianza_Empleo', 'P4_Perfil_Competitivo', 'P4_Ventaja_Blandas', 'P4_IA_Oportunidades'],
+    'Ind3_Factores': ['P5_Factor_Tecnicas', 'P5_Factor_Blandas', 'P5_Factor_Experiencia', 'P5_Factor_Networking', 'P5_Factor_Titulo'],
+    'Ind4_Universidad': ['P6_Profesor_Capacitado_IA', 'P6_Universidad_Innova', 'P6_Recursos_Adecuados', 'P6_Recomendaria_Universidad']
+}
+
+# Escala con la que se codifica cada grupo de preguntas
+ESCALA_POR_GRUPO = {
+    'Ind1_Tecnicas': 'competencias',
+    'Ind1_Blandas': 'competencias',
+    'Ind2_Pertinencia': 'acuerdo',
+    'Ind3_Confianza': 'acuerdo',
+    'Ind3_Factores': 'importancia',
+    'Ind4_Universidad': 'acuerdo',
+}
+
+# Las 27 preguntas Likert (nombre corto -> escala)
+ESCALA_POR_COLUMNA = {
+    col: ESCALA_POR_GRUPO[grupo] for grupo, cols in COL_GROUPS.items() for col in cols
+}
+COLUMNAS_LIKERT = list(ESCALA_POR_COLUMNA)
+
+# Al compactar, una columna de texto pasa a categórica si sus valores distintos
+# son a lo sumo esta proporción de las filas (respuestas cerradas, no texto libre)
+PROPORCION_MAX_CATEGORIAS = 0.5
+
+# Columnas de promedio por indicador y el grupo del que se calculan (ver agregar_indicadores)
+INDICADORES = {
+    'Promedio_Ind1_Tecnicas': 'Ind1_Tecnicas',
+    'Promedio_Ind1_Blandas': 'Ind1_Blandas',
+    'Promedio_Ind2_Pertinencia': 'Ind2_Pertinencia',
+    'Promedio_Ind3_Confianza': 'Ind3_Confianza',
+    'Promedio_Ind4_Universidad': 'Ind4_Universidad',
+}
+
+
+def nombres_cortos(columnas):
+    """
+    {columna: nombre corto} de todas las `columnas` de la exportación que tienen
+    uno (RENAME_DICT, OTROS_NOMBRES_CORTOS o PREFIJOS_NOMBRES_CORTOS).
+    """
+    nombres = {}
+    for columna in columnas:
+        corto = RENAME_DICT.get(columna) or OTROS_NOMBRES_CORTOS.get(columna)
+        if corto is None:
+            texto = str(columna)
+            corto = next((c for prefijo, c in PREFIJOS_NOMBRES_CORTOS.items() if texto.startswith(prefijo)), None)
+        if corto is not None:
+            nombres[columna] = corto
+    return nombres
+
+
+def _tabla_codigos(etiquetas, tipo):
+    """
+    Traduce un arreglo de etiquetas (valores únicos) a códigos int8 0-4 de la escala,
+    con -1 para los valores que no pertenecen a ella. Se ignoran espacios sobrantes.
+    """
+    etiquetas = pd.Index(etiquetas, dtype=object).astype(str).str.strip()
+    return tipo.categories.get_indexer(etiquetas).astype(np.int8)
+
+
+def codificar_likert(df, columnas=None):
+    """
+    Convierte las preguntas Likert a enteros 1-5 (Int8, nulo si la respuesta falta
+    o no pertenece a la escala).
+
+    Cada columna se factoriza una sola vez (las categóricas del Parquet ya vienen
+    factorizadas), solo se traducen a la escala sus valores únicos y los códigos
+    se recuperan con un `take` vectorizado: no hay pasadas de texto por fila.
+    """
+    if columnas is None:
+        columnas = [c for c in COLUMNAS_LIKERT if c in df.columns]
+
+    resultado = {}
+    for c in columnas:
+        serie = df[c]
+        if isinstance(serie.dtype, pd.CategoricalDtype):
+            indices, unicos = serie.cat.codes.to_numpy(), serie.cat.categories
+        else:
+            indices, unicos = pd.factorize(serie, use_na_sentinel=True)
+        # El centinela -1 de los índices apunta al último elemento de la tabla (-1)
+        tabla = np.append(_tabla_codigos(unicos, TIPOS_LIKERT[ESCALA_POR_COLUMNA[c]]), np.int8(-1))
+        codigos = tabla[indices]
+        resultado[c] = pd.arrays.IntegerArray(codigos + np.int8(1), codigos < 0)
+
+    return pd.DataFrame(resultado, index=df.index)
+
+
+def agregar_indicadores(df):
+    """
+    Agrega al DataFrame (ya codificado 1-5) las columnas de INDICADORES: el
+    promedio por fila de las preguntas de cada grupo, ignorando las faltantes.
+    """
+    for indicador, grupo in INDICADORES.items():
+        df[indicador] = df[COL_GROUPS[grupo]].mean(axis=1)
+    return df
+
+
+def compactar_tabla(df, categoricas=()):
+    """
+    Copia de `df` con tipos más chicos: las columnas de texto con pocos valores
+    distintos (y las de `categoricas`) como categóricas y los enteros al menor
+    tipo que los contiene. Los valores no cambian.
+    """
+    resultado = {}
+    for c in df.columns:
+        serie = df[c]
+        es_texto = serie.dtype == object or isinstance(serie.dtype, pd.StringDtype)
+        if es_texto and (c in categoricas or serie.nunique() <= PROPORCION_MAX_CATEGORIAS * len(serie)):
+            serie = serie.astype('category')
+        elif pd.api.types.is_integer_dtype(serie.dtype) and isinstance(serie.dtype, np.dtype):
+            serie = pd.to_numeric(serie, downcast='integer')
+        resultado[c] = serie
+    return pd.DataFrame(resultado, index=df.index)
+
+
+def compactar_encuesta(df):
+    """
+    Copia compacta de la encuesta ya codificada: preguntas Likert como Int8,
+    indicadores como float32 (NaN si faltan) y datos demográficos como
+    categóricos; el resto de columnas como en compactar_tabla.
+    """
+    df = compactar_tabla(df, categoricas=[c for c in COLUMNAS_DEMOGRAFICAS if c in df.columns])
+    for c in COLUMNAS_LIKERT:
+        if c in df.columns and pd.api.types.is_numeric_dtype(df[c].dtype):
+            df[c] = df[c].astype('Int8')
+    for c in INDICADORES:
+        if c in df.columns:
+            df[c] = df[c].to_numpy(dtype=np.float32, na_value=np.nan)
+    return df
+
+
+def reporte_memoria(antes, despues):
+    """
+    Memoria (MB, contando el contenido del texto) y tipo de cada columna antes y
+    después de compactar, con una fila 'TOTAL' y el factor de reducción.
+    """
+    mb_antes = antes.memory_usage(deep=True, index=False) / 2**20
+    mb_despues = despues.memory_usage(deep=True, index=False).reindex(mb_antes.index) / 2**20
+    reporte = pd.DataFrame({
+        'tipo_antes': antes.dtypes.astype(str),
+        'mb_antes': mb_antes,
+        'tipo_despues': despues.dtypes.reindex(mb_antes.index).astype(str),
+        'mb_despues': mb_despues,
+    })
+    reporte.loc['TOTAL'] = ['', mb_antes.sum(), '', mb_despues.sum()]
+    reporte['reduccion'] = reporte['mb_antes'] / reporte['mb_despues']
+    return reporte
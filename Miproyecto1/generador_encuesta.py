@@ -0,0 +1,298 @@
+import os
+import argparse
+import numpy as np
+import pandas as pd
+from unidecode import unidecode
+from esquema_encuesta import ESCALAS, RENAME_DICT, COL_GROUPS
+from carreras import CatalogoCarreras, clave_carrera, CODIGO_OTRA
+from escritores import EscritorCSV, EscritorExcel, EscritorParquet
+
+# Exportación real de KoBo que sirve de plantilla: de ella salen los nombres de las
+# columnas y los valores posibles de cada una (es la misma que lee limpiar_datos.py)
+ARCHIVO_PLANTILLA = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)),
+    'ENCUESTA_DE_PERCEPCIÓN_EN_EL_USO__DE_LA_INTELIGENCIA_ARTIFICIAL_Y_LA_EMPLEABILIDAD_-_all_versions_-_labels_-_2025-10-30-15-38-54.xlsx',
+)
+
+# Tamaños de referencia de los benchmarks (benchmark_pipeline.py)
+ESCALAS_BENCHMARK = {'1k': 1_000, '100k': 100_000, '1M': 1_000_000, '10M': 10_000_000}
+
+# Filas por bloque: la memoria del generador depende de esto y no del total
+TAMANO_BLOQUE = 100_000
+
+# Filas de datos que caben en una hoja de Excel (1.048.576 menos la cabecera)
+MAX_FILAS_EXCEL = 1_048_575
+
+# Proporciones por defecto del ruido que trae una exportación real
+PROPORCION_FALTANTES = 0.01    # Respuestas Likert vacías
+PROPORCION_DUPLICADOS = 0.02   # Filas repetidas exactas (reenvíos)
+PROPORCION_ERRATAS = 0.10      # Universidades y carreras escritas con errores
+
+COLUMNA_UNIVERSIDAD = '¿En qué universidad estudias actualmente?'
+COLUMNA_CARRERA = 'Por favor, escribe el nombre de tu carrera o programa de estudios.'
+
+# Variación de las respuestas Likert (en puntos de la escala 0-4): rasgo de la
+# persona, rasgo de la persona en cada grupo de preguntas, efecto de la carrera en
+# cada grupo y ruido de cada respuesta
+DESVIO_PERSONA = 0.6
+DESVIO_GRUPO = 0.4
+DESVIO_CARRERA = 0.25
+DESVIO_RESPUESTA = 0.6
+
+
+class PlantillaEncuesta:
+    """
+    Lo que el generador toma de la exportación real: el orden de las columnas, la
+    escala de cada pregunta Likert (con su respuesta media), los valores posibles
+    de las demás columnas con su frecuencia y el rango de los metadatos de KoBo.
+    """
+
+    def __init__(self, ruta=ARCHIVO_PLANTILLA):
+        df = pd.read_excel(ruta)
+        self.columnas = list(df.columns)
+        self.vacias = [c for c in self.columnas if df[c].isna().all()]
+        self.likert = {}      # columna -> (escala, media del código 0-4)
+        self.valores = {}     # columna -> (valores, probabilidades)
+        for c in self.columnas:
+            if c in self.vacias or c in ('_id', '_uuid', '_submission_time', '_index'):
+                continue
+            respuestas = df[c].dropna().astype(str).str.strip()
+            escala = next((e for e, etiquetas in ESCALAS.items() if respuestas.isin(etiquetas).all()), None)
+            if escala is not None:
+                self.likert[c] = (escala, respuestas.map(ESCALAS[escala].index).mean())
+            else:
+                frecuencias = df[c].dropna().value_counts(normalize=True)
+                self.valores[c] = (frecuencias.index.to_numpy(dtype=object), frecuencias.to_numpy())
+
+        self.primer_id = int(df['_id'].min())
+        self.salto_id = max(1, int((df['_id'].max() - df['_id'].min()) / max(len(df) - 1, 1)))
+        envios = pd.to_datetime(df['_submission_time'])
+        self.primer_envio = envios.min().to_datetime64().astype('datetime64[s]')
+        self.duracion_envios = int((envios.max() - envios.min()).total_seconds())
+
+    def grupo(self, columna):
+        """
+        Grupo de preguntas (COL_GROUPS) de una columna Likert; las que no están en
+        ningún grupo forman uno propio.
+        """
+        corto = RENAME_DICT.get(columna)
+        return next((g for g, cols in COL_GROUPS.items() if corto in cols), columna)
+
+
+def _errata(texto, rng):
+    """
+    Una escritura alterada de `texto` como las que aparecen en las respuestas
+    abiertas: otra capitalización, sin tildes, con una letra de menos o dos letras
+    cambiadas de orden, con espacios de más o con un prefijo.
+    """
+    tipo = rng.integers(7)
+    if tipo == 0:
+        return texto.upper()
+    if tipo == 1:
+        return texto.lower()
+    if tipo == 2:
+        return unidecode(texto)
+    if tipo == 3 and len(texto) > 3:
+        i = rng.integers(1, len(texto))
+        return texto[:i] + texto[i + 1:]
+    if tipo == 4 and len(texto) > 3:
+        i = rng.integers(1, len(texto) - 1)
+        return texto[:i] + texto[i + 1] + texto[i] + texto[i + 2:]
+    if tipo == 5:
+        return texto.replace(' ', '  ', 1) + ' '
+    return 'Carrera de ' + texto if rng.random() < 0.5 else 'Lic. ' + texto
+
+
+def _vocabulario_con_erratas(valores, probabilidades, n_erratas, proporcion, rng):
+    """
+    Valores de una respuesta abierta más `n_erratas` escrituras alteradas de ellos
+    (elegidos según su frecuencia). Devuelve (vocabulario, probabilidades, origen):
+    `origen` es la posición en `valores` de la que sale cada entrada.
+    """
+    origen_erratas = rng.choice(len(valores), size=n_erratas, p=probabilidades)
+    erratas = np.array([_errata(str(valores[i]), rng) for i in origen_erratas], dtype=object)
+    vocabulario = np.concatenate([valores, erratas])
+    origen = np.concatenate([np.arange(len(valores)), origen_erratas])
+    pesos = np.concatenate([probabilidades * (1 - proporcion), np.full(n_erratas, proporcion / max(n_erratas, 1))])
+    return vocabulario, pesos / pesos.sum(), origen
+
+
+def _categorica(vocabulario, indices):
+    """
+    Columna categórica con vocabulario[indices] (el vocabulario puede repetir
+    valores; -1 es una respuesta vacía).
+    """
+    codigos, categorias = pd.factorize(vocabulario)
+    codigos = np.where(indices >= 0, codigos[indices], -1)
+    return pd.Categorical.from_codes(codigos, categories=categorias)
+
+
+def _uuids(rng, n):
+    """
+    n UUID versión 4 aleatorios como texto, sin recorrer las filas en Python.
+    """
+    octetos = np.frombuffer(rng.bytes(16 * n), dtype=np.uint8).reshape(n, 16).copy()
+    octetos[:, 6] = (octetos[:, 6] & 0x0F) | 0x40
+    octetos[:, 8] = (octetos[:, 8] & 0x3F) | 0x80
+    nibbles = np.stack([octetos >> 4, octetos & 0x0F], axis=2).reshape(n, 32)
+    hexadecimal = np.frombuffer(b'0123456789abcdef', dtype=np.uint8)[nibbles]
+    texto = np.insert(hexadecimal, [8, 12, 16, 20], ord('-'), axis=1)
+    return np.ascontiguousarray(texto).view('S36').ravel().astype(str).astype(object)
+
+
+class GeneradorEncuesta:
+    """
+    Genera respuestas sintéticas con la forma de la exportación real de KoBo, por
+    bloques de filas, para probar la limpieza y los análisis con cualquier volumen.
+
+    Cada persona tiene una carrera (con su efecto por grupo de preguntas) y un
+    rasgo general y por grupo que correlaciona sus respuestas Likert, como en los
+    datos reales. Las universidades y carreras se toman de las respuestas reales
+    con una proporción de erratas, y una parte de las filas son duplicados exactos
+    de otras del mismo bloque. El resultado es reproducible para cada `semilla`.
+    """
+
+    def __init__(self, filas, semilla=0, plantilla=None, proporcion_faltantes=PROPORCION_FALTANTES,
+                 proporcion_duplicados=PROPORCION_DUPLICADOS, proporcion_erratas=PROPORCION_ERRATAS):
+        self.filas = filas
+        self.plantilla = plantilla or PlantillaEncuesta()
+        self.proporcion_faltantes = proporcion_faltantes
+        self.proporcion_duplicados = proporcion_duplicados
+        self.rng = np.random.default_rng(semilla)
+
+        # Las erratas crecen con el volumen, como en una encuesta abierta real
+        n_erratas = int(np.clip(filas // 100, 20, 20_000))
+        self.vocabularios = {
+            c: _vocabulario_con_erratas(*self.plantilla.valores[c], n_erratas, proporcion_erratas, self.rng)
+            for c in (COLUMNA_UNIVERSIDAD, COLUMNA_CARRERA)
+        }
+        self.valores = {c: v for c, v in self.plantilla.valores.items() if c not in self.vocabularios}
+
+        # Carrera del catálogo de cada escritura real (solo coincidencia exacta)
+        claves = CatalogoCarreras(ruta_cache=None).claves
+        valores_carrera = self.vocabularios[COLUMNA_CARRERA][0]
+        codigo_base = np.array([claves.get(clave_carrera(v), CODIGO_OTRA) for v in valores_carrera], dtype=np.int64)
+        self.codigo_carrera = codigo_base[self.vocabularios[COLUMNA_CARRERA][2]]
+
+        self.grupos = sorted({self.plantilla.grupo(c) for c in self.plantilla.likert})
+        self.efecto_carrera = self.rng.normal(0, DESVIO_CARRERA, size=(self.codigo_carrera.max() + 1, len(self.grupos)))
+
+        self._generadas = 0
+        self._ultimo_id = self.plantilla.primer_id
+        self._ultimo_envio = 0.0
+
+    def _likert(self, carrera, n):
+        rng = self.rng
+        persona = rng.normal(0, DESVIO_PERSONA, size=n)
+        por_grupo = rng.normal(0, DESVIO_GRUPO, size=(n, len(self.grupos)))
+        columnas = {}
+        for c, (escala, media) in self.plantilla.likert.items():
+            g = self.grupos.index(self.plantilla.grupo(c))
+            puntaje = (media + persona + por_grupo[:, g] + self.efecto_carrera[carrera, g]
+                       + rng.normal(0, DESVIO_RESPUESTA, size=n))
+            codigos = np.clip(np.rint(puntaje), 0, 4).astype(np.int8)
+            codigos[rng.random(n) < self.proporcion_faltantes] = -1
+            columnas[c] = pd.Categorical.from_codes(codigos, categories=ESCALAS[escala])
+        return columnas
+
+    def _metadatos(self, n):
+        rng = self.rng
+        ids = self._ultimo_id + np.cumsum(rng.integers(1, 2 * self.plantilla.salto_id, size=n))
+        self._ultimo_id = int(ids[-1])
+        # Los envíos se reparten a lo largo del mismo período que la exportación real
+        pasos = rng.exponential(self.plantilla.duracion_envios / self.filas, size=n)
+        segundos = self._ultimo_envio + np.cumsum(pasos)
+        self._ultimo_envio = float(segundos[-1])
+        envios = self.plantilla.primer_envio + segundos.astype('timedelta64[s]')
+        return {
+            '_id': ids,
+            '_uuid': _uuids(rng, n),
+            '_submission_time': np.datetime_as_string(envios, unit='s').astype(object),
+            '_index': np.arange(self._generadas + 1, self._generadas + n + 1),
+        }
+
+    def bloque(self, n):
+        """
+        Las siguientes `n` filas, con las columnas en el orden de la plantilla.
+        """
+        rng = self.rng
+        columnas = {}
+        for c, (vocabulario, probabilidades, _) in self.vocabularios.items():
+            indices = rng.choice(len(vocabulario), size=n, p=probabilidades)
+            columnas[c] = _categorica(vocabulario, indices)
+            if c == COLUMNA_CARRERA:
+                carrera = self.codigo_carrera[indices]
+        for c, (valores, probabilidades) in self.valores.items():
+            columnas[c] = _categorica(valores, rng.choice(len(valores), size=n, p=probabilidades))
+        columnas.update(self._likert(carrera, n))
+        columnas.update(self._metadatos(n))
+        for c in self.plantilla.vacias:
+            columnas[c] = np.full(n, np.nan)
+
+        df = pd.DataFrame(columnas, columns=self.plantilla.columnas)
+        df.index = pd.RangeIndex(self._generadas, self._generadas + n)
+        self._generadas += n
+
+        # Reenvíos: algunas filas se reemplazan por una copia exacta de una anterior
+        n_duplicados = int(n * self.proporcion_duplicados)
+        if n_duplicados and n > 1:
+            origen = np.arange(n)
+            posiciones = rng.choice(np.arange(1, n), size=n_duplicados, replace=False)
+            origen[posiciones] = (rng.random(n_duplicados) * posiciones).astype(np.int64)
+            df = df.iloc[origen].set_axis(df.index)
+        return df
+
+    def bloques(self, tamano_bloque=TAMANO_BLOQUE):
+        while self._generadas < self.filas:
+            yield self.bloque(min(tamano_bloque, self.filas - self._generadas))
+
+
+def crear_escritor(destino):
+    """
+    Escritor incremental según la extensión del destino (.xlsx, .csv o .parquet).
+    """
+    extension = os.path.splitext(destino)[1].lower()
+    if extension == '.xlsx':
+        return EscritorExcel(destino)
+    if extension == '.csv':
+        return EscritorCSV(destino)
+    if extension == '.parquet':
+        return EscritorParquet(destino)
+    raise ValueError(f"Formato no soportado: '{destino}' (se admite .xlsx, .csv o .parquet)")
+
+
+def generar_encuesta(filas, destinos, semilla=0, tamano_bloque=TAMANO_BLOQUE, **opciones):
+    """
+    Escribe `filas` respuestas sintéticas en cada uno de `destinos`, bloque a bloque.
+    Las demás opciones se pasan a GeneradorEncuesta.
+    """
+    destinos = [destinos] if isinstance(destinos, str) else list(destinos)
+    if filas > MAX_FILAS_EXCEL and any(d.lower().endswith('.xlsx') for d in destinos):
+        raise ValueError(f"Un XLSX admite como máximo {MAX_FILAS_EXCEL:,} filas; use .csv o .parquet")
+
+    generador = GeneradorEncuesta(filas, semilla=semilla, **opciones)
+    escritores = [crear_escritor(d) for d in destinos]
+    try:
+        for df in generador.bloques(tamano_bloque):
+            for escritor in escritores:
+                escritor.escribir(df)
+    except BaseException:
+        for escritor in escritores:
+            escritor.abortar()
+        raise
+    for escritor in escritores:
+        escritor.cerrar()
+    return filas
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Genera una exportación sintética de la encuesta con la forma de la real.")
+    parser.add_argument('filas', help=f"Número de filas o una escala ({', '.join(ESCALAS_BENCHMARK)}).")
+    parser.add_argument('destinos', nargs='+', help="Archivos de salida (.xlsx, .csv o .parquet).")
+    parser.add_argument('--semilla', type=int, default=0)
+    parser.add_argument('--tamano-bloque', type=int, default=TAMANO_BLOQUE)
+    args = parser.parse_args()
+
+    filas = ESCALAS_BENCHMARK.get(args.filas) or int(args.filas)
+    generar_encuesta(filas, args.destinos, semilla=args.semilla, tamano_bloque=args.tamano_bloque)
+    print(f"{filas:,} filas escritas en: {', '.join(args.destinos)}")
@@ -0,0 +1,102 @@
+import os
+import json
+import inspect
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
+import matplotlib
+matplotlib.use('Agg')  # Sin ventanas: los gráficos solo se guardan como PNG
+import matplotlib.pyplot as plt
+import pandas as pd
+
+# Huella de los datos de entrada de cada PNG generado (para no volver a dibujarlo)
+ARCHIVO_MANIFIESTO = os.path.join('.cache_graficos', 'huellas_graficos.json')
+
+
+def huella_grafico(funcion, datos):
+    """
+    Huella de un gráfico: el código de la función que lo dibuja y sus datos de
+    entrada (DataFrame o Series con los agregados, no la encuesta completa).
+    """
+    h = hashlib.sha1(inspect.getsource(funcion).encode('utf-8'))
+    nombres = list(datos.columns) if isinstance(datos, pd.DataFrame) else [datos.name]
+    h.update(repr(nombres).encode('utf-8'))
+    h.update(pd.util.hash_pandas_object(datos, index=True).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+def _dibujar(destino, funcion, datos):
+    """
+    Dibuja un gráfico y lo guarda de forma atómica (temporal + renombrado).
+    Se ejecuta en un proceso del pool; la figura se cierra siempre.
+    """
+    temporal = f'{destino}.{os.getpid()}.tmp'
+    try:
+        funcion(datos)
+        plt.savefig(temporal, format=os.path.splitext(destino)[1].lstrip('.') or 'png')
+        os.replace(temporal, destino)
+    finally:
+        plt.close('all')
+        if os.path.exists(temporal):
+            os.remove(temporal)
+    return destino
+
+
+def _cargar_manifiesto(ruta):
+    try:
+        with open(ruta, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def _guardar_manifiesto(manifiesto, ruta):
+    os.makedirs(os.path.dirname(ruta) or '.', exist_ok=True)
+    temporal = ruta + '.tmp'
+    with open(temporal, 'w', encoding='utf-8') as f:
+        json.dump(manifiesto, f, ensure_ascii=False, indent=1)
+    os.replace(temporal, ruta)
+
+
+def renderizar_graficos(tareas, ruta_manifiesto=ARCHIVO_MANIFIESTO, procesos=None):
+    """
+    Genera los gráficos de `tareas` [(archivo PNG, función, datos), ...].
+
+    `función(datos)` dibuja sobre la figura actual de pyplot (el guardado y el
+    cierre los hace el motor). Se omiten los gráficos cuyo PNG existe y cuya huella
+    (código + datos) no cambió desde la última vez; los demás se dibujan en
+    paralelo en un pool de procesos. Devuelve (generados, omitidos, errores), con
+    errores = {archivo: excepción}.
+    """
+    manifiesto = _cargar_manifiesto(ruta_manifiesto)
+    pendientes, omitidos = [], []
+    for destino, funcion, datos in tareas:
+        huella = huella_grafico(funcion, datos)
+        if manifiesto.get(destino) == huella and os.path.exists(destino):
+            omitidos.append(destino)
+        else:
+            pendientes.append((destino, funcion, datos, huella))
+
+    generados, errores = [], {}
+    if len(pendientes) == 1:
+        destino, funcion, datos, huella = pendientes[0]
+        try:
+            _dibujar(destino, funcion, datos)
+            manifiesto[destino] = huella
+            generados.append(destino)
+        except Exception as e:
+            errores[destino] = e
+    elif pendientes:
+        with ProcessPoolExecutor(max_workers=min(len(pendientes), procesos or os.cpu_count() or 1)) as pool:
+            futuros = [(pool.submit(_dibujar, destino, funcion, datos), destino, huella)
+                       for destino, funcion, datos, huella in pendientes]
+            for futuro, destino, huella in futuros:
+                try:
+                    futuro.result()
+                    manifiesto[destino] = huella
+                    generados.append(destino)
+                except Exception as e:
+                    errores[destino] = e
+
+    if generados:
+        _guardar_manifiesto(manifiesto, ruta_manifiesto)
+    return generados, omitidos, errores
@@ -1,8 +1,20 @@
 import pandas as pd
-import re
+import numpy as np
+import os
+import json
+import hashlib
+import itertools
 import logging
-from unidecode import unidecode
 import sys
+from esquema_encuesta import RENAME_DICT, ESCALA_POR_COLUMNA, TIPOS_LIKERT
+from coincidencia_difusa import ResolutorDifuso, normalizar_texto
+from escritores import EscritorCSV, EscritorExcel, EscritorParquet, EscritorFeather, EscritorEnProceso, GrupoEscritores
+from deduplicacion import AlmacenHuellas, huellas_filas, VERSION_HUELLAS
+from cubo_indicadores import CuboIndicadores, firma_catalogo_cubo
+from carreras import catalogo_carreras, NOMBRE_OTRA
+import metricas
+from openpyxl import load_workbook
+import argparse
 
 # --- Configuración del Script ---
 
@@ -10,8 +22,37 @@ import sys
 ARCHIVO_ENTRADA = 'ENCUESTA_DE_PERCEPCIÓN_EN_EL_USO__DE_LA_INTELIGENCIA_ARTIFICIAL_Y_LA_EMPLEABILIDAD_-_all_versions_-_labels_-_2025-10-30-15-38-54.xlsx'
 ARCHIVO_SALIDA_EXCEL = 'encuesta_limpia_ESPOCH.xlsx' # <<< Nombre de salida actualizado
 ARCHIVO_SALIDA_CSV = 'encuesta_limpia_ESPOCH.csv'     # <<< Nombre de salida actualizado
+ARCHIVO_SALIDA_PARQUET = 'encuesta_limpia_ESPOCH.parquet'  # Salida columnar (la que leen los análisis y app.py)
+ARCHIVO_SALIDA_FEATHER = 'encuesta_limpia_ESPOCH.feather'
+ARCHIVO_SALIDA_CUBO = 'cubo_indicadores_ESPOCH.parquet'  # Conteos/sumas por carrera, semestre, género y edad
 ARCHIVO_REPORTE = 'reporte_limpieza_ESPOCH.log'   # <<< Nombre de salida actualizado
 
+# Formatos de salida (--formatos): nombre -> (etiqueta para el reporte, archivo).
+# Los análisis y app.py leen el Parquet, así que conviene generarlo siempre
+FORMATOS_SALIDA = {
+    'xlsx': ('Excel', ARCHIVO_SALIDA_EXCEL),
+    'csv': ('CSV', ARCHIVO_SALIDA_CSV),
+    'parquet': ('Parquet', ARCHIVO_SALIDA_PARQUET),
+    'feather': ('Feather', ARCHIVO_SALIDA_FEATHER),
+}
+FORMATOS_POR_DEFECTO = ['xlsx', 'csv', 'parquet']
+
+# Carpeta para el estado persistente entre ejecuciones (memos, cachés)
+CARPETA_CACHE = '.cache_limpieza'
+ARCHIVO_MEMO_NORMALIZACION = os.path.join(CARPETA_CACHE, 'memo_normalizacion.json')
+ARCHIVO_RESOLUCIONES_DIFUSAS = os.path.join(CARPETA_CACHE, 'resoluciones_difusas.json')
+ARCHIVO_ESTADO_INCREMENTAL = os.path.join(CARPETA_CACHE, 'estado_incremental.json')
+ARCHIVO_HUELLAS = os.path.join(CARPETA_CACHE, 'huellas_filas.npy')
+
+# Columnas que identifican una respuesta repetida (huella de 64 bits por fila).
+# None = todas las columnas, como el drop_duplicates original; p. ej. ['_uuid'] para
+# detectar el mismo envío aunque KoBo lo exporte con otro _id
+COLUMNAS_CLAVE_DUPLICADOS = None
+
+# Columnas de KoBo que sirven de marca de agua para el modo incremental (--incremental),
+# en orden de preferencia: _id crece con cada envío; _submission_time es la alternativa
+COLUMNAS_MARCA_DE_AGUA = ['_id', '_submission_time']
+
 # ¡Importante! Columna a limpiar (basado en el snippet de tu archivo)
 COLUMNA_OBJETIVO = '¿En qué universidad estudias actualmente?'
 
@@ -30,15 +71,28 @@ ESPOCH_VARIANTS = {
     # Agrega 'escuela superior politecnica de chimborazo' por si acaso, aunque ya está cubierta
 }
 
+# Similitud mínima (Dice sobre trigramas de caracteres, 0-1) para aceptar como ESPOCH
+# una escritura que no está en ESPOCH_VARIANTS (ej. 'escuela superior politecnica de chomborazo')
+UMBRAL_SIMILITUD = 0.8
+
+# Filas por bloque en el modo streaming (--streaming): acota la memoria usada
+TAMANO_BLOQUE = 50000
+
+# Ejemplos de normalización que se muestran en el reporte
+MAX_EJEMPLOS_REPORTE = 10
+
 # --- Configuración del Logger (Reporte) ---
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler(ARCHIVO_REPORTE, mode='w'), # Escribe el log a un archivo
-        logging.StreamHandler(sys.stdout)          # Muestra el log en la consola
-    ]
-)
+# Se configura al ejecutar la limpieza y no al importar el módulo, para que
+# importar sus constantes (p. ej. desde pipeline.py) no cree el reporte
+def configurar_reporte():
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler(ARCHIVO_REPORTE, mode='w'), # Escribe el log a un archivo
+            logging.StreamHandler(sys.stdout)          # Muestra el log en la consola
+        ]
+    )
 
 def limpiar_y_normalizar_espoch(valor_original):
     """
@@ -48,13 +102,8 @@ def limpiar_y_normalizar_espoch(valor_original):
     #if pd.isna(valor_original) or not str(valor_original).strip():
         #return None  # Representa un valor nulo estandarizado
 
-    texto = str(valor_original)
-
     # 2. Estandarización de texto
-    texto_limpio = unidecode(texto)  # Quitar tildes (ej. Politécnica -> Politecnica)
-    texto_limpio = texto_limpio.lower()  # Convertir a minúsculas
-    texto_limpio = re.sub(r'[^\w\s]', '', texto_limpio)  # Quitar puntuación y caracteres especiales
-    texto_limpio = re.sub(r'\s+', ' ', texto_limpio).strip()  # Quitar espacios extra
+    texto_limpio = normalizar_texto(valor_original)
 
     # 3. Normalización (Mapeo)
     if texto_limpio in ESPOCH_VARIANTS:
@@ -63,17 +112,296 @@ def limpiar_y_normalizar_espoch(valor_original):
         # Si no es una variante de ESPOCH, devolvemos el valor original
         return valor_original
 
-def main():
+def cargar_memo(ruta):
+    """
+    Carga un memo JSON persistente; si no existe o está dañado, empieza vacío.
+    """
+    try:
+        with open(ruta, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+def guardar_memo(memo, ruta):
+    """
+    Guarda el memo de forma atómica (archivo temporal + renombrado).
+    """
+    os.makedirs(os.path.dirname(ruta), exist_ok=True)
+    temporal = ruta + '.tmp'
+    with open(temporal, 'w', encoding='utf-8') as f:
+        json.dump(memo, f, ensure_ascii=False)
+    os.replace(temporal, ruta)
+
+def firma_limpieza(columnas, claves_duplicados=COLUMNAS_CLAVE_DUPLICADOS):
+    """
+    Huella de lo que determina el contenido de las salidas: las columnas de la
+    exportación, las columnas clave de duplicados, la versión de las huellas y la
+    configuración de la normalización (ESPOCH_VARIANTS, umbral...). Si cambia, las salidas existentes
+    (y las huellas guardadas) ya no sirven y hay que reconstruirlas.
+    """
+    contenido = json.dumps(
+        [[str(c) for c in columnas], claves_duplicados, COLUMNA_OBJETIVO, VALOR_NORMALIZADO,
+         sorted(ESPOCH_VARIANTS), UMBRAL_SIMILITUD, VERSION_HUELLAS],
+        ensure_ascii=False,
+    )
+    return hashlib.sha1(contenido.encode('utf-8')).hexdigest()
+
+def columna_marca_de_agua(columnas):
+    return next((c for c in COLUMNAS_MARCA_DE_AGUA if c in columnas), None)
+
+def valor_marca(valor):
+    """
+    Convierte la marca de agua (escalar de numpy/pandas) a un valor que se pueda
+    guardar en JSON y volver a comparar con la columna.
+    """
+    if hasattr(valor, 'isoformat'):
+        return valor.isoformat()
+    if hasattr(valor, 'item'):
+        return valor.item()
+    return valor
+
+def cargar_estado_incremental(columnas, claves_duplicados=COLUMNAS_CLAVE_DUPLICADOS, formatos=FORMATOS_POR_DEFECTO):
+    """
+    Devuelve (estado, None) si la ejecución puede continuar desde la anterior, o
+    (None, motivo) si hay que reconstruir todas las salidas.
+    """
+    estado = cargar_memo(ARCHIVO_ESTADO_INCREMENTAL)
+    if not estado:
+        return None, "no hay estado de una ejecución anterior"
+    if estado.get('firma') != firma_limpieza(columnas, claves_duplicados):
+        return None, "cambiaron las columnas de la exportación, las claves de duplicados o ESPOCH_VARIANTS"
+    if estado.get('columna_marca') != columna_marca_de_agua(columnas):
+        return None, "la exportación no tiene la columna de marca de agua"
+    for formato in formatos:
+        if formato not in estado.get('formatos', []):
+            return None, f"la ejecución anterior no generó el formato '{formato}'"
+    for ruta in [FORMATOS_SALIDA[formato][1] for formato in formatos] + [ARCHIVO_SALIDA_CUBO, ARCHIVO_HUELLAS]:
+        if not os.path.exists(ruta):
+            return None, f"falta el archivo '{ruta}'"
+    if firma_catalogo_cubo(ARCHIVO_SALIDA_CUBO) != catalogo_carreras().firma:
+        return None, "cambió el catálogo de carreras con el que se codificó el cubo"
+    return estado, None
+
+class NormalizadorEspoch:
+    """
+    Versión vectorizada de `columna.apply(limpiar_y_normalizar_espoch)` que además
+    acepta escrituras parecidas a ESPOCH_VARIANTS (con errores de tipeo).
+
+    La columna se factoriza y cada valor distinto se limpia una sola vez; el texto
+    limpio se guarda en un memo en disco para las siguientes ejecuciones. Los textos
+    que no son una variante exacta se resuelven con un índice de trigramas
+    (ver coincidencia_difusa.py). El resultado se reconstruye con los códigos, así
+    que el costo depende del número de escrituras distintas y no del de respuestas.
+    El mismo objeto se reutiliza para todos los bloques de una ejecución.
+    """
+
+    def __init__(self, ruta_memo=ARCHIVO_MEMO_NORMALIZACION, ruta_resoluciones=ARCHIVO_RESOLUCIONES_DIFUSAS):
+        self.ruta_memo = ruta_memo
+        self.memo = cargar_memo(ruta_memo)
+        self.nuevos = 0
+        self.resolutor = ResolutorDifuso(
+            {variante: VALOR_NORMALIZADO for variante in ESPOCH_VARIANTS},
+            umbral=UMBRAL_SIMILITUD,
+            ruta_cache=ruta_resoluciones,
+        )
+
+    def normalizar(self, columna):
+        codigos, unicos = pd.factorize(columna, use_na_sentinel=True)
+
+        resultados = []
+        for valor in unicos:
+            clave = str(valor)
+            texto_limpio = self.memo.get(clave)
+            if texto_limpio is None:
+                texto_limpio = normalizar_texto(valor)
+                self.memo[clave] = texto_limpio
+                self.nuevos += 1
+            if texto_limpio in ESPOCH_VARIANTS or self.resolutor.resolver(texto_limpio) == VALOR_NORMALIZADO:
+                resultados.append(VALOR_NORMALIZADO)
+            else:
+                resultados.append(valor)
+
+        # El centinela -1 de los códigos (nulos) apunta al último elemento: NaN
+        valores = np.array(resultados + [np.nan], dtype=object)[codigos]
+        return pd.Series(valores, index=columna.index, name=columna.name)
+
+    def guardar_y_reportar(self):
+        if self.nuevos:
+            guardar_memo(self.memo, self.ruta_memo)
+        self.resolutor.guardar()
+        logging.info(f"Normalización: {len(self.memo)} escrituras distintas en el memo ({self.nuevos} nuevas en esta ejecución).")
+
+        if self.resolutor.nuevas_coincidencias:
+            logging.info(f"Coincidencias aproximadas nuevas con '{VALOR_NORMALIZADO}' (revisar; si son correctas, agregarlas a ESPOCH_VARIANTS):")
+            for texto, variante, canonico, similitud in self.resolutor.nuevas_coincidencias:
+                logging.info(f"  '{texto}' ~ '{variante}' -> {canonico} (similitud {similitud:.2f})")
+
+def leer_excel_por_bloques(ruta, tamano_bloque=TAMANO_BLOQUE):
+    """
+    Lee el XLSX bloque a bloque con el iterador de solo lectura de openpyxl.
+    Cada bloque es un DataFrame con índice global (posición de la fila en el archivo),
+    así que la memoria usada depende del tamaño del bloque y no del archivo.
+    """
+    libro = load_workbook(ruta, read_only=True, data_only=True)
+    try:
+        filas = libro.worksheets[0].iter_rows(values_only=True)
+        encabezado = next(filas, None)
+        if encabezado is None:
+            return
+        columnas = [c if c is not None else f'Unnamed: {i}' for i, c in enumerate(encabezado)]
+        n_columnas = len(columnas)
+
+        inicio = 0
+        bloque = []
+        for fila in filas:
+            if all(v is None for v in fila):
+                continue  # Filas vacías (solo formato) que openpyxl también recorre
+            fila = tuple(fila[:n_columnas]) + (None,) * (n_columnas - len(fila))
+            bloque.append(fila)
+            if len(bloque) >= tamano_bloque:
+                yield _bloque_a_dataframe(bloque, columnas, inicio)
+                inicio += len(bloque)
+                bloque = []
+        if bloque:
+            yield _bloque_a_dataframe(bloque, columnas, inicio)
+    finally:
+        libro.close()
+
+def _bloque_a_dataframe(filas, columnas, inicio):
+    df = pd.DataFrame.from_records(filas, columns=columnas)
+    df.index = pd.RangeIndex(inicio, inicio + len(df))
+    # Igual que pd.read_excel: columnas numéricas/fechas con su tipo, el resto como texto
+    return df.infer_objects()
+
+def a_formato_columnar(df, max_proporcion_unicos=0.5):
+    """
+    Prepara el DataFrame para guardarlo en Parquet.
+    Las columnas de texto con pocos valores distintos (respuestas Likert, carrera,
+    semestre, género...) se convierten a categóricas, que Parquet guarda con
+    codificación de diccionario e índices enteros pequeños. Las preguntas Likert
+    usan el tipo ordenado de su escala (esquema_encuesta.py) si todas sus
+    respuestas pertenecen a ella, para no perder valores.
+    """
+    df_columnar = df.copy()
+    for col in df_columnar.columns:
+        serie = df_columnar[col]
+        if pd.api.types.is_numeric_dtype(serie) or pd.api.types.is_datetime64_any_dtype(serie):
+            continue
+        escala = ESCALA_POR_COLUMNA.get(RENAME_DICT.get(col))
+        if escala is not None and serie.dropna().isin(TIPOS_LIKERT[escala].categories).all():
+            df_columnar[col] = serie.astype(TIPOS_LIKERT[escala])
+        elif serie.nunique(dropna=True) <= max(1, max_proporcion_unicos * len(serie)):
+            df_columnar[col] = serie.astype('category')
+        else:
+            df_columnar[col] = serie.astype('string')
+    return df_columnar
+
+def crear_escritor(formato, anexar=False):
+    """
+    Escritor incremental del archivo de salida de `formato` (ver FORMATOS_SALIDA).
+    """
+    ruta = FORMATOS_SALIDA[formato][1]
+    if formato == 'xlsx':
+        # El más lento: escribe en otro proceso, al mismo tiempo que los demás
+        return EscritorEnProceso(EscritorExcel, ruta, anexar=anexar)
+    if formato == 'csv':
+        return EscritorCSV(ruta, anexar=anexar)
+    if formato == 'parquet':
+        return EscritorParquet(ruta, preparar=a_formato_columnar, anexar=anexar)
+    if formato == 'feather':
+        return EscritorFeather(ruta, preparar=a_formato_columnar, anexar=anexar)
+    raise ValueError(f"Formato de salida desconocido: {formato}")
+
+def procesar_bloque(df, normalizador, estado, almacen, claves_duplicados=COLUMNAS_CLAVE_DUPLICADOS):
+    """
+    Deduplica, normaliza y filtra un bloque de respuestas.
+    Actualiza los contadores y ejemplos del reporte en `estado` y devuelve las filas
+    de ESPOCH listas para guardar (sin la columna auxiliar).
+    """
+    estado['leidos'] += len(df)
+
+    # --- 2. Manejo de Duplicados ---
+    # Huella de 64 bits por fila sobre las columnas clave, comparada con las de los
+    # bloques anteriores y las de ejecuciones anteriores (almacén en disco)
+    with metricas.tramo('deduplicacion', filas=len(df)):
+        repetida = almacen.registrar(huellas_filas(df, claves_duplicados))
+        estado['duplicados'] += int(repetida.sum())
+        df = df[~repetida]
+
+    # --- 3. Limpieza y Normalización ---
+    columna_original = df[COLUMNA_OBJETIVO]
+    estado['nulos_antes'] += int(columna_original.isna().sum())
+    with metricas.tramo('normalizacion', filas=len(df)):
+        columna_limpia = normalizador.normalizar(columna_original)
+    estado['nulos_despues'] += int(columna_limpia.isna().sum())
+
+    # <<< --- FILTRADO --- >>>
+    # Nos quedamos solo con las filas que SÍ fueron mapeadas a VALOR_NORMALIZADO
+    # y se les asigna el valor normalizado en la columna original
+    with metricas.tramo('filtrado', filas=len(df)):
+        conservar = (columna_limpia == VALOR_NORMALIZADO).to_numpy()
+        df_filtrado = df[conservar].copy()
+        df_filtrado[COLUMNA_OBJETIVO] = VALOR_NORMALIZADO
+    estado['antes_filtrado'] += len(df)
+    estado['conservados'] += int(conservar.sum())
+
+    # --- 4. Datos para el Reporte de Cambios ---
+    # Filas conservadas cuyo texto original no decía ya 'ESPOCH' (ej. "Esc. Sup." -> "ESPOCH")
+    cambiaron = conservar & (columna_original != VALOR_NORMALIZADO).to_numpy()
+    estado['cambios'] += int(cambiaron.sum())
+    if len(estado['ejemplos']) < MAX_EJEMPLOS_REPORTE:
+        for indice, valor in columna_original[cambiaron].items():
+            if valor not in estado['ejemplos_vistos']:
+                estado['ejemplos_vistos'].add(valor)
+                estado['ejemplos'].append((indice, valor, VALOR_NORMALIZADO))
+                if len(estado['ejemplos']) >= MAX_EJEMPLOS_REPORTE:
+                    break
+
+    return df_filtrado
+
+@metricas.medido('limpiar_datos')
+def main(streaming=False, tamano_bloque=TAMANO_BLOQUE, incremental=False,
+         claves_duplicados=COLUMNAS_CLAVE_DUPLICADOS, formatos=FORMATOS_POR_DEFECTO):
     """
     Función principal para ejecutar el proceso de limpieza.
+
+    Con `streaming=True` el archivo se lee por bloques de `tamano_bloque` filas
+    (openpyxl en modo solo lectura) y cada bloque se deduplica, normaliza, filtra y
+    escribe antes de leer el siguiente, así que la memoria se mantiene acotada
+    aunque la exportación crezca. Sin streaming se lee todo el archivo de una vez
+    y se procesa como un único bloque.
+
+    Cada ejecución guarda en CARPETA_CACHE la marca de agua (mayor `_id` leído) y las
+    huellas de las filas vistas. Con `incremental=True` solo se limpian las respuestas
+    posteriores a esa marca y se agregan a las salidas existentes; si cambiaron las
+    columnas de la exportación o ESPOCH_VARIANTS (o falta algún archivo) se
+    reconstruye todo como en una ejecución normal.
+
+    Los duplicados se detectan por la huella de `claves_duplicados` (todas las
+    columnas si es None), también contra las filas de ejecuciones anteriores.
+
+    El tiempo, la CPU, la memoria y las filas de cada etapa (lectura, deduplicación,
+    normalización, filtrado, escritura y cubo) se agregan a metricas.ARCHIVO_METRICAS.
     """
+    configurar_reporte()
     logging.info("--- Iniciando Proceso de Limpieza, Normalización y FILTRADO ---")
+    metricas.anotar(modo='streaming' if streaming else 'completo', incremental=incremental, formatos=list(formatos))
 
     # --- 1. Cargar Datos ---
     try:
-        df = pd.read_excel(ARCHIVO_ENTRADA)
-        logging.info(f"Archivo '{ARCHIVO_ENTRADA}' cargado exitosamente.")
-        logging.info(f"Total de registros leídos: {len(df)}")
+        if streaming:
+            bloques = metricas.iterar('lectura', leer_excel_por_bloques(ARCHIVO_ENTRADA, tamano_bloque))
+            primer_bloque = next(bloques, None)
+            if primer_bloque is None:
+                logging.error(f"Error: El archivo '{ARCHIVO_ENTRADA}' no tiene datos.")
+                return
+            logging.info(f"Archivo '{ARCHIVO_ENTRADA}' abierto en modo streaming (bloques de {tamano_bloque} filas).")
+        else:
+            with metricas.tramo('lectura') as medida:
+                primer_bloque = pd.read_excel(ARCHIVO_ENTRADA)
+                medida.filas = len(primer_bloque)
+            bloques = iter(())
+            logging.info(f"Archivo '{ARCHIVO_ENTRADA}' cargado exitosamente.")
     except FileNotFoundError:
         logging.error(f"Error: El archivo '{ARCHIVO_ENTRADA}' no fue encontrado.")
         return
@@ -81,97 +409,138 @@ def main():
         logging.error(f"Error al leer el archivo Excel: {e}")
         return
 
-    if COLUMNA_OBJETIVO not in df.columns:
+    if COLUMNA_OBJETIVO not in primer_bloque.columns:
         logging.error(f"Error: La columna '{COLUMNA_OBJETIVO}' no se encuentra en el archivo.")
-        logging.info(f"Columnas disponibles: {list(df.columns)}")
+        logging.info(f"Columnas disponibles: {list(primer_bloque.columns)}")
+        return
+    faltantes = [c for c in claves_duplicados or [] if c not in primer_bloque.columns]
+    if faltantes:
+        logging.error(f"Error: Las columnas clave de duplicados {faltantes} no se encuentran en el archivo.")
         return
 
-    # Guardar una copia para el reporte de cambios
-    df_original = df.copy()
-
-    # --- 2. Manejo de Duplicados ---
-    registros_antes_duplicados = len(df)
-    df.drop_duplicates(inplace=True)
-    registros_despues_duplicados = len(df)
-    duplicados_eliminados = registros_antes_duplicados - registros_despues_duplicados
-    logging.info(f"Se eliminaron {duplicados_eliminados} registros duplicados.")
+    # --- Modo incremental: continuar desde la marca de agua de la ejecución anterior ---
+    firma = firma_limpieza(primer_bloque.columns, claves_duplicados)
+    columna_marca = columna_marca_de_agua(primer_bloque.columns)
+    anterior = None
+    if incremental:
+        anterior, motivo = cargar_estado_incremental(primer_bloque.columns, claves_duplicados, formatos)
+        if anterior is None:
+            logging.info(f"Modo incremental: se reconstruyen todas las salidas ({motivo}).")
+        else:
+            logging.info(f"Modo incremental: se procesan solo las respuestas con {columna_marca} > {anterior['marca']}.")
+    marca = anterior['marca'] if anterior else None
 
-    # --- 3. Limpieza y Normalización ---
     logging.info(f"Iniciando limpieza de la columna '{COLUMNA_OBJETIVO}'...")
-    columna_original = df[COLUMNA_OBJETIVO]
-    nulos_antes = columna_original.isna().sum()
-
-    # Aplicar la función de limpieza
-    df['columna_limpia_espoch'] = columna_original.apply(limpiar_y_normalizar_espoch)
-
-    nulos_despues = df['columna_limpia_espoch'].isna().sum()
-    logging.info(f"Valores nulos/vacíos antes: {nulos_antes}")
-    logging.info(f"Valores nulos/vacíos después (estandarizados): {nulos_despues}")
-
-    # <<< --- INICIO: SECCIÓN DE FILTRADO --- >>>
-    registros_antes_filtrado = len(df)
-    logging.info(f"Total de registros antes del filtrado (después de duplicados): {registros_antes_filtrado}")
-    
-    # Filtramos para quedarnos solo con las filas que SÍ fueron mapeadas a VALOR_NORMALIZADO
-    # Usamos .copy() para evitar SettingWithCopyWarning
-    df_filtrado = df[df['columna_limpia_espoch'] == VALOR_NORMALIZADO].copy() 
-    
-    registros_despues_filtrado = len(df_filtrado)
-    registros_descartados = registros_antes_filtrado - registros_despues_filtrado
-    
-    # Asignar el valor normalizado a la columna original en el DataFrame filtrado
-    # Esto asegura que todos los registros conservados tengan 'ESPOCH' en la columna original
-    df_filtrado[COLUMNA_OBJETIVO] = VALOR_NORMALIZADO
-
-    logging.info(f"Se han filtrado los datos. Se conservan {registros_despues_filtrado} registros de '{VALOR_NORMALIZADO}'.")
-    logging.info(f"Se descartaron {registros_descartados} registros (de otras universidades o nulos).")
-    # <<< --- FIN: SECCIÓN DE FILTRADO --- >>>
+    normalizador = NormalizadorEspoch()
+    catalogo = catalogo_carreras()
+    estado = {
+        'leidos': 0, 'omitidos': 0, 'duplicados': 0, 'nulos_antes': 0, 'nulos_despues': 0,
+        'antes_filtrado': 0, 'conservados': 0, 'cambios': 0,
+        'ejemplos': [], 'ejemplos_vistos': set(),
+    }
+    # En una reconstrucción completa el almacén empieza vacío y se reemplaza al final
+    almacen = AlmacenHuellas(ARCHIVO_HUELLAS, cargar=anterior is not None)
+    cubo = CuboIndicadores.cargar(ARCHIVO_SALIDA_CUBO) if anterior else None
+
+    # --- 5. Guardar Resultados (a medida que se procesan los bloques) ---
+    escritores = GrupoEscritores(crear_escritor(formato, anexar=anterior is not None) for formato in formatos)
+    try:
+        for bloque in itertools.chain([primer_bloque], bloques):
+            if columna_marca is not None:
+                if anterior is not None:
+                    # Las filas sin marca (nulas) se procesan siempre; si ya se habían
+                    # visto, las descarta la deduplicación por huellas
+                    nuevas = ~(bloque[columna_marca] <= anterior['marca']).to_numpy()
+                    estado['omitidos'] += int((~nuevas).sum())
+                    bloque = bloque[nuevas]
+                maximo = bloque[columna_marca].max()
+                if pd.notna(maximo):
+                    marca = valor_marca(maximo) if marca is None else max(marca, valor_marca(maximo))
+            df_filtrado = procesar_bloque(bloque, normalizador, estado, almacen, claves_duplicados)
+            del bloque
+            # <<< Guardar el DataFrame FILTRADO >>>
+            with metricas.tramo('escritura', filas=len(df_filtrado)):
+                escritores.escribir(df_filtrado)
+            with metricas.tramo('cubo', filas=len(df_filtrado)):
+                cubo_bloque = CuboIndicadores.desde_encuesta(df_filtrado, catalogo)
+                cubo = cubo_bloque if cubo is None else cubo.combinar(cubo_bloque)
+        with metricas.tramo('escritura'):
+            escritores.cerrar()
+        # Después de cerrar: el cubo anota el tamaño y la fecha del Parquet ya renombrado
+        with metricas.tramo('cubo'):
+            cubo.guardar(ARCHIVO_SALIDA_CUBO, origen=ARCHIVO_SALIDA_PARQUET if 'parquet' in formatos else None, catalogo=catalogo)
+    except Exception as e:
+        escritores.abortar()
+        logging.error(f"Error al procesar o guardar los archivos de salida: {e}")
+        return
 
+    normalizador.guardar_y_reportar()
+
+    # El estado se guarda solo después de reemplazar las salidas
+    registros_totales = (anterior['registros'] if anterior else 0) + estado['conservados']
+    if columna_marca is not None:
+        almacen.guardar()
+        guardar_memo(
+            {'firma': firma, 'columna_marca': columna_marca, 'marca': marca, 'registros': registros_totales,
+             'formatos': list(formatos)},
+            ARCHIVO_ESTADO_INCREMENTAL,
+        )
+    if anterior is not None:
+        logging.info(f"Se omitieron {estado['omitidos']} registros ya procesados en ejecuciones anteriores.")
+
+    logging.info(f"Total de registros leídos: {estado['leidos']}")
+    logging.info(f"Se eliminaron {estado['duplicados']} registros duplicados.")
+    descripcion_claves = 'todas las columnas' if claves_duplicados is None else ', '.join(claves_duplicados)
+    logging.info(f"Duplicados detectados por huella de fila ({descripcion_claves}); {len(almacen)} huellas en el almacén.")
+    logging.info(f"Valores nulos/vacíos antes: {estado['nulos_antes']}")
+    logging.info(f"Valores nulos/vacíos después (estandarizados): {estado['nulos_despues']}")
+    logging.info(f"Total de registros antes del filtrado (después de duplicados): {estado['antes_filtrado']}")
+    registros_descartados = estado['antes_filtrado'] - estado['conservados']
+    logging.info(f"Se han filtrado los datos. Se conservan {estado['conservados']} registros de '{VALOR_NORMALIZADO}'.")
+    logging.info(f"Se descartaron {registros_descartados} registros (de otras universidades o nulos).")
 
-    # --- 4. Generación de Reporte de Cambios ---
+    # --- 6. Generación de Reporte de Cambios ---
     logging.info("--- Reporte de Cambios (Muestreo de filas CONSERVADAS) ---")
+    logging.info(f"Total de registros conservados de '{VALOR_NORMALIZADO}': {estado['conservados']}")
+    logging.info(f"Total de registros que necesitaron normalización (ej. 'Esc. Sup.' -> 'ESPOCH'): {estado['cambios']}")
 
-    # <<< Lógica de reporte actualizada para reflejar el filtrado >>>
-    # Comparamos la columna original (usando el índice de df_filtrado) con la limpia
-    indices_conservados = df_filtrado.index
-    df_cambios = df_original.loc[indices_conservados].copy() # Tomamos los originales de las filas conservadas
-    df_cambios['columna_limpia_espoch'] = df_filtrado['columna_limpia_espoch'] # Añadimos la columna limpia
-    
-    # Filtramos para mostrar solo los que realmente cambiaron (ej. "Esc. Sup." -> "ESPOCH")
-    df_cambios_reales = df_cambios[df_cambios[COLUMNA_OBJETIVO] != df_cambios['columna_limpia_espoch']]
-    
-    mapeados_a_espoch = len(df_filtrado)
-    total_cambios_visibles = len(df_cambios_reales)
-
-    logging.info(f"Total de registros conservados de '{VALOR_NORMALIZADO}': {mapeados_a_espoch}")
-    logging.info(f"Total de registros que necesitaron normalización (ej. 'Esc. Sup.' -> 'ESPOCH'): {total_cambios_visibles}")
-
-    if total_cambios_visibles > 0:
+    if estado['ejemplos']:
         logging.info("Ejemplos de normalización (Antes -> Después):")
-        ejemplos_str = df_cambios_reales[[COLUMNA_OBJETIVO, 'columna_limpia_espoch']].drop_duplicates().head(10).to_string()
-        for linea in ejemplos_str.split('\n'):
+        indices, antes, despues = zip(*estado['ejemplos'])
+        df_ejemplos = pd.DataFrame({COLUMNA_OBJETIVO: antes, 'columna_limpia_espoch': despues}, index=indices)
+        for linea in df_ejemplos.to_string().split('\n'):
             logging.info(f"  {linea}")
     else:
         logging.info("No se detectaron cambios de normalización en los datos conservados (todos ya decían 'ESPOCH').")
 
+    if anterior is not None:
+        logging.info(f"Se agregaron {estado['conservados']} registros nuevos; las salidas tienen ahora {registros_totales} registros.")
 
-    # --- 5. Guardar Resultados ---
-    # Eliminar la columna auxiliar antes de guardar para que no aparezca en el archivo final
-    df_filtrado.drop(columns=['columna_limpia_espoch'], inplace=True)
-
-    try:
-        # <<< Guardar el DataFrame FILTRADO >>>
-        df_filtrado.to_excel(ARCHIVO_SALIDA_EXCEL, index=False, engine='openpyxl')
-        df_filtrado.to_csv(ARCHIVO_SALIDA_CSV, index=False, encoding='utf-8-sig')
-
-        logging.info(f"Archivo Excel (SOLO ESPOCH) guardado en: '{ARCHIVO_SALIDA_EXCEL}'")
-        logging.info(f"Archivo CSV (SOLO ESPOCH) guardado en: '{ARCHIVO_SALIDA_CSV}'")
-        logging.info(f"Reporte de limpieza guardado en: '{ARCHIVO_REPORTE}'")
-
-    except Exception as e:
-        logging.error(f"Error al guardar los archivos de salida: {e}")
+    for formato in formatos:
+        etiqueta, ruta = FORMATOS_SALIDA[formato]
+        metricas.agregar(f'escritura_{formato}', escritores.tiempos[ruta], filas=estado['conservados'])
+        logging.info(f"Archivo {etiqueta} (SOLO ESPOCH) guardado en: '{ruta}' (escritura: {escritores.tiempos[ruta]:.2f} s)")
+    logging.info(f"Cubo de indicadores guardado en: '{ARCHIVO_SALIDA_CUBO}' ({len(cubo.base)} celdas en el nivel más fino)")
+    if catalogo.sin_catalogo:
+        logging.info(f"Carreras sin equivalente en el catálogo (agrupadas como '{NOMBRE_OTRA}'; agregarlas a catalogo_carreras.json si corresponde):")
+        for texto in sorted(catalogo.sin_catalogo):
+            logging.info(f"  '{texto}'")
+    logging.info(f"Reporte de limpieza guardado en: '{ARCHIVO_REPORTE}'")
 
     logging.info("--- Proceso de Limpieza y Filtrado Finalizado ---")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Limpieza, normalización y filtrado de la encuesta (solo ESPOCH).")
+    parser.add_argument('--streaming', action='store_true',
+                        help="Lee y procesa el XLSX por bloques para mantener acotada la memoria.")
+    parser.add_argument('--tamano-bloque', type=int, default=TAMANO_BLOQUE,
+                        help=f"Filas por bloque en modo streaming (por defecto {TAMANO_BLOQUE}).")
+    parser.add_argument('--incremental', action='store_true',
+                        help="Procesa solo las respuestas nuevas desde la última ejecución y las agrega a las salidas.")
+    parser.add_argument('--claves-duplicados', nargs='+', default=COLUMNAS_CLAVE_DUPLICADOS, metavar='COLUMNA',
+                        help="Columnas que identifican una respuesta repetida (por defecto, todas).")
+    parser.add_argument('--formatos', nargs='+', choices=list(FORMATOS_SALIDA), default=FORMATOS_POR_DEFECTO,
+                        help=f"Formatos de salida a generar (por defecto: {' '.join(FORMATOS_POR_DEFECTO)}).")
+    args = parser.parse_args()
+    main(streaming=args.streaming, tamano_bloque=args.tamano_bloque, incremental=args.incremental,
+         claves_duplicados=args.claves_duplicados, formatos=list(dict.fromkeys(args.formatos)))
@@ -0,0 +1,204 @@
+import os
+import sys
+import json
+import time
+import functools
+import contextvars
+from contextlib import contextmanager
+
+try:
+    import resource  # Solo en sistemas Unix
+except ImportError:
+    resource = None
+
+# Métricas de las ejecuciones (una línea JSON por etapa y ejecución); app.py las
+# muestra en la pestaña de métricas. Está junto al código, como las salidas de los
+# scripts, para que todas las ejecuciones queden en el mismo archivo
+ARCHIVO_METRICAS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'metricas_pipeline.jsonl')
+
+# Al superar este tamaño el archivo pasa a '<archivo>.1' (reemplazando la copia
+# anterior) y se empieza uno nuevo, así nunca ocupa más del doble
+MAX_BYTES_METRICAS = 5 * 1024 * 1024
+
+
+def rss_max_mb():
+    """
+    Pico de memoria residente del proceso hasta ahora, en MB (None si el sistema
+    no lo informa).
+    """
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss está en KB en Linux y en bytes en macOS
+    return rss / (1024 * 1024) if sys.platform == 'darwin' else rss / 1024
+
+
+class Tramo:
+    """
+    Medida de una etapa. Quien la mide puede anotar las filas procesadas en `filas`.
+    """
+
+    def __init__(self, etapa, filas=None):
+        self.etapa = etapa
+        self.filas = filas
+
+
+class RegistroMetricas:
+    """
+    Tiempos de las etapas de una ejecución de un script.
+
+    Cada etapa acumula tiempo real, tiempo de CPU, filas y cuántas veces se midió
+    (en modo streaming las etapas se repiten una vez por bloque), el pico de
+    memoria del proceso al terminarla y cuánto lo hizo crecer. Al cerrar la
+    ejecución se agrega al archivo una línea JSON por etapa más una 'total'
+    (por defecto ARCHIVO_METRICAS).
+    """
+
+    def __init__(self, script, ruta=None, **contexto):
+        self.script = script
+        self.ruta = ruta or ARCHIVO_METRICAS
+        self.contexto = contexto
+        self.inicio = time.strftime('%Y-%m-%dT%H:%M:%S')
+        self.ejecucion = f"{time.strftime('%Y%m%dT%H%M%S')}-{os.getpid()}"
+        self.etapas = {}
+        self._reloj = time.perf_counter()
+        self._cpu = time.process_time()
+        self._rss_inicial = rss_max_mb()
+
+    def agregar(self, etapa, segundos, cpu_s=None, filas=None, rss_previo=None):
+        """
+        Suma una medida a la etapa (los tiempos medidos por separado, como los de
+        cada escritor, se agregan así sin pasar por `tramo`).
+        """
+        rss = rss_max_mb()
+        medida = self.etapas.setdefault(etapa, {
+            'segundos': 0.0, 'cpu_s': None, 'filas': None, 'veces': 0, 'rss_max_mb': None, 'incremento_rss_mb': None,
+        })
+        medida['segundos'] += segundos
+        medida['veces'] += 1
+        if cpu_s is not None:
+            medida['cpu_s'] = (medida['cpu_s'] or 0.0) + cpu_s
+        if filas is not None:
+            medida['filas'] = (medida['filas'] or 0) + int(filas)
+        if rss is not None:
+            medida['rss_max_mb'] = rss
+            if rss_previo is not None:
+                medida['incremento_rss_mb'] = max(medida['incremento_rss_mb'] or 0.0, rss - rss_previo)
+
+    @contextmanager
+    def tramo(self, etapa, filas=None):
+        medida = Tramo(etapa, filas)
+        rss_previo = rss_max_mb()
+        cpu, inicio = time.process_time(), time.perf_counter()
+        try:
+            yield medida
+        finally:
+            self.agregar(etapa, time.perf_counter() - inicio, time.process_time() - cpu, medida.filas, rss_previo)
+
+    def cerrar(self, ok=True):
+        self.agregar('total', time.perf_counter() - self._reloj, time.process_time() - self._cpu, None, self._rss_inicial)
+        base = {'ejecucion': self.ejecucion, 'script': self.script, 'inicio': self.inicio, 'ok': ok, **self.contexto}
+        lineas = [json.dumps({**base, 'etapa': etapa, **medida}, ensure_ascii=False) for etapa, medida in self.etapas.items()]
+        rotar(self.ruta)
+        # Todas las líneas de la ejecución en una sola escritura en modo anexar
+        with open(self.ruta, 'a', encoding='utf-8') as f:
+            f.write('\n'.join(lineas) + '\n')
+
+
+def rotar(ruta, max_bytes=None):
+    """
+    Si el archivo llegó a `max_bytes` (MAX_BYTES_METRICAS), lo renombra a
+    '<ruta>.1' para que la próxima ejecución empiece uno nuevo.
+    """
+    try:
+        if os.path.getsize(ruta) >= (max_bytes or MAX_BYTES_METRICAS):
+            os.replace(ruta, ruta + '.1')
+    except OSError:
+        pass  # No existe todavía, o otro proceso ya lo rotó
+
+
+# Ejecución en curso: las funciones miden sus etapas con `tramo` sin recibir el
+# registro; fuera de una ejecución (p. ej. desde app.py) no se registra nada.
+# Es una variable de contexto: cada hilo (y cada tarea asyncio) ve solo su propia
+# ejecución, así dos ejecuciones simultáneas en el mismo proceso no se mezclan
+_REGISTRO = contextvars.ContextVar('registro_metricas', default=None)
+
+
+@contextmanager
+def ejecucion(script, ruta=None, **contexto):
+    """
+    Registra las etapas medidas dentro del bloque como una ejecución de `script`.
+    Los argumentos extra (modo, formatos...) se guardan en cada línea.
+    """
+    registro = RegistroMetricas(script, ruta, **contexto)
+    marca = _REGISTRO.set(registro)
+    ok = False
+    try:
+        yield registro
+        ok = True
+    finally:
+        _REGISTRO.reset(marca)
+        registro.cerrar(ok)
+
+
+def medido(script):
+    """
+    Decorador: cada llamada a la función es una ejecución de `script`.
+    """
+    def decorador(funcion):
+        @functools.wraps(funcion)
+        def envoltura(*args, **kwargs):
+            with ejecucion(script):
+                return funcion(*args, **kwargs)
+        return envoltura
+    return decorador
+
+
+@contextmanager
+def tramo(etapa, filas=None):
+    """
+    Mide el bloque como la etapa `etapa` de la ejecución en curso.
+    """
+    registro = _REGISTRO.get()
+    if registro is None:
+        yield Tramo(etapa, filas)
+        return
+    with registro.tramo(etapa, filas) as medida:
+        yield medida
+
+
+def iterar(etapa, iterable):
+    """
+    Recorre `iterable` midiendo como `etapa` el tiempo de obtener cada elemento
+    (p. ej. leer cada bloque del archivo); las filas son las de cada elemento.
+    """
+    iterador = iter(iterable)
+    while True:
+        rss_previo = rss_max_mb()
+        cpu, inicio = time.process_time(), time.perf_counter()
+        try:
+            elemento = next(iterador)
+        except StopIteration:
+            return
+        registro = _REGISTRO.get()
+        if registro is not None:
+            registro.agregar(etapa, time.perf_counter() - inicio, time.process_time() - cpu, len(elemento), rss_previo)
+        yield elemento
+
+
+def anotar(**contexto):
+    """
+    Agrega datos de contexto (modo, formatos...) a las líneas de la ejecución en curso.
+    """
+    registro = _REGISTRO.get()
+    if registro is not None:
+        registro.contexto.update(contexto)
+
+
+def agregar(etapa, segundos, filas=None):
+    """
+    Suma a la ejecución en curso una etapa medida por otro medio.
+    """
+    registro = _REGISTRO.get()
+    if registro is not None:
+        registro.agregar(etapa, segundos, filas=filas)
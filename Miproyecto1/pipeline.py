@@ -0,0 +1,289 @@
+import os
+import ast
+import sys
+import json
+import time
+import hashlib
+import argparse
+import subprocess
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from limpiar_datos import (ARCHIVO_ENTRADA, ARCHIVO_SALIDA_EXCEL, ARCHIVO_SALIDA_CSV, ARCHIVO_SALIDA_PARQUET,
+                           ARCHIVO_SALIDA_CUBO, ARCHIVO_REPORTE)
+from carreras import ARCHIVO_CATALOGO_CARRERAS
+
+# Todo el pipeline corre en la carpeta de los scripts, desde donde se lo llame
+CARPETA = os.path.dirname(os.path.abspath(__file__))
+
+# Huellas de la última ejecución correcta de cada etapa y de los archivos ya hasheados
+CARPETA_CACHE = '.cache_pipeline'
+ARCHIVO_ESTADO = os.path.join(CARPETA_CACHE, 'estado.json')
+
+
+class Etapa:
+    """
+    Un script del pipeline con sus archivos de entrada y de salida. Las etapas que
+    dependen de ella son las que leen alguna de sus salidas.
+    """
+
+    def __init__(self, nombre, script, entradas, salidas, entorno=None):
+        self.nombre = nombre
+        self.script = script
+        self.entradas = list(entradas)
+        self.salidas = list(salidas)
+        self.entorno = entorno or {}
+
+
+ETAPAS = [
+    Etapa('limpieza', 'limpiar_datos.py',
+          entradas=[ARCHIVO_ENTRADA, ARCHIVO_CATALOGO_CARRERAS],
+          salidas=[ARCHIVO_SALIDA_EXCEL, ARCHIVO_SALIDA_CSV, ARCHIVO_SALIDA_PARQUET, ARCHIVO_SALIDA_CUBO, ARCHIVO_REPORTE]),
+    Etapa('analisis_general', 'analisis_general.py',
+          entradas=[ARCHIVO_SALIDA_PARQUET, ARCHIVO_SALIDA_CUBO, ARCHIVO_CATALOGO_CARRERAS],
+          salidas=['grafico_promedios_generales.png', 'grafico_promedios_por_carrera.png',
+                   'grafico_factores_empleabilidad.png', 'grafico_frecuencia_carreras.png',
+                   'grafico_distribucion_indicadores.png']),
+    Etapa('analisis_descriptivo', 'analisis_descriptivo.py',
+          entradas=[ARCHIVO_SALIDA_PARQUET, ARCHIVO_CATALOGO_CARRERAS],
+          salidas=['H3_competencias_por_carrera.png', 'H5_competencias_vs_datos.png'],
+          entorno={'MPLBACKEND': 'Agg'}),
+    # Sin navegador: las figuras se construyen (y se comprueba que se puedan
+    # serializar) pero no se abren; el dashboard arma las suyas con los mismos datos
+    Etapa('analasis_KDD', 'analasis_KDD.py',
+          entradas=[ARCHIVO_SALIDA_PARQUET, ARCHIVO_SALIDA_CUBO, ARCHIVO_CATALOGO_CARRERAS],
+          salidas=[], entorno={'PLOTLY_RENDERER': 'json'}),
+]
+
+
+def dependencias(etapas):
+    """
+    {etapa: etapas que producen alguna de sus entradas}.
+    """
+    productor = {salida: e.nombre for e in etapas for salida in e.salidas}
+    return {e.nombre: sorted({productor[r] for r in e.entradas if r in productor and productor[r] != e.nombre})
+            for e in etapas}
+
+
+def modulos_locales(script, carpeta=None):
+    """
+    Archivos .py de `carpeta` (por defecto, CARPETA) que usa `script`, directa o
+    indirectamente (sus imports de módulos locales, recorridos con ast sin ejecutarlos).
+    """
+    carpeta = carpeta or CARPETA
+    vistos, pendientes = set(), [script]
+    while pendientes:
+        archivo = pendientes.pop()
+        if archivo in vistos:
+            continue
+        vistos.add(archivo)
+        with open(os.path.join(carpeta, archivo), 'r', encoding='utf-8') as f:
+            arbol = ast.parse(f.read(), filename=archivo)
+        for nodo in ast.walk(arbol):
+            if isinstance(nodo, ast.Import):
+                nombres = [a.name for a in nodo.names]
+            elif isinstance(nodo, ast.ImportFrom) and nodo.module and not nodo.level:
+                nombres = [nodo.module]
+            else:
+                continue
+            for nombre in nombres:
+                modulo = nombre.split('.')[0] + '.py'
+                if os.path.exists(os.path.join(carpeta, modulo)):
+                    pendientes.append(modulo)
+    return sorted(vistos)
+
+
+class HuellasArchivos:
+    """
+    SHA-1 del contenido de los archivos, recalculado solo si cambió su tamaño o su
+    fecha de modificación (la memoria se guarda con el estado del pipeline).
+    """
+
+    def __init__(self, memoria=None):
+        self.memoria = memoria or {}
+
+    def huella(self, ruta, bloque=1 << 20):
+        try:
+            info = os.stat(ruta)
+        except FileNotFoundError:
+            return None
+        clave = os.path.abspath(ruta)
+        guardada = self.memoria.get(clave)
+        if guardada and guardada[0] == info.st_mtime_ns and guardada[1] == info.st_size:
+            return guardada[2]
+        h = hashlib.sha1()
+        with open(ruta, 'rb') as f:
+            for parte in iter(lambda: f.read(bloque), b''):
+                h.update(parte)
+        self.memoria[clave] = [info.st_mtime_ns, info.st_size, h.hexdigest()]
+        return h.hexdigest()
+
+
+def huella_etapa(etapa, huellas):
+    """
+    Huella de todo lo que determina las salidas de la etapa: el código (el script y
+    sus módulos locales), el contenido de sus entradas y su entorno.
+    """
+    h = hashlib.sha1()
+    for modulo in modulos_locales(etapa.script):
+        h.update(f'codigo {modulo} {huellas.huella(modulo)}\n'.encode('utf-8'))
+    for entrada in etapa.entradas:
+        h.update(f'entrada {os.path.basename(entrada)} {huellas.huella(entrada)}\n'.encode('utf-8'))
+    h.update(json.dumps(etapa.entorno, sort_keys=True).encode('utf-8'))
+    return h.hexdigest()
+
+
+def cargar_estado(ruta=ARCHIVO_ESTADO):
+    try:
+        with open(ruta, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {'etapas': {}, 'archivos': {}}
+
+
+def guardar_estado(estado, ruta=ARCHIVO_ESTADO):
+    os.makedirs(os.path.dirname(ruta) or '.', exist_ok=True)
+    temporal = ruta + '.tmp'
+    with open(temporal, 'w', encoding='utf-8') as f:
+        json.dump(estado, f, ensure_ascii=False, indent=1)
+    os.replace(temporal, ruta)
+
+
+def vigente(etapa, huella, estado, huellas):
+    """
+    Motivo por el que hay que ejecutar la etapa, o None si sus salidas ya
+    corresponden a su código y sus entradas actuales.
+    """
+    anterior = estado['etapas'].get(etapa.nombre)
+    if anterior is None:
+        return 'sin ejecuciones anteriores'
+    if anterior['huella'] != huella:
+        return 'cambiaron sus entradas o su código'
+    for salida in etapa.salidas:
+        if huellas.huella(salida) != anterior['salidas'].get(salida):
+            return f"falta o cambió '{salida}'"
+    return None
+
+
+def ejecutar_etapa(etapa):
+    """
+    Corre el script en un proceso aparte; su salida queda en CARPETA_CACHE/<etapa>.log.
+    Devuelve (correcta, segundos, mensaje).
+    """
+    faltantes = [r for r in etapa.entradas if not os.path.exists(r)]
+    if faltantes:
+        return False, 0.0, f"faltan entradas: {', '.join(faltantes)}"
+    registro = os.path.join(CARPETA_CACHE, f'{etapa.nombre}.log')
+    inicio = time.perf_counter()
+    with open(registro, 'w', encoding='utf-8') as salida:
+        proceso = subprocess.run([sys.executable, etapa.script], cwd=CARPETA, stdout=salida,
+                                 stderr=subprocess.STDOUT, env={**os.environ, **etapa.entorno})
+    segundos = time.perf_counter() - inicio
+    if proceso.returncode != 0:
+        return False, segundos, f"terminó con código {proceso.returncode} (ver {registro})"
+    # Los scripts informan algunos errores sin terminar con código distinto de 0
+    faltantes = [r for r in etapa.salidas if not os.path.exists(r)]
+    if faltantes:
+        return False, segundos, f"no generó {', '.join(faltantes)} (ver {registro})"
+    return True, segundos, None
+
+
+def ejecutar_pipeline(objetivos=None, forzar=False, procesos=None, etapas=ETAPAS):
+    """
+    Ejecuta las etapas pedidas (todas si `objetivos` es None) y las que producen
+    sus entradas, en orden de dependencias. Las etapas vigentes se omiten, y las
+    que no dependen entre sí corren a la vez (hasta `procesos`). Si una etapa
+    falla, las que dependen de ella no se ejecutan.
+
+    Devuelve {etapa: 'ejecutada' | 'omitida' | 'fallida' | 'bloqueada'}. Lanza
+    ValueError si se pide una etapa desconocida o si las dependencias forman un ciclo.
+    """
+    por_nombre = {e.nombre: e for e in etapas}
+    previas = dependencias(etapas)
+    desconocidas = set(objetivos or ()) - set(por_nombre)
+    if desconocidas:
+        raise ValueError(f"etapas desconocidas: {', '.join(sorted(desconocidas))}")
+    seleccion = set(objetivos or por_nombre)
+    pendientes = list(seleccion)
+    while pendientes:
+        for previa in previas[pendientes.pop()]:
+            if previa not in seleccion:
+                seleccion.add(previa)
+                pendientes.append(previa)
+
+    os.makedirs(CARPETA_CACHE, exist_ok=True)
+    estado = cargar_estado()
+    huellas = HuellasArchivos(estado.get('archivos'))
+    resultado = {}
+    en_curso = {}
+    pool = ThreadPoolExecutor(max_workers=procesos or os.cpu_count() or 1)
+    try:
+        while len(resultado) < len(seleccion):
+            decididas = len(resultado)
+            for nombre in [e.nombre for e in etapas if e.nombre in seleccion]:
+                if nombre in resultado or any(nombre == n for n, _ in en_curso.values()):
+                    continue
+                if any(resultado.get(p) in ('fallida', 'bloqueada') for p in previas[nombre]):
+                    resultado[nombre] = 'bloqueada'
+                    print(f"[{nombre}] no se ejecuta: falló una etapa anterior")
+                    continue
+                if not all(resultado.get(p) in ('ejecutada', 'omitida') for p in previas[nombre]):
+                    continue
+                # Las entradas ya son definitivas: sus productoras terminaron
+                etapa = por_nombre[nombre]
+                huella = huella_etapa(etapa, huellas)
+                motivo = 'forzada' if forzar else vigente(etapa, huella, estado, huellas)
+                if motivo is None:
+                    resultado[nombre] = 'omitida'
+                    print(f"[{nombre}] sin cambios, se omite")
+                    continue
+                print(f"[{nombre}] se ejecuta ({motivo})", flush=True)
+                en_curso[pool.submit(ejecutar_etapa, etapa)] = (nombre, huella)
+
+            if not en_curso:
+                # Omitir o bloquear etapas puede liberar a las siguientes; si esta
+                # pasada no decidió ninguna, las que faltan se esperan entre sí
+                if len(resultado) == decididas:
+                    faltan = sorted(seleccion - set(resultado))
+                    raise ValueError(f"dependencias circulares entre: {', '.join(faltan)}")
+                continue
+            terminadas, _ = wait(list(en_curso), return_when=FIRST_COMPLETED)
+            for futuro in terminadas:
+                nombre, huella = en_curso.pop(futuro)
+                etapa = por_nombre[nombre]
+                correcta, segundos, mensaje = futuro.result()
+                if correcta:
+                    resultado[nombre] = 'ejecutada'
+                    estado['etapas'][nombre] = {
+                        'huella': huella,
+                        'salidas': {salida: huellas.huella(salida) for salida in etapa.salidas},
+                        'fecha': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                        'segundos': round(segundos, 3),
+                    }
+                    print(f"[{nombre}] terminada en {segundos:.2f} s", flush=True)
+                else:
+                    resultado[nombre] = 'fallida'
+                    estado['etapas'].pop(nombre, None)
+                    print(f"[{nombre}] FALLÓ: {mensaje}", flush=True)
+    finally:
+        pool.shutdown(wait=True)
+        estado['archivos'] = huellas.memoria
+        guardar_estado(estado)
+    return resultado
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description="Ejecuta el pipeline de la encuesta: solo las etapas cuyas entradas o código cambiaron.")
+    parser.add_argument('etapas', nargs='*', metavar='ETAPA',
+                        help=f"Etapas a actualizar (y las que necesitan): {', '.join(e.nombre for e in ETAPAS)}. Por defecto, todas.")
+    parser.add_argument('--forzar', action='store_true', help="Ejecuta las etapas aunque estén vigentes.")
+    parser.add_argument('--procesos', type=int, help="Etapas a la vez como máximo (por defecto, los núcleos).")
+    args = parser.parse_args()
+    desconocidas = set(args.etapas) - {e.nombre for e in ETAPAS}
+    if desconocidas:
+        parser.error(f"etapas desconocidas: {', '.join(sorted(desconocidas))}")
+
+    os.chdir(CARPETA)
+    resultado = ejecutar_pipeline(args.etapas or None, forzar=args.forzar, procesos=args.procesos)
+    resumen = ', '.join(f'{n}: {r}' for n, r in resultado.items())
+    print(f"Pipeline terminado ({resumen})")
+    sys.exit(1 if any(r in ('fallida', 'bloqueada') for r in resultado.values()) else 0)
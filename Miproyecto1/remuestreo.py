@@ -0,0 +1,231 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+
+# Número de remuestras por defecto de los intervalos y pruebas de permutación
+N_REMUESTRAS = 10000
+
+# Remuestras por lote: cada lote tiene su propia semilla derivada, así que el
+# resultado es el mismo con cualquier número de procesos
+TAMANO_LOTE = 500
+
+# Tope de celdas (remuestras x filas) de las matrices de un lote
+MAX_CELDAS_LOTE = 4_000_000
+
+# Por debajo de este total de celdas no compensa arrancar el pool de procesos
+MIN_CELDAS_PARALELO = 20_000_000
+
+
+# --- Estadísticos por lote (funciones de módulo para poder usarlas en otros procesos) ---
+# Cada una recibe (datos, rng, b) y devuelve un arreglo con b filas.
+
+def _pesos_bootstrap(rng, b, n):
+    """
+    Remuestreo con reemplazo de b x n índices, devuelto como pesos: cuántas veces
+    sale cada fila en cada remuestra (matriz b x n).
+    """
+    indices = rng.integers(0, n, size=(b, n)) + (np.arange(b) * n)[:, None]
+    return np.bincount(indices.ravel(), minlength=b * n).reshape(b, n).astype(np.float64)
+
+
+def bootstrap_medias(datos, rng, b):
+    """
+    Medias de cada columna de `datos` (n x k, con NaN) en b remuestras.
+    """
+    presentes = ~np.isnan(datos)
+    w = _pesos_bootstrap(rng, b, len(datos))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return (w @ np.where(presentes, datos, 0.0)) / (w @ presentes.astype(np.float64))
+
+
+def _pearson_ponderado(w, x, y):
+    n = w.sum(axis=1)
+    sx, sy = w @ x, w @ y
+    sxx, syy, sxy = w @ (x * x), w @ (y * y), w @ (x * y)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return (n * sxy - sx * sy) / np.sqrt((n * sxx - sx ** 2) * (n * syy - sy ** 2))
+
+
+def bootstrap_pearson(datos, rng, b):
+    """
+    Correlación de Pearson de los pares completos (x, y) en b remuestras.
+    """
+    x, y = datos
+    return _pearson_ponderado(_pesos_bootstrap(rng, b, len(x)), x, y)
+
+
+def permutacion_pearson(datos, rng, b):
+    """
+    Correlación de Pearson tras permutar y en b remuestras (distribución nula).
+    """
+    x, y = datos
+    x, y = x - x.mean(), y - y.mean()
+    permutadas = rng.permuted(np.tile(y, (b, 1)), axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return (permutadas @ x) / np.sqrt((x @ x) * (y @ y))
+
+
+def _f_desde_sumas(sumas, conteos, total, suma_total, cuadrados_total, k):
+    """
+    F y eta² de un ANOVA de un factor a partir de las sumas por grupo (b x k).
+    """
+    with np.errstate(invalid='ignore', divide='ignore'):
+        entre = np.where(conteos > 0, sumas ** 2 / conteos, 0.0).sum(axis=1) - suma_total ** 2 / total
+        total_sc = cuadrados_total - suma_total ** 2 / total
+        f = (entre / (k - 1)) / ((total_sc - entre) / (total - k))
+        return f, entre / total_sc
+
+
+def permutacion_anova(datos, rng, b):
+    """
+    F del ANOVA tras permutar los valores entre grupos en b remuestras.
+    `datos` = (códigos de grupo 0..k-1, valores, k).
+    """
+    codigos, valores, k = datos
+    n = len(valores)
+    permutados = rng.permuted(np.tile(valores, (b, 1)), axis=1)
+    desplazados = codigos[None, :] + (np.arange(b) * k)[:, None]
+    sumas = np.bincount(desplazados.ravel(), weights=permutados.ravel(), minlength=b * k).reshape(b, k)
+    conteos = np.bincount(codigos, minlength=k)[None, :].astype(np.float64)
+    f, _ = _f_desde_sumas(sumas, conteos, n, valores.sum(), (valores ** 2).sum(), k)
+    return f
+
+
+def bootstrap_eta2(datos, rng, b):
+    """
+    Eta² del ANOVA en b remuestras de las filas. `datos` = (códigos, valores, k).
+    """
+    codigos, valores, k = datos
+    n = len(valores)
+    w = _pesos_bootstrap(rng, b, n)
+    grupos = np.zeros((n, k))
+    grupos[np.arange(n), codigos] = 1.0
+    sumas, conteos = w @ (grupos * valores[:, None]), w @ grupos
+    _, eta2 = _f_desde_sumas(sumas, conteos, n, w @ valores, w @ (valores ** 2), k)
+    return eta2
+
+
+# --- Motor ---
+
+_TAREA = None
+
+
+def _iniciar_proceso(funcion, datos):
+    # Los datos se envían una sola vez a cada proceso, no con cada lote
+    global _TAREA
+    _TAREA = (funcion, datos)
+
+
+def _ejecutar_lote(semilla, b):
+    funcion, datos = _TAREA
+    return funcion(datos, np.random.default_rng(semilla), b)
+
+
+def remuestrear(funcion, datos, filas, n_remuestras=N_REMUESTRAS, semilla=0, procesos=None):
+    """
+    Aplica `funcion(datos, rng, b)` a `n_remuestras` remuestras repartidas en lotes.
+
+    Cada lote usa un generador propio derivado de `semilla` (SeedSequence.spawn),
+    así que el resultado es reproducible y no depende de `procesos`. `filas` es el
+    tamaño de los datos, para acotar la memoria de cada lote. Si el trabajo es
+    grande los lotes se reparten entre procesos (todos los núcleos si `procesos`
+    es None). Devuelve un arreglo con una fila por remuestra.
+    """
+    tamano = max(1, min(TAMANO_LOTE, MAX_CELDAS_LOTE // max(filas, 1)))
+    lotes = [min(tamano, n_remuestras - i) for i in range(0, n_remuestras, tamano)]
+    semillas = np.random.SeedSequence(semilla).spawn(len(lotes))
+
+    procesos = min(procesos or os.cpu_count() or 1, len(lotes))
+    if procesos <= 1 or n_remuestras * filas < MIN_CELDAS_PARALELO:
+        _iniciar_proceso(funcion, datos)
+        resultados = [_ejecutar_lote(s, b) for s, b in zip(semillas, lotes)]
+    else:
+        with ProcessPoolExecutor(max_workers=procesos, initializer=_iniciar_proceso,
+                                 initargs=(funcion, datos)) as pool:
+            resultados = list(pool.map(_ejecutar_lote, semillas, lotes))
+    return np.concatenate(resultados)
+
+
+def intervalo_percentil(muestras, nivel=0.95):
+    """
+    Intervalo de confianza por percentiles de las remuestras (por columna).
+    """
+    alfa = (1 - nivel) / 2
+    return np.nanquantile(muestras, alfa, axis=0), np.nanquantile(muestras, 1 - alfa, axis=0)
+
+
+def p_valor_permutacion(observado, nulos, bilateral=True):
+    """
+    p-valor de permutación con la corrección (1 + extremos) / (1 + remuestras).
+    """
+    nulos = nulos[~np.isnan(nulos)]
+    if np.isnan(observado) or len(nulos) == 0:
+        return np.nan
+    if bilateral:
+        extremos = (np.abs(nulos) >= abs(observado) - 1e-12).sum()
+    else:
+        extremos = (nulos >= observado - 1e-12).sum()
+    return (1 + extremos) / (1 + len(nulos))
+
+
+# --- Intervalos y pruebas de los análisis ---
+
+def intervalos_medias(df, columnas, n_remuestras=N_REMUESTRAS, nivel=0.95, semilla=0, procesos=None):
+    """
+    Media de cada columna con su intervalo de confianza bootstrap.
+    """
+    datos = df[list(columnas)].to_numpy(dtype=np.float64, na_value=np.nan)
+    muestras = remuestrear(bootstrap_medias, datos, len(datos), n_remuestras, semilla, procesos)
+    inferior, superior = intervalo_percentil(muestras, nivel)
+    return pd.DataFrame({'media': np.nanmean(datos, axis=0), 'ic_inf': inferior, 'ic_sup': superior},
+                        index=list(columnas))
+
+
+def intervalos_correlaciones(df, hipotesis, n_remuestras=N_REMUESTRAS, nivel=0.95, semilla=0, procesos=None):
+    """
+    Para cada hipótesis (clave, x, y): r de Pearson de los pares completos, su
+    intervalo bootstrap y el p-valor de la prueba de permutación.
+    """
+    filas = {}
+    for clave, x, y in hipotesis:
+        pares = df[[x, y]].to_numpy(dtype=np.float64, na_value=np.nan)
+        pares = pares[~np.isnan(pares).any(axis=1)]
+        if len(pares) < 3:
+            filas[clave] = {'r': np.nan, 'ic_inf': np.nan, 'ic_sup': np.nan, 'p_perm': np.nan}
+            continue
+        pares = pares - pares.mean(axis=0)  # Centrar no cambia r y evita cancelaciones
+        datos = (pares[:, 0], pares[:, 1])
+        r = _pearson_ponderado(np.ones((1, len(pares))), *datos)[0]
+        muestras = remuestrear(bootstrap_pearson, datos, len(pares), n_remuestras, semilla, procesos)
+        nulos = remuestrear(permutacion_pearson, datos, len(pares), n_remuestras, semilla + 1, procesos)
+        inferior, superior = intervalo_percentil(muestras, nivel)
+        filas[clave] = {'r': r, 'ic_inf': inferior, 'ic_sup': superior, 'p_perm': p_valor_permutacion(r, nulos)}
+    return pd.DataFrame.from_dict(filas, orient='index')
+
+
+def pruebas_anova(df, grupo, medidas, n_remuestras=N_REMUESTRAS, nivel=0.95, semilla=0, procesos=None):
+    """
+    Para cada medida: F del ANOVA por `grupo`, p-valor de permutación y eta² con
+    su intervalo bootstrap.
+    """
+    filas = {}
+    for m in medidas:
+        validas = df[[grupo, m]].dropna()
+        codigos, _ = pd.factorize(validas[grupo], sort=True)
+        valores = validas[m].to_numpy(dtype=np.float64)
+        k = codigos.max() + 1 if len(codigos) else 0
+        if k < 2:
+            filas[m] = {'F': np.nan, 'p_perm': np.nan, 'eta2': np.nan, 'ic_inf': np.nan, 'ic_sup': np.nan}
+            continue
+        valores = valores - valores.mean()
+        datos = (codigos, valores, k)
+        conteos = np.bincount(codigos, minlength=k)[None, :].astype(np.float64)
+        sumas = np.bincount(codigos, weights=valores, minlength=k)[None, :]
+        f, eta2 = _f_desde_sumas(sumas, conteos, len(valores), valores.sum(), (valores ** 2).sum(), k)
+        nulos = remuestrear(permutacion_anova, datos, len(valores), n_remuestras, semilla, procesos)
+        muestras = remuestrear(bootstrap_eta2, datos, len(valores), n_remuestras, semilla + 1, procesos)
+        inferior, superior = intervalo_percentil(muestras, nivel)
+        filas[m] = {'F': f[0], 'p_perm': p_valor_permutacion(f[0], nulos, bilateral=False),
+                    'eta2': eta2[0], 'ic_inf': inferior, 'ic_sup': superior}
+    return pd.DataFrame.from_dict(filas, orient='index')
@@ -1,7 +1,54 @@
 import streamlit as st
-import pandas as pd
 import os
+import sys
 import glob
+import hashlib
+import threading
+import zipfile
+import json
+from functools import partial
+from collections import OrderedDict
+
+CARPETA_DATOS = "Miproyecto1"
+
+# Módulos compartidos con los scripts de análisis (esquema de la encuesta, carga de datos)
+# Se importan dentro de las funciones que los usan, igual que pandas, numpy, PIL y
+# plotly: importarlos arriba costaría más de un segundo antes de la primera pintura
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), CARPETA_DATOS))
+
+# Límite de memoria (en MB) de la caché de DataFrames compartida entre sesiones.
+# Se puede ajustar con la variable de entorno DASHBOARD_CACHE_MB.
+LIMITE_CACHE_MB = float(os.environ.get("DASHBOARD_CACHE_MB", "512"))
+
+# Carpeta donde se guardan los artefactos derivados (miniaturas, etc.)
+CARPETA_CACHE = ".cache_dashboard"
+
+# El ZIP de "Descargar todo" se guarda en la carpeta static/ junto a app.py, que
+# Streamlit sirve por bloques desde disco (server.enableStaticServing en
+# .streamlit/config.toml). Streamlit no sirve archivos estáticos de más de 200 MB.
+CARPETA_ESTATICA = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")
+CARPETA_ZIP = os.path.join(CARPETA_ESTATICA, "descargas")
+URL_ZIP = "app/static/descargas"
+LIMITE_ESTATICO_MB = 200
+
+# Lado mayor (px) y calidad WebP de las miniaturas de la galería
+TAMANO_MINIATURA = 480
+CALIDAD_MINIATURA = 80
+
+# Opciones de tamaño de página de la tabla paginada
+OPCIONES_FILAS_POR_PAGINA = [25, 50, 100, 200]
+
+# Filtros de los gráficos interactivos (dimensión del cubo -> etiqueta). Con DuckDB
+# instalado se aplican en la lectura del Parquet (consultas_sql.py)
+FILTROS_INTERACTIVOS = {
+    "Cod_Carrera": "Carrera",
+    "Demo_Semestre": "Semestre",
+    "Demo_Genero": "Género",
+    "Demo_Edad": "Edad",
+}
+
+# Ejecuciones más recientes de cada script que se grafican en la pestaña de métricas
+MAX_EJECUCIONES_METRICAS = 30
 
 # Configuración de la página
 st.set_page_config(page_title="Dashboard Miproyecto1", layout="wide")
@@ -117,96 +164,584 @@ st.markdown(
     unsafe_allow_html=True
 )
 
+# --- CAPA DE CARGA CON CACHÉ ---
+# Cada interacción vuelve a ejecutar el script completo; esta capa evita releer
+# los archivos en cada rerun y comparte los DataFrames entre todas las sesiones.
+
+@st.cache_data(show_spinner=False)
+def _glob_cacheado(carpeta, patron, mtime_carpeta):
+    return sorted(glob.glob(os.path.join(carpeta, patron)))
+
 # Función para encontrar archivos por patrón
 def buscar_archivos(carpeta, patron):
-    return sorted(glob.glob(os.path.join(carpeta, patron)))
+    """
+    Lista los archivos que cumplen el patrón. El resultado se reutiliza mientras
+    no cambie el mtime de la carpeta (crear, borrar o renombrar archivos lo cambia).
+    """
+    try:
+        mtime_carpeta = os.stat(carpeta).st_mtime_ns
+    except FileNotFoundError:
+        return []
+    return _glob_cacheado(carpeta, patron, mtime_carpeta)
 
-# --- SECCIÓN 1: DATOS COMPLETOS DE LA ENCUESTA ---
-st.subheader("🔍 Datos completos de la encuesta")
+def firma_archivo(ruta):
+    """
+    Devuelve la firma (ruta absoluta, mtime, tamaño) que identifica la versión de un archivo.
+    """
+    info = os.stat(ruta)
+    return (os.path.abspath(ruta), info.st_mtime_ns, info.st_size)
 
-csv_files = buscar_archivos("Miproyecto1", "*.csv")
-xlsx_files = buscar_archivos("Miproyecto1", "*.xlsx")
+class CacheDataFrames:
+    """
+    Caché LRU de DataFrames compartida entre sesiones.
 
-if csv_files:
-    try:
-        df_csv = pd.read_csv(csv_files[0])
-        st.write(f"📄 Archivo cargado: `{os.path.basename(csv_files[0])}`")
-        st.write(f"🔢 Total de filas: **{len(df_csv)}** • Columnas: **{len(df_csv.columns)}**")
-        st.dataframe(df_csv, use_container_width=True, height=500)  # 👈 MUESTRA TODO
-    except Exception as e:
-        st.error(f"❌ Error al cargar CSV: {e}")
+    Las entradas se indexan por ruta y se invalidan cuando cambia la firma del
+    archivo (mtime o tamaño), así que solo se recargan los archivos modificados.
+    Cuando la memoria ocupada supera `limite_bytes` se expulsan las entradas
+    usadas hace más tiempo. Los DataFrames devueltos son compartidos: no modificarlos.
+    """
 
-elif xlsx_files:
-    try:
-        df_xlsx = pd.read_excel(xlsx_files[0])
-        st.write(f"📄 Archivo cargado: `{os.path.basename(xlsx_files[0])}`")
-        st.write(f"🔢 Total de filas: **{len(df_xlsx)}** • Columnas: **{len(df_xlsx.columns)}**")
-        st.dataframe(df_xlsx, use_container_width=True, height=500)  # 👈 MUESTRA TODO
-    except Exception as e:
-        st.error(f"❌ Error al cargar XLSX: {e}")
-else:
-    st.warning("⚠️ No se encontró ningún archivo de datos (.csv o .xlsx).")
+    def __init__(self, limite_bytes):
+        self.limite_bytes = limite_bytes
+        self._entradas = OrderedDict()  # ruta -> (firma, DataFrame, bytes)
+        self._bytes_totales = 0
+        self._lock = threading.Lock()
 
-# --- SECCIÓN 2: DICCIONARIO DE VARIABLES ---
-st.subheader("📋 Diccionario de variables")
+    def obtener(self, ruta, lector):
+        firma = firma_archivo(ruta)
+        clave = firma[0]
+        with self._lock:
+            entrada = self._entradas.get(clave)
+            if entrada is not None and entrada[0] == firma:
+                self._entradas.move_to_end(clave)
+                return entrada[1]
 
-# Nota: el nombre del archivo tiene un typo: "varibales" → lo dejamos así para que funcione
-diccionario_files = buscar_archivos("Miproyecto1", "Diccionario de varibales.xlsx")
+        # La lectura se hace fuera del lock para no bloquear a las demás sesiones
+        df = lector(ruta)
+        tamano = int(df.memory_usage(deep=True).sum())
 
-if diccionario_files:
-    try:
-        df_dicc = pd.read_excel(diccionario_files[0])
-        st.write(f"📘 Archivo cargado: `{os.path.basename(diccionario_files[0])}`")
-        st.dataframe(df_dicc, use_container_width=True, height=400)
-    except Exception as e:
-        st.error(f"❌ Error al cargar Diccionario de varibales: {e}")
-else:
-    st.info("ℹ️ No se encontró el archivo `Diccionario de varibales.xlsx`.")
+        with self._lock:
+            anterior = self._entradas.pop(clave, None)
+            if anterior is not None:
+                self._bytes_totales -= anterior[2]
+            self._entradas[clave] = (firma, df, tamano)
+            self._bytes_totales += tamano
+            self._expulsar()
+        return df
+
+    def _expulsar(self):
+        # Siempre se conserva la entrada más reciente, aunque supere el límite por sí sola
+        while self._bytes_totales > self.limite_bytes and len(self._entradas) > 1:
+            _, (_, _, tamano) = self._entradas.popitem(last=False)
+            self._bytes_totales -= tamano
+
+@st.cache_resource(show_spinner=False)
+def obtener_cache():
+    return CacheDataFrames(int(LIMITE_CACHE_MB * 1024 * 1024))
+
+def leer_tabla(ruta):
+    """
+    Lee un archivo tabular según su extensión. Las tablas de datos se guardan
+    compactas (texto con pocos valores distintos como categórico, enteros chicos):
+    la caché es compartida por todas las sesiones.
+    """
+    import pandas as pd
+    from esquema_encuesta import compactar_tabla
+    if ruta.lower().endswith(".jsonl"):
+        return pd.read_json(ruta, lines=True)
+    if ruta.lower().endswith(".parquet"):
+        df = pd.read_parquet(ruta, engine="pyarrow", memory_map=True)
+    elif ruta.lower().endswith(".csv"):
+        df = pd.read_csv(ruta)
+    else:
+        df = pd.read_excel(ruta)
+    return compactar_tabla(df)
+
+def cargar_tabla(ruta):
+    """
+    Devuelve el DataFrame del archivo desde la caché compartida, recargándolo solo si cambió.
+    """
+    return obtener_cache().obtener(ruta, leer_tabla)
+
+# --- TABLA PAGINADA EN EL SERVIDOR ---
+
+def _calcular_posiciones(df, busqueda, orden, ascendente):
+    """
+    Devuelve las posiciones de las filas que cumplen la búsqueda, en el orden pedido.
+    Devuelve None si no hay búsqueda ni orden (se usan las filas tal cual).
+    """
+    import numpy as np
+    import pandas as pd
+    if not busqueda and orden is None:
+        return None
+
+    posiciones = np.arange(len(df))
+    if busqueda:
+        mascara = np.zeros(len(df), dtype=bool)
+        for col in df.columns:
+            if not pd.api.types.is_numeric_dtype(df[col]):
+                mascara |= df[col].astype(str).str.contains(busqueda, case=False, regex=False, na=False).to_numpy()
+        posiciones = np.flatnonzero(mascara)
+
+    if orden is not None:
+        valores = df[orden].iloc[posiciones].reset_index(drop=True)
+        orden_relativo = valores.sort_values(ascending=ascendente, na_position='last', kind='stable').index.to_numpy()
+        posiciones = posiciones[orden_relativo]
+    return posiciones
+
+def mostrar_tabla_paginada(df, clave, firma):
+    """
+    Muestra `df` enviando al navegador solo la página visible.
+
+    La búsqueda de texto, el orden y la selección de columnas se resuelven en el
+    servidor. Las posiciones filtradas/ordenadas se memorizan en la sesión por
+    (firma, búsqueda, orden), así que cambiar de página solo recorta la ventana.
+    """
+    columnas = list(df.columns)
+
+    col_busqueda, col_orden, col_dir, col_tam = st.columns([3, 3, 1, 1])
+    busqueda = col_busqueda.text_input("🔎 Buscar en la tabla", key=f"{clave}_busqueda").strip()
+    orden = col_orden.selectbox("↕️ Ordenar por", ["(sin orden)"] + columnas, key=f"{clave}_orden")
+    orden = None if orden == "(sin orden)" else orden
+    ascendente = col_dir.toggle("Asc.", value=True, key=f"{clave}_asc")
+    filas_por_pagina = col_tam.selectbox("Filas", OPCIONES_FILAS_POR_PAGINA, index=1, key=f"{clave}_filas")
+    columnas_visibles = st.multiselect(
+        "🧩 Columnas visibles (vacío = todas)", columnas, key=f"{clave}_columnas"
+    ) or columnas
+    nombres_cortos = st.toggle("🏷️ Nombres cortos de columnas", key=f"{clave}_cortos")
+
+    llave_vista = (firma, busqueda, orden, ascendente)
+    memo = st.session_state.get(f"_{clave}_vista")
+    if memo is None or memo[0] != llave_vista:
+        memo = (llave_vista, _calcular_posiciones(df, busqueda, orden, ascendente))
+        st.session_state[f"_{clave}_vista"] = memo
+    posiciones = memo[1]
+
+    total = len(df) if posiciones is None else len(posiciones)
+    n_paginas = max(1, -(-total // filas_por_pagina))
+    clave_pagina = f"{clave}_pagina"
+    if st.session_state.get(clave_pagina, 1) > n_paginas:
+        st.session_state[clave_pagina] = n_paginas
+    pagina = st.number_input(
+        f"📄 Página (de {n_paginas})", min_value=1, max_value=n_paginas, step=1, key=clave_pagina
+    )
+
+    inicio = (pagina - 1) * filas_por_pagina
+    fin = min(inicio + filas_por_pagina, total)
+    if posiciones is None:
+        ventana = df.iloc[inicio:fin]
+    else:
+        ventana = df.iloc[posiciones[inicio:fin]]
+
+    st.caption(f"Mostrando filas {inicio + 1 if total else 0}–{fin} de {total}")
+    ventana = ventana[columnas_visibles]
+    if nombres_cortos:
+        # Solo se renombra la ventana visible, con los nombres cortos del esquema
+        from esquema_encuesta import nombres_cortos
+        ventana = ventana.rename(columns=nombres_cortos(ventana.columns))
+    st.dataframe(ventana, width="stretch", height=500)
+
+# --- DESCARGAS DIFERIDAS ---
+
+# Formatos que ya vienen comprimidos: se guardan en el ZIP sin volver a comprimir
+EXTENSIONES_SIN_COMPRIMIR = (".png", ".xlsx", ".parquet", ".zip")
+
+def leer_bytes(ruta):
+    """
+    Lee el archivo completo. Se pasa a st.download_button como callable para que
+    solo se ejecute cuando el usuario pulsa el botón.
+    """
+    with open(ruta, "rb") as f:
+        return f.read()
+
+def ruta_zip(rutas):
+    """
+    Ruta del ZIP con todos los archivos. El nombre depende de las firmas de los
+    archivos, así que cambia (y el ZIP se reconstruye) solo cuando alguno cambia.
+    """
+    firmas = repr([firma_archivo(r) for r in rutas]).encode("utf-8")
+    huella = hashlib.sha1(firmas).hexdigest()[:16]
+    return os.path.join(CARPETA_ZIP, f"archivos_{huella}.zip")
+
+def construir_zip(rutas):
+    """
+    Construye en disco el ZIP con todos los archivos si no existe y devuelve su ruta.
+
+    `ZipFile.write` copia cada archivo por bloques y el ZIP se sirve desde disco
+    como archivo estático, así que ni armarlo ni descargarlo carga la carpeta en memoria.
+    """
+    destino = ruta_zip(rutas)
 
-# --- SECCIÓN 3: GRÁFICOS PNG ---
-st.subheader("📈 Gráficos generados")
+    if not os.path.exists(destino):
+        os.makedirs(CARPETA_ZIP, exist_ok=True)
+        temporal = f"{destino}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with zipfile.ZipFile(temporal, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+            for ruta in rutas:
+                compresion = zipfile.ZIP_STORED if ruta.lower().endswith(EXTENSIONES_SIN_COMPRIMIR) else zipfile.ZIP_DEFLATED
+                zf.write(ruta, arcname=os.path.basename(ruta), compress_type=compresion)
+        os.replace(temporal, destino)  # Renombrado atómico: nunca se sirve un ZIP a medias
 
-png_files = buscar_archivos("Miproyecto1", "*.png")
+        # Borrar los ZIP de versiones anteriores
+        for viejo in glob.glob(os.path.join(CARPETA_ZIP, "archivos_*.zip")):
+            if viejo != destino:
+                try:
+                    os.remove(viejo)
+                except OSError:
+                    pass
 
-if png_files:
-    cols = st.columns(2)
-    for i, img_path in enumerate(png_files):
-        col = cols[i % 2]
-        with col:
+    return destino
+
+# --- MINIATURAS DE LA GALERÍA ---
+
+def hash_contenido(ruta, bloque=1 << 20):
+    """
+    Calcula el SHA-1 del contenido del archivo leyéndolo por bloques.
+    """
+    h = hashlib.sha1()
+    with open(ruta, "rb") as f:
+        for trozo in iter(lambda: f.read(bloque), b""):
+            h.update(trozo)
+    return h.hexdigest()
+
+@st.cache_data(show_spinner=False)
+def _hash_por_firma(ruta, mtime, tamano):
+    # La firma evita volver a leer el archivo en cada rerun para calcular el hash
+    return hash_contenido(ruta)
+
+def obtener_miniatura(ruta):
+    """
+    Devuelve la ruta de una miniatura WebP reducida de la imagen.
+
+    Las miniaturas se guardan en disco con el hash del contenido como nombre,
+    así que cada imagen se procesa una sola vez aunque se renombre o se regenere igual.
+    """
+    huella = _hash_por_firma(*firma_archivo(ruta))
+    carpeta = os.path.join(CARPETA_CACHE, "miniaturas")
+    destino = os.path.join(carpeta, f"{huella}_{TAMANO_MINIATURA}.webp")
+
+    if not os.path.exists(destino):
+        from PIL import Image
+        os.makedirs(carpeta, exist_ok=True)
+        temporal = f"{destino}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with Image.open(ruta) as img:
+            img.thumbnail((TAMANO_MINIATURA, TAMANO_MINIATURA), Image.LANCZOS)
+            img.save(temporal, format="WEBP", quality=CALIDAD_MINIATURA, method=6)
+        os.replace(temporal, destino)
+    return destino
+
+def _usa_sql(ruta_datos):
+    """
+    True si las figuras se pueden calcular con consultas SQL (DuckDB) sobre el
+    Parquet; si no, salen del cubo de indicadores y de la encuesta en memoria.
+    """
+    from consultas_sql import disponible
+    return ruta_datos.endswith(".parquet") and disponible()
+
+@st.cache_data(show_spinner="Preparando gráficos interactivos...", max_entries=16)
+def _figuras_por_firma(firmas, ruta_datos, filtros):
+    """
+    Especificaciones JSON de las figuras de analasis_KDD.py para una versión de los
+    datos y unos filtros. Se guardan en disco con el hash de la firma (y de los
+    filtros) como nombre, así que cada vista se construye y serializa una sola vez
+    (también entre reinicios).
+    """
+    clave_datos = hashlib.sha1(repr(firmas).encode("utf-8")).hexdigest()
+    clave_filtros = hashlib.sha1(repr(filtros).encode("utf-8")).hexdigest()[:12]
+    carpeta = os.path.join(CARPETA_CACHE, "figuras")
+    destino = os.path.join(carpeta, f"{clave_datos}_{clave_filtros}.json")
+
+    if os.path.exists(destino):
+        with open(destino, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    if _usa_sql(ruta_datos):
+        # Solo se leen del Parquet las columnas y filas de cada consulta
+        from consultas_sql import ConsultasEncuesta
+        from analasis_KDD import construir_figuras_sql
+        figuras = construir_figuras_sql(ConsultasEncuesta(ruta_datos), filtros=dict(filtros))
+    else:
+        from analasis_KDD import cargar_datos_kdd, construir_figuras_kdd
+        df_main, cubo = cargar_datos_kdd(CARPETA_DATOS, os.path.basename(ruta_datos))
+        figuras = construir_figuras_kdd(df_main, cubo, filtros=dict(filtros))
+    especificaciones = {nombre: fig.to_json() for nombre, fig in figuras.items()}
+
+    os.makedirs(carpeta, exist_ok=True)
+    temporal = f"{destino}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(temporal, "w", encoding="utf-8") as f:
+        json.dump(especificaciones, f)
+    os.replace(temporal, destino)
+    # Las figuras de versiones anteriores de los datos ya no se usan
+    for viejo in glob.glob(os.path.join(carpeta, "*.json")):
+        if not os.path.basename(viejo).startswith(clave_datos):
             try:
-                st.image(img_path, caption=os.path.basename(img_path), use_column_width=True)
-            except Exception as e:
-                st.warning(f"⚠️ Error mostrando {os.path.basename(img_path)}: {e}")
-            
-else:
-    st.info("ℹ️ No se encontraron archivos de imagen (.png).")
+                os.remove(viejo)
+            except OSError:
+                pass
+    return especificaciones
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def _opciones_por_firma(firmas, ruta_datos):
+    """
+    Valores de cada filtro de los gráficos interactivos ({dimensión: [valores]}) y
+    el nombre de cada código de carrera.
+    """
+    from carreras import catalogo_carreras
+    if _usa_sql(ruta_datos):
+        from consultas_sql import ConsultasEncuesta
+        opciones = ConsultasEncuesta(ruta_datos).opciones_filtros()
+    else:
+        from analasis_KDD import cargar_datos_kdd, opciones_filtros_kdd
+        _, cubo = cargar_datos_kdd(CARPETA_DATOS, os.path.basename(ruta_datos))
+        opciones = opciones_filtros_kdd(cubo)
+    nombres = {codigo: catalogo_carreras().nombre(codigo) for codigo in opciones["Cod_Carrera"]}
+    return opciones, nombres
 
+def _firmas_interactivas(ruta_datos):
+    """
+    Firma de los datos de los gráficos interactivos (incluye el cubo de
+    indicadores, si existe).
+    """
+    from carga_datos import ARCHIVO_CUBO
+    rutas = [ruta_datos]
+    ruta_cubo = os.path.join(CARPETA_DATOS, ARCHIVO_CUBO)
+    if os.path.exists(ruta_cubo):
+        rutas.append(ruta_cubo)
+    return tuple(firma_archivo(r) for r in rutas)
+
+def figuras_interactivas(ruta_datos, filtros=()):
+    """
+    Devuelve {nombre: JSON} de las figuras para la versión actual de los datos,
+    con `filtros` ((dimensión, (valores...)), ...).
+    """
+    return _figuras_por_firma(_firmas_interactivas(ruta_datos), ruta_datos, tuple(filtros))
 
+def opciones_interactivas(ruta_datos):
+    return _opciones_por_firma(_firmas_interactivas(ruta_datos), ruta_datos)
 
-# --- SECCIÓN 4: DESCARGAR ARCHIVOS ---
-st.subheader("⬇️ Descargar archivos")
+# --- SECCIONES ---
+# Cada sección es una función y solo se ejecuta la de la pestaña abierta: la
+# primera pintura no lee la encuesta ni importa pandas ni plotly si no hacen falta.
+
+def archivos_encuesta():
+    """
+    Devuelve (parquet, csv, xlsx) de la carpeta de datos.
+    """
+    # Solo la encuesta: en la carpeta también está el cubo de indicadores (cubo_*.parquet)
+    return (buscar_archivos(CARPETA_DATOS, "encuesta_*.parquet"),
+            buscar_archivos(CARPETA_DATOS, "*.csv"),
+            buscar_archivos(CARPETA_DATOS, "*.xlsx"))
+
+# Nota: el nombre del archivo tiene un typo: "varibales" → lo dejamos así para que funcione
+ARCHIVO_DICCIONARIO = "Diccionario de varibales.xlsx"
+
+def seccion_datos():
+    st.subheader("🔍 Datos completos de la encuesta")
+    parquet_files, csv_files, xlsx_files = archivos_encuesta()
+
+    # Se prefiere el Parquet que genera limpiar_datos.py: es tipado y mucho más rápido de leer
+    if parquet_files:
+        try:
+            df_parquet = cargar_tabla(parquet_files[0])
+            st.write(f"📄 Archivo cargado: `{os.path.basename(parquet_files[0])}`")
+            st.write(f"🔢 Total de filas: **{len(df_parquet)}** • Columnas: **{len(df_parquet.columns)}**")
+            mostrar_tabla_paginada(df_parquet, "tabla_encuesta", firma_archivo(parquet_files[0]))
+        except Exception as e:
+            st.error(f"❌ Error al cargar Parquet: {e}")
+
+    elif csv_files:
+        try:
+            df_csv = cargar_tabla(csv_files[0])
+            st.write(f"📄 Archivo cargado: `{os.path.basename(csv_files[0])}`")
+            st.write(f"🔢 Total de filas: **{len(df_csv)}** • Columnas: **{len(df_csv.columns)}**")
+            mostrar_tabla_paginada(df_csv, "tabla_encuesta", firma_archivo(csv_files[0]))
+        except Exception as e:
+            st.error(f"❌ Error al cargar CSV: {e}")
+
+    elif xlsx_files:
+        try:
+            df_xlsx = cargar_tabla(xlsx_files[0])
+            st.write(f"📄 Archivo cargado: `{os.path.basename(xlsx_files[0])}`")
+            st.write(f"🔢 Total de filas: **{len(df_xlsx)}** • Columnas: **{len(df_xlsx.columns)}**")
+            mostrar_tabla_paginada(df_xlsx, "tabla_encuesta", firma_archivo(xlsx_files[0]))
+        except Exception as e:
+            st.error(f"❌ Error al cargar XLSX: {e}")
+    else:
+        st.warning("⚠️ No se encontró ningún archivo de datos (.parquet, .csv o .xlsx).")
+
+def seccion_diccionario():
+    st.subheader("📋 Diccionario de variables")
+    diccionario_files = buscar_archivos(CARPETA_DATOS, ARCHIVO_DICCIONARIO)
+
+    if diccionario_files:
+        try:
+            df_dicc = cargar_tabla(diccionario_files[0])
+            st.write(f"📘 Archivo cargado: `{os.path.basename(diccionario_files[0])}`")
+            st.dataframe(df_dicc, width="stretch", height=400)
+        except Exception as e:
+            st.error(f"❌ Error al cargar Diccionario de varibales: {e}")
+    else:
+        st.info("ℹ️ No se encontró el archivo `Diccionario de varibales.xlsx`.")
+
+def seccion_graficos():
+    st.subheader("📈 Gráficos generados")
+    png_files = buscar_archivos(CARPETA_DATOS, "*.png")
+
+    if png_files:
+        cols = st.columns(2)
+        for i, img_path in enumerate(png_files):
+            col = cols[i % 2]
+            with col:
+                try:
+                    # Se envía la miniatura; la imagen original solo cuando se amplía
+                    st.image(obtener_miniatura(img_path), caption=os.path.basename(img_path), width="stretch")
+                    if st.toggle("🔍 Ver en tamaño completo", key=f"ampliar_{i}"):
+                        st.image(img_path, width="stretch")
+                except Exception as e:
+                    st.warning(f"⚠️ Error mostrando {os.path.basename(img_path)}: {e}")
+
+    else:
+        st.info("ℹ️ No se encontraron archivos de imagen (.png).")
+
+def seccion_interactivos():
+    st.subheader("🖱️ Gráficos interactivos")
+    parquet_files, csv_files, _ = archivos_encuesta()
 
-with st.expander("📂 Archivos disponibles"):
+    # Mismas figuras que analasis_KDD.py, a partir de la encuesta limpia (Parquet o CSV)
+    datos_interactivos = parquet_files or csv_files
+    if datos_interactivos:
+        try:
+            import plotly.io as pio
+            opciones, nombres_carreras = opciones_interactivas(datos_interactivos[0])
+            filtros = []
+            for col, (dimension, etiqueta) in zip(st.columns(len(FILTROS_INTERACTIVOS)), FILTROS_INTERACTIVOS.items()):
+                with col:
+                    formato = nombres_carreras.get if dimension == "Cod_Carrera" else str
+                    seleccion = st.multiselect(etiqueta, opciones[dimension], format_func=formato,
+                                               placeholder="Todos", key=f"filtro_{dimension}")
+                if seleccion:
+                    filtros.append((dimension, tuple(seleccion)))
+            especificaciones = figuras_interactivas(datos_interactivos[0], filtros)
+            cols = st.columns(2)
+            for i, nombre in enumerate(["fig1", "fig2", "fig3"]):
+                with cols[i % 2]:
+                    st.plotly_chart(pio.from_json(especificaciones[nombre], skip_invalid=True),
+                                    width="stretch", key=f"interactivo_{nombre}")
+            st.plotly_chart(pio.from_json(especificaciones["fig4"], skip_invalid=True),
+                            width="stretch", key="interactivo_fig4")
+        except Exception as e:
+            st.error(f"❌ Error al generar los gráficos interactivos: {e}")
+    else:
+        st.info("ℹ️ No se encontró la encuesta limpia para los gráficos interactivos.")
+
+def seccion_metricas():
+    st.subheader("⏱️ Métricas de las ejecuciones")
+    from metricas import ARCHIVO_METRICAS as ruta
+    if not os.path.exists(ruta):
+        st.info(f"ℹ️ Todavía no hay métricas: se registran en `{os.path.basename(ruta)}` al ejecutar los scripts de la carpeta {CARPETA_DATOS}.")
+        return
+
+    try:
+        import plotly.express as px
+        df = cargar_tabla(ruta)
+        col1, col2 = st.columns(2)
+        with col1:
+            script = st.selectbox("Script", sorted(df["script"].unique()), key="metricas_script")
+        with col2:
+            medida = st.radio("Medida", ["segundos", "cpu_s", "rss_max_mb"], horizontal=True, key="metricas_medida",
+                              format_func={"segundos": "Tiempo real (s)", "cpu_s": "CPU (s)", "rss_max_mb": "Pico de memoria (MB)"}.get)
+
+        df = df[df["script"] == script]
+        ejecuciones = df.drop_duplicates("ejecucion").sort_values("inicio")["ejecucion"].tail(MAX_EJECUCIONES_METRICAS)
+        df = df[df["ejecucion"].isin(ejecuciones)].sort_values("inicio")
+        etapas = df[df["etapa"] != "total"]
+        detalles = [c for c in ("modo", "filas", "veces") if c in df.columns]
+
+        # Tiempos: una barra por ejecución con sus etapas apiladas; memoria: el pico
+        # del proceso al terminar cada etapa
+        if medida == "rss_max_mb":
+            figura = px.line(etapas, x="inicio", y=medida, color="etapa", markers=True, hover_data=detalles)
+        else:
+            figura = px.bar(etapas, x="inicio", y=medida, color="etapa", hover_data=detalles)
+        figura.update_layout(xaxis_title="Ejecución", xaxis_type="category", legend_title="Etapa")
+        st.plotly_chart(figura, width="stretch", key="metricas_grafico")
+
+        ultima = df[df["ejecucion"] == ejecuciones.iloc[-1]]
+        st.write(f"Última ejecución: **{ultima['inicio'].iloc[0]}**")
+        columnas = ["etapa", "segundos", "cpu_s", "rss_max_mb", "incremento_rss_mb", "filas", "veces"]
+        st.dataframe(ultima[[c for c in columnas if c in ultima.columns]], width="stretch", hide_index=True)
+    except Exception as e:
+        st.error(f"❌ Error al cargar las métricas: {e}")
+
+def seccion_descargas():
+    parquet_files, csv_files, xlsx_files = archivos_encuesta()
     all_files = []
+    all_files.extend(parquet_files)
     all_files.extend(csv_files)
     all_files.extend(xlsx_files)
-    all_files.extend(diccionario_files)
-    all_files.extend(png_files)
+    all_files.extend(buscar_archivos(CARPETA_DATOS, ARCHIVO_DICCIONARIO))
+    all_files.extend(buscar_archivos(CARPETA_DATOS, "*.png"))
+    all_files = list(dict.fromkeys(all_files))  # El diccionario también aparece entre los .xlsx
 
     if all_files:
-        for i, file_path in enumerate(all_files):
-            with open(file_path, "rb") as f:
-                st.download_button(
-                    label=f"📥 Descargar {os.path.basename(file_path)}",
-                    data=f,
-                    file_name=os.path.basename(file_path),
-                    mime="application/octet-stream",
-                    help=f"Haz clic para descargar {os.path.basename(file_path)}",
-                    key=f"download_{i}"
+        # El ZIP se arma solo cuando se pide y se descarga con un enlace al archivo
+        # estático, no con st.download_button, que mandaría el ZIP entero como bytes
+        destino = ruta_zip(all_files)
+        if os.path.exists(destino) or st.button(
+            f"🗜️ Preparar ZIP ({len(all_files)} archivos)",
+            help="Empaqueta todos los archivos en un único ZIP",
+            key="preparar_zip"
+        ):
+            with st.spinner("Empaquetando archivos..."):
+                construir_zip(all_files)
+            tamano_mb = os.path.getsize(destino) / 1024 ** 2
+            if tamano_mb > LIMITE_ESTATICO_MB:
+                st.warning(
+                    f"El ZIP pesa {tamano_mb:.0f} MB y Streamlit no sirve archivos estáticos "
+                    f"de más de {LIMITE_ESTATICO_MB} MB; descarga los archivos uno por uno."
                 )
+            else:
+                st.markdown(
+                    f'<a href="{URL_ZIP}/{os.path.basename(destino)}" download="{CARPETA_DATOS}.zip">'
+                    f'🗜️ Descargar todo ({len(all_files)} archivos, .zip, {tamano_mb:.1f} MB)</a>',
+                    unsafe_allow_html=True
+                )
+        # Los datos se pasan como callables: ningún archivo se lee hasta que se pide
+        for i, file_path in enumerate(all_files):
+            st.download_button(
+                label=f"📥 Descargar {os.path.basename(file_path)}",
+                data=partial(leer_bytes, file_path),
+                file_name=os.path.basename(file_path),
+                mime="application/octet-stream",
+                help=f"Haz clic para descargar {os.path.basename(file_path)}",
+                key=f"download_{i}"
+            )
     else:
         st.info("No hay archivos para descargar.")
 
+# Pestañas con estado (on_change="rerun"): cada rerun ejecuta solo la pestaña
+# abierta. Los gráficos van primero porque son lo más liviano y lo más consultado.
+SECCIONES = [
+    ("📈 Gráficos", seccion_graficos),
+    ("🖱️ Gráficos interactivos", seccion_interactivos),
+    ("🔍 Datos de la encuesta", seccion_datos),
+    ("📋 Diccionario de variables", seccion_diccionario),
+    ("⏱️ Métricas", seccion_metricas),
+]
+pestanas = st.tabs([nombre for nombre, _ in SECCIONES], key="seccion", on_change="rerun")
+for pestana, (_, seccion) in zip(pestanas, SECCIONES):
+    with pestana:
+        if pestana.open:
+            seccion()
+
+# --- DESCARGAS ---
+st.subheader("⬇️ Descargar archivos")
+
+# La lista de archivos solo se arma cuando se abre el expander
+descargas = st.expander("📂 Archivos disponibles", key="descargas", on_change="rerun")
+with descargas:
+    if descargas.open:
+        seccion_descargas()
+
 
 # --- PIE DE PÁGINA ---
 st.markdown("---")
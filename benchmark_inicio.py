@@ -0,0 +1,115 @@
+"""
+Mide el arranque del dashboard (app.py) para detectar regresiones.
+
+Cada repetición corre en un proceso nuevo (imports en frío) y mide:
+  - importacion: tiempo de importar streamlit;
+  - primera_pintura: tiempo de la primera ejecución completa de app.py (con la
+    pestaña por defecto), incluidos los imports que hace el propio script;
+  - modulos_pesados: cuáles de MODULOS_PESADOS quedaron importados después de
+    la primera pintura (deberían ser ninguno: se cargan al abrir cada sección).
+
+Uso:
+    python benchmark_inicio.py [--repeticiones 5] [--salida benchmark_inicio.json]
+                               [--referencia ANTERIOR.json] [--tolerancia 0.25]
+
+Con --referencia el script termina con código 1 si la mediana de la primera
+pintura empeoró más que la tolerancia, o si se importa algún módulo pesado.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import statistics
+import subprocess
+
+RAIZ = os.path.dirname(os.path.abspath(__file__))
+APP = os.path.join(RAIZ, "app.py")
+
+# Módulos que no deberían importarse hasta abrir la sección que los usa (plotly no
+# está: lo importa el propio streamlit)
+MODULOS_PESADOS = ["pandas", "pyarrow", "scipy", "seaborn", "matplotlib", "analasis_KDD"]
+
+# Lo que corre en cada proceso nuevo; imprime una línea JSON con las medidas
+MEDICION = """
+import sys, json, time
+t0 = time.perf_counter()
+import streamlit
+from streamlit.testing.v1 import AppTest
+t1 = time.perf_counter()
+at = AppTest.from_file({app!r}, default_timeout=300).run()
+t2 = time.perf_counter()
+print(json.dumps({{
+    "importacion": t1 - t0,
+    "primera_pintura": t2 - t1,
+    "errores": [e.message for e in at.exception],
+    "modulos_pesados": [m for m in {modulos!r} if m in sys.modules],
+}}))
+"""
+
+
+def medir_una_vez():
+    codigo = MEDICION.format(app=APP, modulos=MODULOS_PESADOS)
+    salida = subprocess.run([sys.executable, "-c", codigo], cwd=RAIZ, capture_output=True, text=True, check=True)
+    return json.loads(salida.stdout.strip().splitlines()[-1])
+
+
+def medir(repeticiones):
+    corridas = [medir_una_vez() for _ in range(repeticiones)]
+    return {
+        "fecha": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "maquina": platform.node(),
+        "repeticiones": repeticiones,
+        "importacion_mediana_s": statistics.median(c["importacion"] for c in corridas),
+        "primera_pintura_mediana_s": statistics.median(c["primera_pintura"] for c in corridas),
+        "total_mediana_s": statistics.median(c["importacion"] + c["primera_pintura"] for c in corridas),
+        "modulos_pesados": sorted({m for c in corridas for m in c["modulos_pesados"]}),
+        "errores": sorted({e for c in corridas for e in c["errores"]}),
+        "corridas": corridas,
+    }
+
+
+def comparar(resultado, referencia, tolerancia):
+    """
+    Devuelve la lista de regresiones respecto de `referencia` (vacía si no hay).
+    """
+    problemas = []
+    limite = referencia["primera_pintura_mediana_s"] * (1 + tolerancia)
+    if resultado["primera_pintura_mediana_s"] > limite:
+        problemas.append(
+            f"primera pintura {resultado['primera_pintura_mediana_s']:.3f} s > "
+            f"{limite:.3f} s (referencia {referencia['primera_pintura_mediana_s']:.3f} s + {tolerancia:.0%})"
+        )
+    if resultado["modulos_pesados"]:
+        problemas.append(f"módulos pesados importados al arrancar: {', '.join(resultado['modulos_pesados'])}")
+    if resultado["errores"]:
+        problemas.append(f"errores en la primera pintura: {resultado['errores']}")
+    return problemas
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Tiempo de arranque del dashboard (importación + primera pintura).")
+    parser.add_argument("--repeticiones", type=int, default=5)
+    parser.add_argument("--salida", default="benchmark_inicio.json", help="Archivo JSON con los resultados.")
+    parser.add_argument("--referencia", help="Resultados anteriores con los que comparar.")
+    parser.add_argument("--tolerancia", type=float, default=0.25,
+                        help="Empeoramiento relativo admitido de la primera pintura (por defecto 0.25).")
+    args = parser.parse_args()
+
+    resultado = medir(args.repeticiones)
+    with open(args.salida, "w", encoding="utf-8") as f:
+        json.dump(resultado, f, ensure_ascii=False, indent=2)
+
+    print(f"Importación de streamlit: {resultado['importacion_mediana_s']:.3f} s (mediana de {args.repeticiones})")
+    print(f"Primera pintura de app.py: {resultado['primera_pintura_mediana_s']:.3f} s")
+    print(f"Módulos pesados importados: {', '.join(resultado['modulos_pesados']) or 'ninguno'}")
+    print(f"Resultados guardados en '{args.salida}'")
+
+    if args.referencia:
+        with open(args.referencia, "r", encoding="utf-8") as f:
+            problemas = comparar(resultado, json.load(f), args.tolerancia)
+        for problema in problemas:
+            print(f"REGRESIÓN: {problema}")
+        sys.exit(1 if problemas else 0)
@@ -0,0 +1,280 @@
+"""
+Mide el pipeline de la encuesta con datos sintéticos de distintos tamaños.
+
+Para cada escala se genera una exportación sintética con la forma de la real
+(Miproyecto1/generador_encuesta.py) en una carpeta temporal y se mide cada etapa
+en un proceso nuevo (así el pico de memoria es el de esa etapa):
+  - generacion: escribir la exportación sintética (XLSX si cabe en una hoja);
+  - limpieza / limpieza_streaming: limpiar_datos.main() en modo normal y por bloques;
+  - mapeo_likert: codificar_likert de las 27 preguntas;
+  - indicadores: agregar_indicadores (promedios por fila);
+  - hipotesis: código de carrera, correlaciones H1-H5 y ANOVA / Kruskal-Wallis
+    de los indicadores por carrera;
+  - carga_app: lo que lee app.py (tabla de la pestaña Datos y cargar_datos_kdd
+    de la pestaña de gráficos interactivos).
+De cada etapa se guardan los segundos, el tiempo de CPU, el pico de memoria del
+proceso (RSS) y las filas procesadas. La limpieza lee un XLSX, que admite como
+máximo MAX_FILAS_EXCEL filas: por encima se omite y los análisis usan la
+exportación sintética sin limpiar (guardada directamente en Parquet).
+
+Uso:
+    python benchmark_pipeline.py [--escalas 1k 100k 1M 10M] [--salida benchmark_pipeline.json]
+                                 [--referencia ANTERIOR.json] [--tolerancia 0.25]
+
+Con --referencia el script termina con código 1 si alguna etapa tardó o usó más
+memoria que la referencia más la tolerancia.
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import subprocess
+
+RAIZ = os.path.dirname(os.path.abspath(__file__))
+CARPETA_CODIGO = os.path.join(RAIZ, "Miproyecto1")
+
+ETAPAS = ["generacion", "limpieza", "limpieza_streaming", "mapeo_likert", "indicadores", "hipotesis", "carga_app"]
+
+# Diferencia mínima para considerar una regresión (evita falsas alarmas en las
+# etapas que duran milisegundos)
+MIN_DIFERENCIA_S = 0.05
+MIN_DIFERENCIA_MB = 20
+
+
+# --- Etapas (cada una corre en su propio proceso, con la carpeta de trabajo como cwd) ---
+
+def _medir(funcion, *args):
+    """
+    Ejecuta `funcion(*args)` (que devuelve las filas procesadas) y mide su tiempo
+    real, su tiempo de CPU y el pico de memoria del proceso antes y después.
+    """
+    from metricas import rss_max_mb
+    rss_previo = rss_max_mb()
+    cpu, inicio = time.process_time(), time.perf_counter()
+    filas = funcion(*args)
+    return {
+        "segundos": time.perf_counter() - inicio,
+        "cpu_s": time.process_time() - cpu,
+        "rss_previo_mb": rss_previo,
+        "rss_max_mb": rss_max_mb(),
+        "filas": int(filas),
+    }
+
+
+def _leer_encuesta():
+    from carga_datos import cargar_encuesta_limpia
+    from esquema_encuesta import RENAME_DICT
+    return cargar_encuesta_limpia(columnas=list(RENAME_DICT)).rename(columns=RENAME_DICT)
+
+
+def _filas_parquet(ruta):
+    import pyarrow.parquet as pq
+    return pq.ParquetFile(ruta).metadata.num_rows
+
+
+def etapa_generacion(filas, excel):
+    from generador_encuesta import generar_encuesta
+    from limpiar_datos import ARCHIVO_ENTRADA
+    from carga_datos import ARCHIVO_PARQUET
+    destino = ARCHIVO_ENTRADA if excel else ARCHIVO_PARQUET
+    return _medir(generar_encuesta, filas, destino)
+
+
+def etapa_limpieza(streaming):
+    import limpiar_datos
+
+    def limpiar():
+        limpiar_datos.main(streaming=streaming)
+        return _filas_parquet(limpiar_datos.ARCHIVO_SALIDA_PARQUET)
+    medida = _medir(limpiar)
+    # Desglose por etapa que limpiar_datos registró en el archivo de métricas
+    medida["detalle"] = _detalle_ultima_ejecucion()
+    return medida
+
+
+def _detalle_ultima_ejecucion():
+    from metricas import ARCHIVO_METRICAS
+    with open(ARCHIVO_METRICAS, "r", encoding="utf-8") as f:
+        lineas = [json.loads(linea) for linea in f if linea.strip()]
+    ultima = lineas[-1]["ejecucion"]
+    return {l["etapa"]: {"segundos": l["segundos"], "rss_max_mb": l["rss_max_mb"]}
+            for l in lineas if l["ejecucion"] == ultima}
+
+
+def etapa_mapeo_likert():
+    from esquema_encuesta import codificar_likert
+    df = _leer_encuesta()
+    return _medir(lambda: len(codificar_likert(df)))
+
+
+def etapa_indicadores():
+    from esquema_encuesta import codificar_likert, agregar_indicadores
+    likert = codificar_likert(_leer_encuesta())
+    return _medir(lambda: len(agregar_indicadores(likert)))
+
+
+def etapa_hipotesis():
+    from esquema_encuesta import COL_GROUPS, codificar_likert
+    from correlaciones import correlaciones_hipotesis
+    from anova_grupos import EstadisticosGrupos
+    from carreras import catalogo_carreras
+    from analisis_descriptivo import HIPOTESIS_CORRELACION
+
+    df = _leer_encuesta()
+    likert = codificar_likert(df)
+    # Las mismas variables que arma analisis_descriptivo.run_full_analysis
+    variables = likert.assign(
+        COMP_DIGITAL=likert[COL_GROUPS['Ind1_Tecnicas']].mean(axis=1),
+        COMP_BLANDAS=likert[COL_GROUPS['Ind1_Blandas']].mean(axis=1),
+        COMP_PERTINENCIA=likert[COL_GROUPS['Ind2_Pertinencia']].mean(axis=1),
+        COMP_FACTORES=likert[COL_GROUPS['Ind3_Factores']].mean(axis=1),
+        COMP_UNIV_PROF=likert[COL_GROUPS['Ind4_Universidad']].mean(axis=1),
+        PERCEP_IA=likert['P4_IA_Oportunidades'],
+        DOMINIO_DATOS=likert['P1_Analisis_Datos'],
+    )
+    indicadores = ['COMP_DIGITAL', 'COMP_BLANDAS', 'COMP_PERTINENCIA', 'COMP_FACTORES', 'COMP_UNIV_PROF']
+
+    def probar():
+        variables['COD_CARRERA'] = catalogo_carreras().codificar(df['Demo_Carrera'])
+        correlaciones_hipotesis(variables.drop(columns='COD_CARRERA'), HIPOTESIS_CORRELACION)
+        por_carrera = EstadisticosGrupos.desde_datos(variables, 'COD_CARRERA', indicadores)
+        por_carrera.anova()
+        por_carrera.kruskal()
+        return len(variables)
+    return _medir(probar)
+
+
+def etapa_carga_app():
+    import pandas as pd
+    from carga_datos import ARCHIVO_PARQUET
+    from analasis_KDD import cargar_datos_kdd
+
+    def cargar():
+        # Igual que app.leer_tabla (pestaña Datos) y app.figuras_interactivas
+        pd.read_parquet(ARCHIVO_PARQUET, engine="pyarrow", memory_map=True)
+        df_main, _ = cargar_datos_kdd(".")
+        return len(df_main)
+    return _medir(cargar)
+
+
+def medir_etapa(etapa, filas, excel):
+    if etapa == "generacion":
+        return etapa_generacion(filas, excel)
+    if etapa in ("limpieza", "limpieza_streaming"):
+        return etapa_limpieza(streaming=etapa == "limpieza_streaming")
+    return globals()[f"etapa_{etapa}"]()
+
+
+# --- Orquestación ---
+
+def correr_etapa(etapa, filas, excel, carpeta):
+    entorno = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [CARPETA_CODIGO, os.environ.get("PYTHONPATH")])),
+                   MPLBACKEND="Agg")
+    comando = [sys.executable, os.path.abspath(__file__), "--etapa", etapa, "--filas", str(filas)]
+    if excel:
+        comando.append("--excel")
+    salida = subprocess.run(comando, cwd=carpeta, env=entorno, capture_output=True, text=True)
+    if salida.returncode != 0:
+        return {"error": salida.stderr.strip().splitlines()[-1] if salida.stderr.strip() else f"código {salida.returncode}"}
+    return json.loads(salida.stdout.strip().splitlines()[-1])
+
+
+def medir_escala(nombre, filas):
+    from generador_encuesta import MAX_FILAS_EXCEL
+    from carreras import ARCHIVO_RESOLUCIONES_CARRERAS
+    excel = filas <= MAX_FILAS_EXCEL
+    resultados = []
+    with tempfile.TemporaryDirectory(prefix=f"benchmark_{nombre}_") as carpeta:
+        for etapa in ETAPAS:
+            if etapa.startswith("limpieza"):
+                if not excel:
+                    resultados.append({"escala": nombre, "etapa": etapa, "omitida":
+                                       f"la limpieza lee un XLSX (máximo {MAX_FILAS_EXCEL:,} filas)"})
+                    continue
+                # Cada limpieza empieza sin cachés ni salidas anteriores (el caché de
+                # carreras está junto al código, no en la carpeta de trabajo)
+                shutil.rmtree(os.path.join(carpeta, ".cache_limpieza"), ignore_errors=True)
+                shutil.rmtree(os.path.dirname(ARCHIVO_RESOLUCIONES_CARRERAS), ignore_errors=True)
+            medida = correr_etapa(etapa, filas, excel, carpeta)
+            resultados.append({"escala": nombre, "etapa": etapa, **medida})
+            estado = medida.get("error") or f"{medida['segundos']:.2f} s, {medida['rss_max_mb']:.0f} MB, {medida['filas']:,} filas"
+            print(f"  [{nombre}] {etapa}: {estado}", flush=True)
+    return resultados
+
+
+def medir(escalas):
+    from generador_encuesta import ESCALAS_BENCHMARK
+    resultados = []
+    for nombre in escalas:
+        filas = ESCALAS_BENCHMARK.get(nombre) or int(nombre)
+        print(f"Escala {nombre} ({filas:,} filas)", flush=True)
+        resultados.extend(medir_escala(nombre, filas))
+    return {
+        "fecha": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "maquina": platform.node(),
+        "cpus": os.cpu_count(),
+        "escalas": list(escalas),
+        "resultados": resultados,
+    }
+
+
+def comparar(resultado, referencia, tolerancia):
+    """
+    Devuelve la lista de regresiones respecto de `referencia` (vacía si no hay).
+    """
+    anteriores = {(r["escala"], r["etapa"]): r for r in referencia["resultados"] if "segundos" in r}
+    problemas = []
+    for r in resultado["resultados"]:
+        if "error" in r:
+            problemas.append(f"[{r['escala']}] {r['etapa']}: error {r['error']}")
+            continue
+        anterior = anteriores.get((r["escala"], r["etapa"]))
+        if anterior is None or "segundos" not in r:
+            continue
+        for campo, unidad, minimo in (("segundos", "s", MIN_DIFERENCIA_S), ("rss_max_mb", "MB", MIN_DIFERENCIA_MB)):
+            limite = max(anterior[campo] * (1 + tolerancia), anterior[campo] + minimo)
+            if r[campo] > limite:
+                problemas.append(f"[{r['escala']}] {r['etapa']}: {campo} {r[campo]:.2f} {unidad} > {limite:.2f} {unidad} "
+                                 f"(referencia {anterior[campo]:.2f} {unidad} + {tolerancia:.0%})")
+    return problemas
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Tiempo y memoria de cada etapa del pipeline con datos sintéticos.")
+    parser.add_argument("--escalas", nargs="+", default=["1k", "100k", "1M", "10M"],
+                        help="Tamaños a medir: 1k, 100k, 1M, 10M o un número de filas.")
+    parser.add_argument("--salida", default="benchmark_pipeline.json", help="Archivo JSON con los resultados.")
+    parser.add_argument("--referencia", help="Resultados anteriores con los que comparar.")
+    parser.add_argument("--tolerancia", type=float, default=0.25,
+                        help="Empeoramiento relativo admitido de tiempo y memoria (por defecto 0.25).")
+    # Uso interno: medir una sola etapa en este proceso
+    parser.add_argument("--etapa", choices=ETAPAS, help=argparse.SUPPRESS)
+    parser.add_argument("--filas", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--excel", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.etapa:
+        # Las métricas de los scripts medidos quedan en la carpeta temporal, no
+        # mezcladas con las de las ejecuciones reales
+        import metricas
+        metricas.ARCHIVO_METRICAS = os.path.abspath(os.path.basename(metricas.ARCHIVO_METRICAS))
+        print(json.dumps(medir_etapa(args.etapa, args.filas, args.excel)))
+        sys.exit(0)
+
+    sys.path.insert(0, CARPETA_CODIGO)
+    resultado = medir(args.escalas)
+    with open(args.salida, "w", encoding="utf-8") as f:
+        json.dump(resultado, f, ensure_ascii=False, indent=2)
+    print(f"Resultados guardados en '{args.salida}'")
+
+    if args.referencia:
+        with open(args.referencia, "r", encoding="utf-8") as f:
+            problemas = comparar(resultado, json.load(f), args.tolerancia)
+        for problema in problemas:
+            print(f"REGRESIÓN: {problema}")
+        sys.exit(1 if problemas else 0)
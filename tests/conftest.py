@@ -0,0 +1,7 @@
+import os
+import sys
+
+# Los módulos del proyecto están en Miproyecto1 y se importan por nombre, igual
+# que desde los scripts y app.py
+CARPETA_MODULOS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'Miproyecto1')
+sys.path.insert(0, CARPETA_MODULOS)
@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+import pytest
+import scipy.stats as stats
+from anova_grupos import EstadisticosGrupos
+
+
+def _respuestas(filas=300, semilla=2):
+    rng = np.random.default_rng(semilla)
+    grupo = rng.choice(['Finanzas', 'Marketing', 'Turismo', None], filas, p=[0.4, 0.3, 0.25, 0.05])
+    df = pd.DataFrame({
+        'grupo': grupo,
+        'likert': rng.integers(1, 6, filas).astype(float),  # Muchos empates
+        'promedio': rng.integers(4, 21, filas) / 4,
+    })
+    df.loc[df['grupo'] == 'Turismo', 'likert'] += 1
+    df.loc[rng.random(filas) < 0.1, 'likert'] = np.nan
+    df.loc[rng.random(filas) < 0.1, 'promedio'] = np.nan
+    return df
+
+
+def _por_grupo(df, medida):
+    validas = df.dropna(subset=['grupo', medida])
+    return [g[medida].to_numpy() for _, g in validas.groupby('grupo', sort=True)]
+
+
+def test_igual_que_scipy():
+    df = _respuestas()
+    estadisticos = EstadisticosGrupos.desde_datos(df, 'grupo', ['likert', 'promedio'])
+    anova, kruskal = estadisticos.anova(), estadisticos.kruskal()
+    for medida in ('likert', 'promedio'):
+        grupos = _por_grupo(df, medida)
+        f, p = stats.f_oneway(*grupos)
+        assert anova.at[medida, 'F'] == pytest.approx(f, rel=1e-9)
+        assert anova.at[medida, 'p'] == pytest.approx(p, rel=1e-7)
+        h, p = stats.kruskal(*grupos)
+        assert kruskal.at[medida, 'H'] == pytest.approx(h, rel=1e-9)
+        assert kruskal.at[medida, 'p'] == pytest.approx(p, rel=1e-7)
+        assert anova.at[medida, 'n'] == kruskal.at[medida, 'n'] == sum(len(g) for g in grupos)
+
+
+def test_combinar_lotes_igual_que_todo():
+    df = _respuestas()
+    todo = EstadisticosGrupos.desde_datos(df, 'grupo', ['likert', 'promedio'])
+    lotes = [EstadisticosGrupos.desde_datos(df.iloc[i:i + 70], 'grupo', ['likert', 'promedio'])
+             for i in range(0, len(df), 70)]
+    combinado = lotes[0]
+    for lote in lotes[1:]:
+        combinado = combinado.combinar(lote)
+    pd.testing.assert_frame_equal(combinado.anova(), todo.anova(), rtol=1e-12)
+    pd.testing.assert_frame_equal(combinado.kruskal(), todo.kruskal(), rtol=1e-12)
+
+
+def test_seleccionar_grupos():
+    df = _respuestas()
+    estadisticos = EstadisticosGrupos.desde_datos(df, 'grupo', ['likert']).seleccionar(['Finanzas', 'Turismo'])
+    grupos = _por_grupo(df[df['grupo'].isin(['Finanzas', 'Turismo'])], 'likert')
+    assert estadisticos.anova().at['likert', 'F'] == pytest.approx(stats.f_oneway(*grupos)[0], rel=1e-9)
+    assert estadisticos.kruskal().at['likert', 'H'] == pytest.approx(stats.kruskal(*grupos)[0], rel=1e-9)
@@ -0,0 +1,29 @@
+import os
+import pandas as pd
+from carreras import CatalogoCarreras, ARCHIVO_RESOLUCIONES_CARRERAS, CODIGO_OTRA
+from conftest import CARPETA_MODULOS
+
+
+def test_cache_junto_al_codigo():
+    assert os.path.dirname(os.path.dirname(ARCHIVO_RESOLUCIONES_CARRERAS)) == CARPETA_MODULOS
+
+
+def test_guarda_solo_resoluciones_nuevas(tmp_path):
+    cache = tmp_path / 'resoluciones.json'
+    catalogo = CatalogoCarreras(ruta_cache=str(cache))
+    catalogo.codificar(pd.Series(['Finanzas', 'Lic en finanzas', None]))
+    assert not cache.exists()  # Todas estaban en el catálogo
+
+    catalogo.codificar(pd.Series(['Tecnologias de la informacon']))
+    fecha = cache.stat().st_mtime_ns
+    catalogo.codificar(pd.Series(['Tecnologias de la informacon', 'Finanzas']))
+    assert cache.stat().st_mtime_ns == fecha
+
+
+def test_coincidencias_dudosas_van_al_reporte():
+    catalogo = CatalogoCarreras(ruta_cache=None)
+    codigos = catalogo.codificar(pd.Series(['Tecnologias de la informacon', 'Finanza', 'Fiananzas']))
+    assert catalogo.nombre(codigos[0]) == 'Tecnologías de la Información'
+    assert codigos[1] == CODIGO_OTRA  # Similitud 0.8: no se asigna sola
+    assert catalogo.nombre(codigos[2]) == 'Finanzas'  # Variante del catálogo
+    assert list(catalogo.sin_catalogo) == ['Finanza']
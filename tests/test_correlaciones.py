@@ -0,0 +1,51 @@
+import numpy as np
+import pandas as pd
+import pytest
+import scipy.stats as stats
+from correlaciones import matriz_correlaciones, correlaciones_hipotesis
+
+
+def _likert(filas=200):
+    # Valores 1-5 (muchos empates) con faltantes en filas distintas de cada columna
+    rng = np.random.default_rng(1)
+    base = rng.integers(1, 6, filas)
+    df = pd.DataFrame({
+        'a': base,
+        'b': np.clip(base + rng.integers(-1, 2, filas), 1, 5),
+        'c': rng.integers(1, 6, filas),
+        'd': rng.integers(1, 6, filas).astype(float) / 2,
+    }).astype(float)
+    for col, fraccion in zip(df.columns, (0.05, 0.1, 0.2, 0.0)):
+        df.loc[rng.random(filas) < fraccion, col] = np.nan
+    return df
+
+
+@pytest.mark.parametrize('metodo, referencia', [('pearson', stats.pearsonr), ('spearman', stats.spearmanr)])
+def test_igual_que_scipy_por_pares(metodo, referencia):
+    df = _likert()
+    r, p, n = matriz_correlaciones(df, metodo)
+    for x in df.columns:
+        for y in df.columns:
+            if x == y:
+                continue
+            pares = df[[x, y]].dropna()
+            esperado = referencia(pares[x], pares[y])
+            assert n.at[x, y] == len(pares)
+            assert r.at[x, y] == pytest.approx(esperado[0], abs=1e-12)
+            assert p.at[x, y] == pytest.approx(esperado[1], rel=1e-9, abs=1e-15)
+
+
+def test_hipotesis_leen_la_matriz():
+    df = _likert()
+    resultado = correlaciones_hipotesis(df, [('H1', 'a', 'b'), ('H2', 'c', 'd')])
+    pares = df[['c', 'd']].dropna()
+    assert resultado.at['H2', 'n'] == len(pares)
+    assert resultado.at['H2', 'r_spearman'] == pytest.approx(stats.spearmanr(pares['c'], pares['d'])[0], abs=1e-12)
+    assert resultado.at['H1', 'r_pearson'] > 0.5
+
+
+def test_pares_sin_datos_suficientes():
+    df = pd.DataFrame({'a': [1.0, np.nan, 3.0], 'b': [np.nan, 2.0, 5.0]})
+    r, p, n = matriz_correlaciones(df, 'spearman')
+    assert n.at['a', 'b'] == 1
+    assert np.isnan(r.at['a', 'b']) and np.isnan(p.at['a', 'b'])
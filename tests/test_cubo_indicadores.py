@@ -0,0 +1,86 @@
+import os
+import numpy as np
+import pandas as pd
+import pytest
+from carga_datos import ARCHIVO_CUBO, ARCHIVO_PARQUET
+from carreras import CatalogoCarreras
+from esquema_encuesta import ESCALAS, ESCALA_POR_COLUMNA, COLUMNAS_LIKERT, codificar_likert, agregar_indicadores
+from cubo_indicadores import CuboIndicadores, MEDIDAS, cargar_cubo_vigente
+
+
+@pytest.fixture(scope='module')
+def catalogo():
+    return CatalogoCarreras(ruta_cache=None)
+
+
+def _encuesta(filas=400, semilla=4):
+    rng = np.random.default_rng(semilla)
+    datos = {
+        'Demo_Carrera': rng.choice(['Finanzas', 'FINANZAS', 'Lic en finanzas', 'Marketing', 'Ing. Forestal', None], filas),
+        'Demo_Semestre': rng.choice(['Primero', 'Quinto', 'Noveno'], filas),
+        'Demo_Genero': rng.choice(['Femenino', 'Masculino', None], filas, p=[0.5, 0.45, 0.05]),
+        'Demo_Edad': rng.choice([19.0, 21.0, 24.0, np.nan], filas),
+    }
+    for col in COLUMNAS_LIKERT:
+        etiquetas = np.array(ESCALAS[ESCALA_POR_COLUMNA[col]] + [None], dtype=object)
+        datos[col] = etiquetas[rng.integers(0, 6, filas)]
+    return pd.DataFrame(datos)
+
+
+def _por_bloques(df, catalogo, tamano=90):
+    cubo = None
+    for inicio in range(0, len(df), tamano):
+        bloque = CuboIndicadores.desde_encuesta(df.iloc[inicio:inicio + tamano], catalogo)
+        cubo = bloque if cubo is None else cubo.combinar(bloque)
+    return cubo
+
+
+def test_por_bloques_igual_que_una_pasada(catalogo):
+    df = _encuesta()
+    completo = CuboIndicadores.desde_encuesta(df, catalogo)
+    por_bloques = _por_bloques(df, catalogo)
+    pd.testing.assert_frame_equal(por_bloques.base, completo.base, rtol=1e-12)
+    pd.testing.assert_frame_equal(por_bloques.a_tabla(), completo.a_tabla(), rtol=1e-12)
+
+
+@pytest.mark.parametrize('por', [['Demo_Genero'], ['Cod_Carrera', 'Demo_Semestre']])
+def test_igual_que_groupby(catalogo, por):
+    df = _encuesta()
+    cubo = _por_bloques(df, catalogo)
+
+    valores = agregar_indicadores(codificar_likert(df, COLUMNAS_LIKERT))[MEDIDAS].astype(np.float64)
+    valores['Cod_Carrera'] = catalogo.codificar(df['Demo_Carrera'])
+    valores[['Demo_Semestre', 'Demo_Genero']] = df[['Demo_Semestre', 'Demo_Genero']].astype('string')
+    grupos = valores.groupby(por)[MEDIDAS]
+    medias, desvios = grupos.mean(), grupos.std()
+
+    # El cubo también guarda los grupos sin valor de la dimensión; se comparan los demás
+    cubo_medias = cubo.medias(por=por).reindex(medias.index)
+    cubo_desvios = np.sqrt(cubo.varianzas(por=por)).reindex(desvios.index)
+    np.testing.assert_allclose(cubo_medias.to_numpy(), medias.to_numpy(), rtol=1e-12)
+    np.testing.assert_allclose(cubo_desvios.to_numpy(), desvios.to_numpy(), rtol=1e-9)
+    assert (cubo.conteos(por=por).reindex(medias.index).to_numpy() == grupos.size().to_numpy()).all()
+
+
+def test_cubo_vigente_solo_con_el_mismo_parquet_y_catalogo(tmp_path, catalogo):
+    df = _encuesta(100)
+    parquet = os.path.join(tmp_path, ARCHIVO_PARQUET)
+    df.to_parquet(parquet)
+    cubo = CuboIndicadores.desde_encuesta(df, catalogo)
+    assert cargar_cubo_vigente(tmp_path, catalogo) is None  # Todavía no hay cubo
+
+    cubo.guardar(os.path.join(tmp_path, ARCHIVO_CUBO), origen=parquet, catalogo=catalogo)
+    vigente = cargar_cubo_vigente(tmp_path, catalogo)
+    pd.testing.assert_frame_equal(vigente.medias(por=['Demo_Genero']), cubo.medias(por=['Demo_Genero']),
+                                  check_index_type=False, rtol=1e-12)
+
+    # Otro catálogo de carreras (otro umbral, otra firma)
+    assert cargar_cubo_vigente(tmp_path, CatalogoCarreras(ruta_cache=None, umbral=0.9)) is None
+
+    # El Parquet cambió después de guardar el cubo
+    df.iloc[:50].to_parquet(parquet)
+    assert cargar_cubo_vigente(tmp_path, catalogo) is None
+
+    # Cubo guardado sin origen (sin Parquet)
+    cubo.guardar(os.path.join(tmp_path, ARCHIVO_CUBO), origen=None, catalogo=catalogo)
+    assert cargar_cubo_vigente(tmp_path, catalogo) is None
@@ -0,0 +1,37 @@
+import numpy as np
+import pandas as pd
+from deduplicacion import AlmacenHuellas, huellas_filas
+
+
+def test_huella_no_depende_del_tipo_de_la_columna():
+    # La misma fila leída en un bloque sin faltantes (int64) y en otro con un NaN (float64)
+    como_entero = pd.DataFrame({'_id': [7, 8], 'carrera': ['Finanzas', 'Derecho']})
+    como_float = pd.DataFrame({'_id': [7.0, np.nan], 'carrera': ['Finanzas', 'Derecho']})
+    assert como_entero['_id'].dtype == np.int64 and como_float['_id'].dtype == np.float64
+    assert huellas_filas(como_entero)[0] == huellas_filas(como_float)[0]
+    assert huellas_filas(como_entero)[1] != huellas_filas(como_float)[1]
+
+    como_objeto = pd.DataFrame({'_id': pd.Series([7, 'x'], dtype=object), 'carrera': [' finanzas ', 'x']})
+    assert huellas_filas(como_entero)[0] == huellas_filas(como_objeto)[0]
+
+
+def test_huella_depende_del_orden_y_de_las_columnas_clave():
+    df = pd.DataFrame({'a': [1, 2], 'b': [2, 1], 'c': ['x', 'y']})
+    huellas = huellas_filas(df, ['a', 'b'])
+    assert huellas[0] != huellas[1]
+    assert (huellas_filas(df, ['c']) != huellas_filas(df, ['a'])).all()
+
+
+def test_almacen_detecta_repetidas_entre_bloques_y_ejecuciones(tmp_path):
+    ruta = str(tmp_path / 'huellas.npy')
+    primer_bloque = pd.DataFrame({'_id': [1, 2, 2]})
+    segundo_bloque = pd.DataFrame({'_id': [2.0, 3.0, np.nan]})
+
+    almacen = AlmacenHuellas(ruta)
+    assert almacen.registrar(huellas_filas(primer_bloque)).tolist() == [False, False, True]
+    assert almacen.registrar(huellas_filas(segundo_bloque)).tolist() == [True, False, False]
+    almacen.guardar()
+
+    siguiente = AlmacenHuellas(ruta)
+    assert siguiente.registrar(huellas_filas(pd.DataFrame({'_id': ['3', 4]}))).tolist() == [True, False]
+    assert siguiente.registrar(huellas_filas(pd.DataFrame({'_id': [1.0]}))).tolist() == [True]
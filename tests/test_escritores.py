@@ -0,0 +1,118 @@
+import numpy as np
+import pandas as pd
+import pytest
+from escritores import EscritorCSV, EscritorExcel, EscritorParquet, EscritorFeather, EscritorEnProceso, GrupoEscritores
+from limpiar_datos import a_formato_columnar
+
+
+def _encuesta(filas=120):
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        '_id': np.arange(filas),
+        'nota': rng.integers(1, 6, filas).astype(float),
+        'carrera': rng.choice(['Finanzas', 'Derecho', 'Turismo'], filas),
+        'comentario': [f'texto libre {i}' for i in range(filas)],
+        'Análisis e interpretación de datos.': rng.choice(['Básico', 'Intermedio', 'Experto'], filas),
+        'vacia': np.nan,
+    })
+    df.loc[5, 'nota'] = np.nan
+    df.loc[:49, 'carrera'] = None  # Ausente en los primeros bloques
+    return df
+
+
+def _como_bloque(df):
+    # Como un bloque leído con openpyxl: las columnas sin valores quedan como object
+    # y los enteros sin faltantes, como int64
+    return df.astype(object).where(df.notna(), None).infer_objects()
+
+
+def _escribir(clase, ruta, bloques):
+    escritor = clase(str(ruta), preparar=a_formato_columnar)
+    for bloque in bloques:
+        escritor.escribir(bloque)
+    escritor.cerrar()
+
+
+@pytest.mark.parametrize('clase, lector', [(EscritorParquet, pd.read_parquet), (EscritorFeather, pd.read_feather)])
+def test_por_bloques_igual_que_completo(tmp_path, clase, lector):
+    df = _encuesta()
+    _escribir(clase, tmp_path / 'completo', [df])
+    _escribir(clase, tmp_path / 'bloques', [_como_bloque(df.iloc[i:i + 25]) for i in range(0, len(df), 25)])
+
+    completo, bloques = lector(tmp_path / 'completo'), lector(tmp_path / 'bloques')
+    pd.testing.assert_frame_equal(completo, bloques)
+    assert not (tmp_path / 'bloques.partes').exists()
+    if clase is EscritorParquet:
+        assert isinstance(completo['carrera'].dtype, pd.CategoricalDtype)
+        assert completo['Análisis e interpretación de datos.'].cat.ordered
+
+
+def test_anexar_igual_que_completo(tmp_path):
+    df = _encuesta()
+    _escribir(EscritorParquet, tmp_path / 'completo', [df])
+    _escribir(EscritorParquet, tmp_path / 'anexado', [_como_bloque(df.iloc[:60])])
+    escritor = EscritorParquet(str(tmp_path / 'anexado'), preparar=a_formato_columnar, anexar=True)
+    escritor.escribir(_como_bloque(df.iloc[60:]))
+    escritor.cerrar()
+    pd.testing.assert_frame_equal(pd.read_parquet(tmp_path / 'completo'), pd.read_parquet(tmp_path / 'anexado'))
+
+
+def test_abortar_no_toca_el_destino(tmp_path):
+    destino = tmp_path / 'salida.parquet'
+    _escribir(EscritorParquet, destino, [_encuesta(10)])
+    antes = destino.read_bytes()
+    escritor = EscritorParquet(str(destino), preparar=a_formato_columnar)
+    escritor.escribir(_encuesta(20))
+    escritor.abortar()
+    assert destino.read_bytes() == antes
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['salida.parquet']
+
+
+class _FallaAlCerrar(EscritorFeather):
+    def _cerrar(self):
+        raise OSError('disco lleno')
+
+
+def test_grupo_no_reemplaza_nada_si_un_escritor_falla(tmp_path):
+    rutas = [str(tmp_path / nombre) for nombre in ('salida.csv', 'salida.parquet', 'salida.feather')]
+    grupo = GrupoEscritores([EscritorCSV(rutas[0]), EscritorParquet(rutas[1]), EscritorFeather(rutas[2])])
+    grupo.escribir(_encuesta(10))
+    grupo.cerrar()
+    antes = {ruta: open(ruta, 'rb').read() for ruta in rutas}
+
+    grupo = GrupoEscritores([EscritorCSV(rutas[0]), EscritorParquet(rutas[1]), _FallaAlCerrar(rutas[2])])
+    grupo.escribir(_encuesta(20))
+    with pytest.raises(OSError):
+        grupo.cerrar()
+    assert {ruta: open(ruta, 'rb').read() for ruta in rutas} == antes
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['salida.csv', 'salida.feather', 'salida.parquet']
+
+
+def test_escritor_en_otro_proceso_igual_que_en_este(tmp_path):
+    df = _encuesta()
+    grupo = GrupoEscritores([EscritorEnProceso(EscritorExcel, str(tmp_path / 'proceso.xlsx')),
+                             EscritorCSV(str(tmp_path / 'salida.csv'))])
+    assert not grupo.escritores[0].en_proceso_aparte  # Los de este proceso van primero
+    for inicio in range(0, len(df), 25):
+        grupo.escribir(_como_bloque(df.iloc[inicio:inicio + 25]))
+    grupo.cerrar()
+    escritor = EscritorExcel(str(tmp_path / 'local.xlsx'))
+    escritor.escribir(df)
+    escritor.cerrar()
+
+    pd.testing.assert_frame_equal(pd.read_excel(tmp_path / 'proceso.xlsx'), pd.read_excel(tmp_path / 'local.xlsx'))
+    assert grupo.tiempos[str(tmp_path / 'proceso.xlsx')] > 0
+
+
+class _FallaAlEscribir(EscritorCSV):
+    def _escribir(self, df):
+        raise OSError('disco lleno')
+
+
+def test_error_en_otro_proceso_aborta_el_grupo(tmp_path):
+    rutas = [str(tmp_path / 'salida.parquet'), str(tmp_path / 'salida.csv')]
+    grupo = GrupoEscritores([EscritorParquet(rutas[0]), EscritorEnProceso(_FallaAlEscribir, rutas[1])])
+    grupo.escribir(_encuesta(10))
+    with pytest.raises(OSError):
+        grupo.cerrar()
+    assert sorted(p.name for p in tmp_path.iterdir()) == []
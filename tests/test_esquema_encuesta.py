@@ -0,0 +1,24 @@
+import glob
+import os
+import numpy as np
+import pandas as pd
+import pytest
+from esquema_encuesta import RENAME_DICT, nombres_cortos, codificar_likert
+from conftest import CARPETA_MODULOS
+
+
+def test_nombres_cortos_de_toda_la_exportacion():
+    entrada = glob.glob(os.path.join(CARPETA_MODULOS, 'ENCUESTA_DE_PERCEPCI*.xlsx'))[0]
+    columnas = pd.read_excel(entrada, nrows=0).columns
+    nombres = nombres_cortos(columnas)
+    # Sin nombre corto solo quedan las columnas de KoBo, que ya son cortas
+    assert [c for c in columnas if c not in nombres and not c.startswith('_')] == []
+    assert len(set(nombres.values())) == len(nombres)
+    assert {c: nombres[c] for c in RENAME_DICT} == RENAME_DICT
+
+
+@pytest.mark.filterwarnings('error')
+def test_codificar_likert_etiquetas_fuera_de_la_escala():
+    df = pd.DataFrame({'P1_Analisis_Datos': [' Experto ', 'Básico', 'Basico', '', 'De acuerdo', None, np.nan]})
+    codigos = codificar_likert(df, ['P1_Analisis_Datos'])['P1_Analisis_Datos']
+    assert codigos.tolist() == [5, 2, pd.NA, pd.NA, pd.NA, pd.NA, pd.NA]
@@ -0,0 +1,69 @@
+import os
+import shutil
+import logging
+import pandas as pd
+import pytest
+from openpyxl import load_workbook
+import limpiar_datos
+from conftest import CARPETA_MODULOS
+
+ENTRADA = os.path.join(CARPETA_MODULOS, limpiar_datos.ARCHIVO_ENTRADA)
+FORMATOS = ['xlsx', 'csv', 'parquet', 'feather']
+
+pytestmark = pytest.mark.skipif(not os.path.exists(ENTRADA), reason='falta la exportación de KoBo')
+
+
+def _limpiar(carpeta, monkeypatch, **opciones):
+    carpeta.mkdir(exist_ok=True)
+    if not (carpeta / limpiar_datos.ARCHIVO_ENTRADA).exists():
+        shutil.copyfile(ENTRADA, carpeta / limpiar_datos.ARCHIVO_ENTRADA)
+    monkeypatch.chdir(carpeta)
+    limpiar_datos.main(formatos=FORMATOS, **opciones)
+
+
+def test_streaming_igual_que_completo(tmp_path, monkeypatch):
+    _limpiar(tmp_path / 'completo', monkeypatch)
+    _limpiar(tmp_path / 'streaming', monkeypatch, streaming=True, tamano_bloque=37)
+
+    completo, streaming = tmp_path / 'completo', tmp_path / 'streaming'
+    csv = limpiar_datos.ARCHIVO_SALIDA_CSV
+    assert (completo / csv).read_bytes() == (streaming / csv).read_bytes()
+    for archivo, lector in ((limpiar_datos.ARCHIVO_SALIDA_PARQUET, pd.read_parquet),
+                            (limpiar_datos.ARCHIVO_SALIDA_FEATHER, pd.read_feather),
+                            (limpiar_datos.ARCHIVO_SALIDA_EXCEL, pd.read_excel)):
+        pd.testing.assert_frame_equal(lector(completo / archivo), lector(streaming / archivo))
+    pd.testing.assert_frame_equal(pd.read_parquet(completo / limpiar_datos.ARCHIVO_SALIDA_CUBO),
+                                  pd.read_parquet(streaming / limpiar_datos.ARCHIVO_SALIDA_CUBO))
+
+
+def _recortar_entrada(carpeta, filas):
+    # Como una exportación anterior de KoBo: las primeras `filas` respuestas, con
+    # las celdas tal cual (openpyxl conserva tipos y formato)
+    libro = load_workbook(ENTRADA)
+    hoja = libro.worksheets[0]
+    hoja.delete_rows(filas + 2, hoja.max_row)
+    carpeta.mkdir(exist_ok=True)
+    libro.save(carpeta / limpiar_datos.ARCHIVO_ENTRADA)
+
+
+def test_incremental_igual_que_completo(tmp_path, monkeypatch, caplog):
+    caplog.set_level(logging.INFO)
+    _limpiar(tmp_path / 'completo', monkeypatch)
+
+    incremental = tmp_path / 'incremental'
+    _recortar_entrada(incremental, 300)
+    _limpiar(incremental, monkeypatch, incremental=True)
+    assert len(pd.read_parquet(incremental / limpiar_datos.ARCHIVO_SALIDA_PARQUET)) < 161
+    shutil.copyfile(ENTRADA, incremental / limpiar_datos.ARCHIVO_ENTRADA)
+    caplog.clear()
+    _limpiar(incremental, monkeypatch, incremental=True)
+    assert 'Se omitieron 300 registros ya procesados' in caplog.text
+
+    completo = tmp_path / 'completo'
+    csv = limpiar_datos.ARCHIVO_SALIDA_CSV
+    assert (completo / csv).read_bytes() == (incremental / csv).read_bytes()
+    for archivo, lector in ((limpiar_datos.ARCHIVO_SALIDA_PARQUET, pd.read_parquet),
+                            (limpiar_datos.ARCHIVO_SALIDA_FEATHER, pd.read_feather),
+                            (limpiar_datos.ARCHIVO_SALIDA_EXCEL, pd.read_excel),
+                            (limpiar_datos.ARCHIVO_SALIDA_CUBO, pd.read_parquet)):
+        pd.testing.assert_frame_equal(lector(completo / archivo), lector(incremental / archivo))
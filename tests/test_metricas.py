@@ -0,0 +1,56 @@
+import os
+import json
+import threading
+import metricas
+from conftest import CARPETA_MODULOS
+
+
+def _lineas(ruta):
+    with open(ruta, 'r', encoding='utf-8') as f:
+        return [json.loads(linea) for linea in f if linea.strip()]
+
+
+def test_archivo_junto_al_codigo():
+    assert os.path.dirname(metricas.ARCHIVO_METRICAS) == CARPETA_MODULOS
+
+
+def test_ejecuciones_simultaneas_en_hilos_no_se_mezclan(tmp_path, monkeypatch):
+    ruta = str(tmp_path / 'metricas.jsonl')
+    monkeypatch.setattr(metricas, 'ARCHIVO_METRICAS', ruta)
+    listas = threading.Barrier(2)
+
+    def correr(script):
+        with metricas.ejecucion(script):
+            listas.wait()  # Las dos ejecuciones están abiertas a la vez
+            with metricas.tramo(f'etapa_{script}', filas=1):
+                listas.wait()
+            metricas.anotar(modo=script)
+
+    hilos = [threading.Thread(target=correr, args=(script,)) for script in ('a', 'b')]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+
+    por_script = {}
+    for linea in _lineas(ruta):
+        por_script.setdefault(linea['script'], set()).add(linea['etapa'])
+        assert linea['modo'] == linea['script']
+    assert por_script == {'a': {'etapa_a', 'total'}, 'b': {'etapa_b', 'total'}}
+
+    # Fuera de una ejecución no se registra nada
+    with metricas.tramo('suelta'):
+        pass
+    assert len(_lineas(ruta)) == 4
+
+
+def test_rota_al_superar_el_tope(tmp_path, monkeypatch):
+    ruta = str(tmp_path / 'metricas.jsonl')
+    monkeypatch.setattr(metricas, 'MAX_BYTES_METRICAS', 400)
+    for _ in range(5):
+        with metricas.ejecucion('script', ruta):
+            with metricas.tramo('etapa'):
+                pass
+    assert os.path.exists(ruta + '.1')
+    assert os.path.getsize(ruta) < 400 + 1000  # Como mucho el tope más una ejecución
+    assert {linea['script'] for linea in _lineas(ruta + '.1')} == {'script'}
@@ -0,0 +1,90 @@
+import pytest
+import pipeline
+from pipeline import Etapa, ejecutar_pipeline
+
+# Tres etapas en cadena (a -> b -> c); a usa además un módulo local
+SCRIPTS = {
+    'comun.py': "SUFIJO = '!'\n",
+    'a.py': ("import comun\n"
+             "texto = open('a.txt').read()\n"
+             "open('b.txt', 'w').write(texto + comun.SUFIJO)\n"),
+    'b.py': ("texto = open('b.txt').read()\n"
+             "if 'error' in texto:\n"
+             "    raise SystemExit(1)\n"
+             "open('c.txt', 'w').write(texto.upper())\n"),
+    'c.py': "open('d.txt', 'w').write(open('c.txt').read() * 2)\n",
+}
+
+ETAPAS = [
+    Etapa('a', 'a.py', entradas=['a.txt'], salidas=['b.txt']),
+    Etapa('b', 'b.py', entradas=['b.txt'], salidas=['c.txt']),
+    Etapa('c', 'c.py', entradas=['c.txt'], salidas=['d.txt']),
+]
+
+
+@pytest.fixture
+def carpeta(tmp_path, monkeypatch):
+    for nombre, codigo in SCRIPTS.items():
+        (tmp_path / nombre).write_text(codigo, encoding='utf-8')
+    (tmp_path / 'a.txt').write_text('hola', encoding='utf-8')
+    monkeypatch.setattr(pipeline, 'CARPETA', str(tmp_path))
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+def _correr(**opciones):
+    return ejecutar_pipeline(etapas=ETAPAS, procesos=2, **opciones)
+
+
+def test_sin_cambios_se_omite(carpeta):
+    assert _correr() == {'a': 'ejecutada', 'b': 'ejecutada', 'c': 'ejecutada'}
+    assert (carpeta / 'd.txt').read_text() == 'HOLA!HOLA!'
+    assert _correr() == {'a': 'omitida', 'b': 'omitida', 'c': 'omitida'}
+    assert _correr(forzar=True) == {'a': 'ejecutada', 'b': 'ejecutada', 'c': 'ejecutada'}
+
+
+def test_cambios_reejecutan_la_etapa_y_las_siguientes(carpeta):
+    _correr()
+
+    # Una entrada
+    (carpeta / 'a.txt').write_text('chao', encoding='utf-8')
+    assert _correr() == {'a': 'ejecutada', 'b': 'ejecutada', 'c': 'ejecutada'}
+    assert (carpeta / 'd.txt').read_text() == 'CHAO!CHAO!'
+
+    # Un módulo importado por el script
+    (carpeta / 'comun.py').write_text("SUFIJO = '?'\n", encoding='utf-8')
+    assert _correr() == {'a': 'ejecutada', 'b': 'ejecutada', 'c': 'ejecutada'}
+    assert (carpeta / 'd.txt').read_text() == 'CHAO?CHAO?'
+
+    # El script de una etapa intermedia: las anteriores siguen vigentes
+    (carpeta / 'b.py').write_text(SCRIPTS['b.py'].replace('.upper()', '.lower()'), encoding='utf-8')
+    assert _correr() == {'a': 'omitida', 'b': 'ejecutada', 'c': 'ejecutada'}
+    assert (carpeta / 'd.txt').read_text() == 'chao?chao?'
+
+    # Una salida borrada a mano
+    (carpeta / 'd.txt').unlink()
+    assert _correr() == {'a': 'omitida', 'b': 'omitida', 'c': 'ejecutada'}
+
+
+def test_etapa_fallida_bloquea_las_siguientes(carpeta):
+    (carpeta / 'a.txt').write_text('error', encoding='utf-8')
+    assert _correr() == {'a': 'ejecutada', 'b': 'fallida', 'c': 'bloqueada'}
+    assert not (carpeta / 'd.txt').exists()
+
+    # Corregida la entrada, se reintentan las que no terminaron
+    (carpeta / 'a.txt').write_text('hola', encoding='utf-8')
+    assert _correr() == {'a': 'ejecutada', 'b': 'ejecutada', 'c': 'ejecutada'}
+
+
+def test_objetivo_ejecuta_solo_lo_que_necesita(carpeta):
+    assert _correr(objetivos=['b']) == {'a': 'ejecutada', 'b': 'ejecutada'}
+    assert not (carpeta / 'd.txt').exists()
+
+
+def test_dependencias_circulares_o_etapa_desconocida(carpeta):
+    ciclo = [Etapa('x', 'a.py', entradas=['y.txt'], salidas=['x.txt']),
+             Etapa('y', 'b.py', entradas=['x.txt'], salidas=['y.txt'])]
+    with pytest.raises(ValueError, match='circulares'):
+        ejecutar_pipeline(etapas=ciclo + ETAPAS[2:])
+    with pytest.raises(ValueError, match='desconocidas'):
+        _correr(objetivos=['z'])
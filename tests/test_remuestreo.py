@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+import pytest
+import scipy.stats as stats
+import remuestreo
+from remuestreo import remuestrear, bootstrap_medias, intervalos_medias, intervalos_correlaciones, pruebas_anova
+
+
+def _datos(filas=150):
+    rng = np.random.default_rng(3)
+    x = rng.integers(1, 6, filas).astype(float)
+    df = pd.DataFrame({
+        'x': x,
+        'y': np.clip(x + rng.integers(-2, 3, filas), 1, 5),
+        'grupo': rng.choice(['A', 'B', 'C'], filas),
+    })
+    df.loc[rng.random(filas) < 0.1, 'y'] = np.nan
+    return df
+
+
+def test_misma_semilla_mismo_resultado_con_cualquier_numero_de_procesos(monkeypatch):
+    datos = _datos()[['x', 'y']].to_numpy()
+    secuencial = remuestrear(bootstrap_medias, datos, len(datos), n_remuestras=1200, semilla=7, procesos=1)
+    assert np.array_equal(secuencial, remuestrear(bootstrap_medias, datos, len(datos), n_remuestras=1200, semilla=7, procesos=1))
+    assert not np.array_equal(secuencial, remuestrear(bootstrap_medias, datos, len(datos), n_remuestras=1200, semilla=8, procesos=1))
+
+    # Forzar el pool de procesos aunque el trabajo sea chico
+    monkeypatch.setattr(remuestreo, 'MIN_CELDAS_PARALELO', 0)
+    paralelo = remuestrear(bootstrap_medias, datos, len(datos), n_remuestras=1200, semilla=7, procesos=2)
+    assert paralelo.shape == (1200, 2)
+    assert np.array_equal(secuencial, paralelo, equal_nan=True)
+
+
+def test_estadisticos_observados_igual_que_scipy():
+    df = _datos()
+    pares = df[['x', 'y']].dropna()
+    correlaciones = intervalos_correlaciones(df, [('H1', 'x', 'y')], n_remuestras=500)
+    assert correlaciones.at['H1', 'r'] == pytest.approx(stats.pearsonr(pares['x'], pares['y'])[0], abs=1e-12)
+    assert correlaciones.at['H1', 'ic_inf'] < correlaciones.at['H1', 'r'] < correlaciones.at['H1', 'ic_sup']
+    assert correlaciones.at['H1', 'p_perm'] == pytest.approx(1 / 501)  # Ninguna permutación llega a r
+
+    validas = df[['grupo', 'y']].dropna()
+    anova = pruebas_anova(df, 'grupo', ['y'], n_remuestras=500)
+    f = stats.f_oneway(*[g['y'] for _, g in validas.groupby('grupo')])[0]
+    assert anova.at['y', 'F'] == pytest.approx(f, rel=1e-9)
+    assert 0 < anova.at['y', 'p_perm'] <= 1
+
+    medias = intervalos_medias(df, ['x', 'y'], n_remuestras=500)
+    assert medias['media'].tolist() == pytest.approx([df['x'].mean(), df['y'].mean()])
+    assert (medias['ic_inf'] < medias['media']).all() and (medias['media'] < medias['ic_sup']).all()
+
+
+def test_resultados_reproducibles():
+    df = _datos()
+    primera = pruebas_anova(df, 'grupo', ['x', 'y'], n_remuestras=300, semilla=5)
+    segunda = pruebas_anova(df, 'grupo', ['x', 'y'], n_remuestras=300, semilla=5)
+    pd.testing.assert_frame_equal(primera, segunda)